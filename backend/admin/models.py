@@ -0,0 +1,85 @@
+import gc
+import threading
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from cache import cache_registry
+
+# Allocations by the profiler itself and the import system are noise
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # not POSIX
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_report() -> Dict[str, Any]:
+    """Cache sizes against the budget, plus process-level memory figures."""
+    report = cache_registry.stats()
+    report["max_rss_bytes"] = _max_rss_bytes()
+    report["tracemalloc"] = tracemalloc.is_tracing()
+    if report["tracemalloc"]:
+        report["traced_bytes"], report["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+    return report
+
+
+def take_snapshot(limit: int = 20, group_by: str = "lineno", frames: int = 10) -> Dict[str, Any]:
+    """
+    Take a tracemalloc snapshot and compare it with the previous one.
+
+    The first call starts tracemalloc (recording `frames` frames per
+    allocation) and returns the largest allocation sites so far; later
+    calls return the sites that grew most since the last snapshot. Taking
+    snapshots between bursts of traffic shows where memory is retained.
+    """
+    global _baseline
+    with _snapshot_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _baseline = None
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        previous, _baseline = _baseline, snapshot
+
+    if previous is None:
+        stats = snapshot.statistics(group_by)[:limit]
+    else:
+        stats = snapshot.compare_to(previous, group_by)[:limit]
+    traced, peak = tracemalloc.get_traced_memory()
+    return {
+        "compared_to_previous": previous is not None,
+        "traced_bytes": traced,
+        "traced_peak_bytes": peak,
+        "top": [
+            {
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size": stat.size,
+                "size_diff": getattr(stat, "size_diff", stat.size),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", stat.count),
+            }
+            for stat in stats
+        ],
+    }
+
+
+def stop_tracing() -> None:
+    """Stop tracemalloc and drop the baseline snapshot."""
+    global _baseline
+    with _snapshot_lock:
+        _baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -0,0 +1,42 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Query
+
+from admin.models import memory_report, stop_tracing, take_snapshot
+from admission import admission_limiters
+from auth.jwt_handler import get_admin_user_id
+
+router = APIRouter(dependencies=[Depends(get_admin_user_id)])
+
+
+@router.get("/memory")
+async def get_memory():
+    """In-process cache sizes against CACHE_MEMORY_BUDGET_BYTES, and process memory."""
+    return memory_report()
+
+
+@router.post("/memory/snapshots")
+async def create_memory_snapshot(
+    limit: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", regex="^(lineno|filename|traceback)$"),
+    frames: int = Query(10, ge=1, le=100, description="Frames per allocation when starting"),
+):
+    """
+    Take a tracemalloc snapshot (starting tracemalloc on first use) and
+    return the allocation sites that grew most since the previous one.
+    """
+    # Snapshots walk every traced allocation; keep that off the event loop
+    return await asyncio.to_thread(take_snapshot, limit, group_by, frames)
+
+
+@router.delete("/memory/snapshots")
+async def delete_memory_snapshots():
+    """Stop tracemalloc, which slows every allocation while it runs."""
+    stop_tracing()
+    return {"tracemalloc": False}
+
+
+@router.get("/admission")
+async def get_admission():
+    """Per route class: active and queued requests, admissions and shed counts."""
+    return {name: limiter.stats() for name, limiter in admission_limiters.items()}
@@ -0,0 +1,180 @@
+"""
+Admission control for expensive routes.
+
+Requests are sorted into route classes (TMDb-bound, heavy DB reads). Each
+class admits a fixed number of concurrent requests per worker; the rest
+wait in a bounded FIFO queue for at most max_wait seconds. A request that
+finds the queue full, or outwaits its budget, is shed at once with 503
+and Retry-After instead of piling onto the event loop, so admitted
+requests keep bounded latency under a burst. Time spent queued is
+reported in a Server-Timing header.
+"""
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# (class name, path pattern); the first match wins
+ROUTE_CLASSES: List[Tuple[str, Pattern]] = [
+    ("tmdb", re.compile(r"^/api/shows/(search|trending|\d+)(/|$)")),
+    ("heavy_db", re.compile(r"^/api/(episodes/progress|dashboard)(/|$)")),
+]
+
+
+def route_class(path: str) -> Optional[str]:
+    for name, pattern in ROUTE_CLASSES:
+        if pattern.match(path):
+            return name
+    return None
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded, deadline-limited wait queue."""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.max_queue_seconds = 0.0
+
+    async def acquire(self) -> bool:
+        """Wait for a slot. Returns False if the request should be shed."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.admitted += 1
+                return True  # handed a slot right at the deadline
+            self._discard(waiter)
+            self.shed_timeout += 1
+            return False
+        except BaseException:
+            # Client went away while queued; pass on a slot we were given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest live waiter."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+    def record_wait(self, seconds: float) -> None:
+        self.max_queue_seconds = max(self.max_queue_seconds, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "max_queue_ms": round(self.max_queue_seconds * 1000, 1),
+        }
+
+
+class AdmissionMiddleware:
+    """Applies an AdmissionLimiter per route class; other requests pass straight through."""
+
+    def __init__(self, app: ASGIApp, limiters: Dict[str, AdmissionLimiter], retry_after: int = 1):
+        self.app = app
+        self.limiters = limiters
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = None
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            limiter = self.limiters.get(route_class(scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        if not await limiter.acquire():
+            await self._shed(send)
+            return
+        waited = time.perf_counter() - started
+        limiter.record_wait(waited)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", f"queue;dur={waited * 1000:.1f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            limiter.release()
+
+    async def _shed(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server busy, please retry"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def limiters_from_settings() -> Dict[str, AdmissionLimiter]:
+    from config import settings
+
+    return {
+        "tmdb": AdmissionLimiter(
+            "tmdb",
+            settings.ADMISSION_TMDB_CONCURRENCY,
+            settings.ADMISSION_TMDB_QUEUE_SIZE,
+            settings.ADMISSION_TMDB_MAX_WAIT_MS / 1000,
+        ),
+        "heavy_db": AdmissionLimiter(
+            "heavy_db",
+            settings.ADMISSION_DB_CONCURRENCY,
+            settings.ADMISSION_DB_QUEUE_SIZE,
+            settings.ADMISSION_DB_MAX_WAIT_MS / 1000,
+        ),
+    }
+
+
+admission_limiters = limiters_from_settings()
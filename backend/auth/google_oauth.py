@@ -1,8 +1,9 @@
-import httpx
 from typing import Optional
 from urllib.parse import urlencode
 from pydantic import BaseModel
 
+import tracing
+from auth.jwks import google_jwks
 from config import settings
 
 
@@ -26,6 +27,11 @@ class GoogleUserInfo(BaseModel):
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+
+
+class IdTokenUnavailable(Exception):
+    """The id_token could not be checked locally; fall back to userinfo."""
 
 
 def get_google_auth_url(state: Optional[str] = None) -> str:
@@ -45,17 +51,22 @@ def get_google_auth_url(state: Optional[str] = None) -> str:
 
 async def exchange_code_for_token(code: str) -> GoogleTokenResponse:
     """Exchange authorization code for access token."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "code": code,
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                "grant_type": "authorization_code",
-            },
-        )
+    import httpx
+
+    attributes = {"http.method": "POST", "url.full": GOOGLE_TOKEN_URL}
+    with tracing.span("google POST token", tracing.CLIENT, attributes) as span:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                GOOGLE_TOKEN_URL,
+                data={
+                    "code": code,
+                    "client_id": settings.GOOGLE_CLIENT_ID,
+                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                    "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+                    "grant_type": "authorization_code",
+                },
+            )
+        span.set_attribute("http.status_code", response.status_code)
         response.raise_for_status()
         data = response.json()
         return GoogleTokenResponse(**data)
@@ -63,11 +74,48 @@ async def exchange_code_for_token(code: str) -> GoogleTokenResponse:
 
 async def get_user_info(access_token: str) -> GoogleUserInfo:
     """Fetch user info from Google using access token."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
+    import httpx
+
+    attributes = {"http.method": "GET", "url.full": GOOGLE_USERINFO_URL}
+    with tracing.span("google GET userinfo", tracing.CLIENT, attributes) as span:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(
+                GOOGLE_USERINFO_URL,
+                headers={"Authorization": f"Bearer {access_token}"},
+            )
+        span.set_attribute("http.status_code", response.status_code)
         response.raise_for_status()
         data = response.json()
         return GoogleUserInfo(**data)
+
+
+async def verify_id_token(id_token: str, access_token: Optional[str] = None) -> GoogleUserInfo:
+    """
+    Verify a Google id_token against Google's cached signing keys and
+    return the profile it carries, without calling the userinfo endpoint.
+
+    Raises jose.JWTError if the token is forged, expired or meant for
+    another client, and IdTokenUnavailable if the keys cannot be fetched
+    or the token lacks the profile claims.
+    """
+    from jose import jwt
+
+    kid = jwt.get_unverified_header(id_token).get("kid")
+    try:
+        key = await google_jwks.get_key(kid)
+    except Exception as e:
+        raise IdTokenUnavailable(f"Could not fetch Google signing keys: {e}") from e
+    if key is None:
+        raise IdTokenUnavailable(f"Unknown signing key: {kid}")
+
+    claims = jwt.decode(
+        id_token,
+        key,
+        algorithms=["RS256"],
+        audience=settings.GOOGLE_CLIENT_ID,
+        issuer=GOOGLE_ISSUERS,
+        access_token=access_token,
+    )
+    if "email" not in claims:
+        raise IdTokenUnavailable("id_token has no email claim")
+    return GoogleUserInfo(**claims)
@@ -0,0 +1,102 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional
+
+import tracing
+from config import settings
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def cache_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Return max-age (seconds) from a Cache-Control header, if present."""
+    match = _MAX_AGE.search(cache_control or "")
+    return int(match.group(1)) if match else None
+
+
+class JWKSCache:
+    """
+    Signing keys from a JWKS endpoint, cached for as long as its
+    Cache-Control max-age allows (JWKS_DEFAULT_TTL_SECONDS without one).
+
+    Once the keys are within JWKS_REFRESH_AHEAD_SECONDS of expiring, a
+    lookup still returns the cached key and starts a background refresh,
+    so logins only wait on the network the very first time or when a key
+    id is unknown (Google rotated keys early). Unknown key ids trigger at
+    most one fetch per JWKS_MIN_REFRESH_SECONDS.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def load(self, jwks: Dict[str, Any], max_age: Optional[int] = None) -> None:
+        """Replace the cached keys with a JWKS document."""
+        self._keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        ttl = settings.JWKS_DEFAULT_TTL_SECONDS if max_age is None else max_age
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + ttl
+
+    def clear(self) -> None:
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+
+    async def _fetch(self) -> None:
+        # Imported on first use to keep httpx out of cold-start import time
+        import httpx
+
+        with tracing.span("google GET jwks", tracing.CLIENT, {"http.method": "GET", "url.full": self.url}) as span:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(self.url)
+            span.set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            self.load(response.json(), cache_max_age(response.headers.get("cache-control")))
+
+    async def refresh(self) -> None:
+        """Fetch the keys now; concurrent callers share one request."""
+        fetched_at = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != fetched_at:
+                return  # another caller refreshed while we waited
+            await self._fetch()
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            # Keep serving the cached keys; the next lookup tries again
+            pass
+
+    async def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the JWK with this key id, or None if the endpoint does not
+        publish it. Raises httpx errors only when nothing usable is cached.
+        """
+        now = time.monotonic()
+        fresh = now < self._expires_at
+        key = self._keys.get(kid)
+        if key is not None and fresh:
+            if self._expires_at - now <= settings.JWKS_REFRESH_AHEAD_SECONDS:
+                self._refresh_in_background()
+            return key
+        if fresh and now - self._fetched_at < settings.JWKS_MIN_REFRESH_SECONDS:
+            return None
+
+        # Expired keys or an unknown kid: wait for a fresh copy
+        await self.refresh()
+        return self._keys.get(kid)
+
+
+google_jwks = JWKSCache(GOOGLE_JWKS_URL)
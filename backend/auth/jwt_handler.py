@@ -1,7 +1,6 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -12,6 +11,10 @@ security = HTTPBearer()
 
 def create_access_token(user_id: str, extra_data: Optional[dict] = None) -> str:
     """Create a JWT access token for a user."""
+    # Imported on first use: python-jose pulls in cryptography, which is
+    # slow to import and not needed until a request is authenticated.
+    from jose import jwt
+
     payload = {
         "user_id": user_id,
         "exp": datetime.now(timezone.utc) + timedelta(days=settings.JWT_EXPIRATION_DAYS),
@@ -24,6 +27,8 @@ def create_access_token(user_id: str, extra_data: Optional[dict] = None) -> str:
 
 def verify_token(token: str) -> dict:
     """Verify and decode a JWT token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(
             token,
@@ -52,3 +57,17 @@ def get_current_user_id(
             detail="Invalid token payload",
         )
     return user_id
+
+
+def get_admin_user_id(user_id: str = Depends(get_current_user_id)) -> str:
+    """FastAPI dependency allowing only users whose email is in ADMIN_EMAILS."""
+    from database import fetch_one
+
+    user = fetch_one("users.get", (user_id,))
+    admins = {email.lower() for email in settings.ADMIN_EMAILS}
+    if user is None or user["email"].lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user_id
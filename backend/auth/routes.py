@@ -4,11 +4,13 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import RedirectResponse
 
 from schemas import TokenResponse, GoogleAuthUrl
-from database import execute_query, execute_write, row_to_dict
+from database import execute, fetch_one, row_to_dict
 from auth.google_oauth import (
+    IdTokenUnavailable,
     get_google_auth_url,
     exchange_code_for_token,
     get_user_info,
+    verify_id_token,
 )
 from auth.jwt_handler import create_access_token
 
@@ -47,35 +49,31 @@ async def oauth_callback(
         # Exchange code for tokens
         token_response = await exchange_code_for_token(code)
 
-        # Get user info from Google
-        user_info = await get_user_info(token_response.access_token)
+        # The id_token already carries the profile; only ask the userinfo
+        # endpoint when it cannot be checked locally
+        try:
+            user_info = await verify_id_token(
+                token_response.id_token,
+                access_token=token_response.access_token,
+            )
+        except IdTokenUnavailable:
+            user_info = await get_user_info(token_response.access_token)
 
         # Check if user exists
-        rows = execute_query(
-            "SELECT * FROM users WHERE google_id = ?",
-            (user_info.sub,),
-        )
-        user = row_to_dict(rows[0]) if rows else None
+        user = row_to_dict(fetch_one("users.get_by_google_id", (user_info.sub,)))
 
         if user:
             user_id = user["id"]
             # Update user info if changed
-            execute_write(
-                """
-                UPDATE users
-                SET name = ?, picture_url = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-                """,
+            execute(
+                "users.update_profile",
                 (user_info.name, user_info.picture, user_id),
             )
         else:
             # Create new user
             user_id = str(uuid.uuid4())
-            execute_write(
-                """
-                INSERT INTO users (id, google_id, email, name, picture_url)
-                VALUES (?, ?, ?, ?, ?)
-                """,
+            execute(
+                "users.insert",
                 (
                     user_id,
                     user_info.sub,
@@ -107,8 +105,7 @@ async def get_current_user_info(user_id: str = None):
     if not user_id:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    rows = execute_query("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = row_to_dict(rows[0]) if rows else None
+    user = row_to_dict(fetch_one("users.get", (user_id,)))
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
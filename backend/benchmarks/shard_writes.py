@@ -0,0 +1,96 @@
+"""
+Measure how write throughput scales with DB_SHARDS.
+
+    cd backend
+    python benchmarks/shard_writes.py --shards 1 2 4 --processes 8 --duration 10
+
+For each shard count a fresh database is seeded with one show, then
+separate processes, each with its own users, mark and unmark episodes
+as fast as they can. Every mark or unmark is one write transaction.
+Prints committed writes per second and how many hit "database is locked".
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+EPISODES = 50
+
+SEED = f"""
+from database import init_db
+from shows.models import cache_show_from_tmdb
+
+init_db()
+cache_show_from_tmdb({{"id": 1, "name": "Show", "number_of_episodes": {EPISODES}}})
+"""
+
+WRITER = """
+import sqlite3, sys, time
+from episodes.models import mark_episode_watched, unmark_episode_watched
+from shows.models import add_show_to_user
+
+process, users, duration = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+user_ids = [f"bench-{process}-{n}" for n in range(users)]
+for user_id in user_ids:
+    add_show_to_user(user_id, 1)
+writes = locked = n = 0
+stop_at = time.monotonic() + duration
+while time.monotonic() < stop_at:
+    user_id = user_ids[n % users]
+    episode = n // users % EPISODES + 1
+    n += 1
+    try:
+        mark_episode_watched(user_id, 1, 1, episode)
+        unmark_episode_watched(user_id, 1, 1, episode)
+        writes += 2
+    except sqlite3.OperationalError:
+        locked += 1
+print(writes, locked)
+""".replace("EPISODES", str(EPISODES))
+
+
+def run(shards: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "DB_SHARDS": str(shards),
+            "JWT_SECRET": "benchmark-secret",
+            "SCHEDULER_ENABLED": "false",
+        }
+        subprocess.run([sys.executable, "-c", SEED], cwd=BACKEND_DIR, env=env, check=True)
+        writers = [
+            subprocess.Popen(
+                [sys.executable, "-c", WRITER, str(i), str(args.users), str(args.duration)],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True,
+            )
+            for i in range(args.processes)
+        ]
+        writes = locked = 0
+        for writer in writers:
+            out, _ = writer.communicate()
+            w, l = map(int, out.split()[-2:])
+            writes, locked = writes + w, locked + l
+    return {"shards": shards, "wps": writes / args.duration, "locked": locked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processes", type=int, default=8, help="concurrent writer processes")
+    parser.add_argument("--users", type=int, default=16, help="users per process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.processes} writer processes")
+    print(f"{'shards':>6}  {'writes/s':>9}  {'locked':>6}")
+    for shards in args.shards:
+        r = run(shards, args)
+        print(f"{r['shards']:>6}  {r['wps']:>9.0f}  {r['locked']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measure the TMDb client path (caching, concurrency) against a replayed
+corpus instead of the network.
+
+    cd backend
+    TMDB_TRANSPORT=record TMDB_API_KEY=... uvicorn main:app   # browse to fill the corpus
+    python benchmarks/tmdb_replay.py --corpus tmdb_corpus.jsonl.gz --latency-ms 80 --jitter-ms 40
+
+Show detail requests are drawn from the shows in the corpus, skewed
+towards a few popular ones, and issued by concurrent callers. Prints
+calls/second, latency percentiles, failures and how many requests
+reached the (replayed) TMDb.
+"""
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shows.tmdb_client import TMDbClient  # noqa: E402
+from shows.tmdb_transport import ReplayTransport  # noqa: E402
+
+SHOW_KEY = re.compile(r"^GET /3/tv/(\d+)\?")
+
+
+async def run(args) -> None:
+    transport = ReplayTransport(
+        Path(args.corpus),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    show_ids = sorted({int(m.group(1)) for m in map(SHOW_KEY.match, transport.corpus) if m})
+    if not show_ids:
+        raise SystemExit(f"No show details in {args.corpus}")
+
+    client = TMDbClient(transport=transport)
+    rng = random.Random(args.seed)
+    # Zipf-like popularity: a handful of shows get most requests
+    weights = [1 / rank for rank in range(1, len(show_ids) + 1)]
+    picks = rng.choices(show_ids, weights=weights, k=args.requests)
+    queue = iter(picks)
+    latencies, failures = [], 0
+
+    async def caller():
+        nonlocal failures
+        for show_id in queue:
+            started = time.perf_counter()
+            try:
+                await client.get_show_details(show_id, use_cache=not args.no_cache)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"{len(show_ids)} shows in corpus, {args.requests} calls, {args.concurrency} callers")
+    print(f"calls/s {len(latencies) / elapsed:.0f}  p50 {pct(0.5):.1f} ms  p99 {pct(0.99):.1f} ms")
+    print(f"failures {failures}  upstream requests {transport.requests}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="tmdb_corpus.jsonl.gz")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true", help="bypass the TMDb response cache")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
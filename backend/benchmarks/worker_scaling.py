@@ -0,0 +1,179 @@
+"""
+Measure how request throughput scales with the number of gunicorn workers.
+
+    cd backend
+    python benchmarks/worker_scaling.py --workers 1 2 4 --duration 10
+
+For each worker count a server is started from gunicorn.conf.py against a
+fresh SQLite file seeded with one user library, then hit by concurrent
+clients issuing a read-heavy mix (dashboard, show list, up-next) with a
+share of episode writes. Rate limiting and admission control are off, so
+the single benchmark client is neither throttled nor shed. Prints
+successful (2xx) requests/second and their latency percentiles, and
+counts any other responses separately.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SHOWS = 20
+EPISODES_PER_SHOW = 30
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(env: dict) -> str:
+    """Create the schema and one user library; returns a bearer token."""
+    script = f"""
+import uuid
+from auth.jwt_handler import create_access_token
+from database import execute_write, init_db
+from episodes.models import mark_episodes_watched_batch
+from shows.models import add_show_to_user, cache_season_from_tmdb, cache_show_from_tmdb
+
+init_db()
+user_id = str(uuid.uuid4())
+execute_write(
+    "INSERT INTO users (id, google_id, email, name) VALUES (?, ?, ?, ?)",
+    (user_id, "bench", "bench@example.com", "Bench"),
+)
+for show_id in range(1, {SHOWS} + 1):
+    cache_show_from_tmdb({{"id": show_id, "name": f"Show {{show_id}}", "number_of_episodes": {EPISODES_PER_SHOW}}})
+    cache_season_from_tmdb(show_id, {{
+        "season_number": 1,
+        "episodes": [{{"episode_number": n}} for n in range(1, {EPISODES_PER_SHOW} + 1)],
+    }})
+    add_show_to_user(user_id, show_id)
+    mark_episodes_watched_batch(user_id, show_id, [(1, n) for n in range(1, 11)])
+print(create_access_token(user_id))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+async def wait_until_up(client, base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{base_url}/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def load(base_url: str, token: str, duration: float, concurrency: int, write_ratio: float):
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    reads = ["/api/dashboard", "/api/shows/user/list", "/api/episodes/up-next"]
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        await wait_until_up(client, base_url)
+        stop_at = time.monotonic() + duration
+
+        async def worker():
+            nonlocal errors
+            rng = random.Random()
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                if rng.random() < write_ratio:
+                    op = {
+                        "op": rng.choice(["mark", "unmark"]),
+                        "show_id": rng.randint(1, SHOWS),
+                        "season": 1,
+                        "episode": rng.randint(1, EPISODES_PER_SHOW),
+                    }
+                    response = await client.post(
+                        f"{base_url}/api/episodes/mutations",
+                        json={"operations": [op]},
+                        headers=headers,
+                    )
+                else:
+                    response = await client.get(base_url + rng.choice(reads), headers=headers)
+                if 200 <= response.status_code < 300:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run(workers: int, args) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "JWT_SECRET": "benchmark-secret",
+            "SCHEDULER_ENABLED": "false",
+            "RATE_LIMIT_ENABLED": "false",
+            "ADMISSION_ENABLED": "false",
+            "WEB_CONCURRENCY": str(workers),
+            "BIND": f"127.0.0.1:{port}",
+        }
+        token = seed(env)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py",
+             "--access-logfile", "/dev/null", "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            latencies, errors = asyncio.run(
+                load(f"http://127.0.0.1:{port}", token, args.duration, args.concurrency, args.write_ratio)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        if not latencies:
+            return float("nan")
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "workers": workers,
+        "rps": len(latencies) / args.duration,
+        "p50": pct(0.50),
+        "p99": pct(0.99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="share of requests that write")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, {args.write_ratio:.0%} writes")
+    print(f"{'workers':>7}  {'req/s':>8}  {'p50 ms':>7}  {'p99 ms':>7}  {'non-2xx':>7}")
+    for workers in args.workers:
+        r = run(workers, args)
+        print(f"{r['workers']:>7}  {r['rps']:>8.0f}  {r['p50']:>7.1f}  {r['p99']:>7.1f}  {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
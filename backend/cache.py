@@ -0,0 +1,557 @@
+import json
+import math
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# Per-entry bookkeeping (tuple, OrderedDict node) on top of key and value
+ENTRY_OVERHEAD = 120
+
+# Objects approx_size visits before it stops counting
+APPROX_SIZE_LIMIT = 1000
+
+
+def approx_size(obj: Any, _seen: Optional[set] = None, limit: int = APPROX_SIZE_LIMIT) -> int:
+    """
+    Approximate memory held by an object and everything it references:
+    containers, instance __dict__ and __slots__. Shared objects are
+    counted once. The walk stops after `limit` objects, so very large
+    graphs are undercounted rather than walked in full on every insert.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or len(seen) >= limit:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            approx_size(k, seen, limit) + approx_size(v, seen, limit) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approx_size(item, seen, limit) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), seen, limit)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += approx_size(getattr(obj, slot), seen, limit)
+    return size
+
+
+class CacheRegistry:
+    """
+    Every named in-process cache, with a shared memory budget.
+
+    Caches report (entries, bytes) through memory_stats() and give memory
+    back through shrink(nbytes). After each insert the registry checks the
+    total; above the budget it asks every cache to shed its share of the
+    excess, oldest entries first, until the total is EVICT_TO of budget.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(self, budget: Optional[int] = None):
+        self._budget = budget
+        self._caches: "weakref.WeakSet" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def budget(self) -> int:
+        if self._budget is None:
+            from config import settings
+
+            self._budget = settings.CACHE_MEMORY_BUDGET_BYTES
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int) -> None:
+        self._budget = value
+
+    def register(self, cache) -> None:
+        self._caches.add(cache)
+
+    def caches(self) -> List[Any]:
+        return list(self._caches)
+
+    def total_bytes(self) -> int:
+        return sum(cache.memory_stats()[1] for cache in self.caches())
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries and bytes per cache (summed by name), largest first."""
+        by_name: Dict[str, Dict[str, int]] = {}
+        for cache in self.caches():
+            entries, nbytes = cache.memory_stats()
+            row = by_name.setdefault(cache.name, {"entries": 0, "bytes": 0})
+            row["entries"] += entries
+            row["bytes"] += nbytes
+        caches = sorted(
+            ({"name": name, **row} for name, row in by_name.items()),
+            key=lambda row: row["bytes"],
+            reverse=True,
+        )
+        return {
+            "budget_bytes": self.budget,
+            "total_bytes": sum(row["bytes"] for row in caches),
+            "evictions": self.evictions,
+            "caches": caches,
+        }
+
+    def check(self) -> None:
+        """Evict across caches if their total exceeds the budget."""
+        if not self.budget:
+            return
+        total = self.total_bytes()
+        if total <= self.budget or not self._lock.acquire(blocking=False):
+            return  # within budget, or another thread is already evicting
+        try:
+            excess = total - int(self.budget * self.EVICT_TO)
+            for cache in self.caches():
+                nbytes = cache.memory_stats()[1]
+                if nbytes:
+                    cache.shrink(math.ceil(excess * nbytes / total))
+            self.evictions += 1
+        finally:
+            self._lock.release()
+
+
+cache_registry = CacheRegistry()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry expiry.
+    Entries are evicted least-recently-used first once maxsize is reached.
+    A named cache tracks its approximate size in bytes and joins the
+    cache_registry memory budget.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.bytes = 0
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        if name:
+            cache_registry.register(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry and mark it recently used."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at, size = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.bytes -= size
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None
+    ) -> None:
+        """
+        Store an entry, evicting the oldest ones if the cache is full.
+        size is the value's approximate memory if the caller already knows
+        it; otherwise a named cache estimates it with approx_size.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        if not self.name:
+            size = 0
+        else:
+            if size is None:
+                size = approx_size(value)
+            size += approx_size(key) + ENTRY_OVERHEAD
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.maxsize:
+                self.bytes -= self._data.popitem(last=False)[1][2]
+        if self.name:
+            cache_registry.check()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None:
+                self.bytes -= item[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def shrink(self, nbytes: int) -> int:
+        """Evict least recently used entries until nbytes are freed. Returns bytes freed."""
+        freed = 0
+        with self._lock:
+            while self._data and freed < nbytes:
+                freed += self._data.popitem(last=False)[1][2]
+            self.bytes -= freed
+        return freed
+
+    def memory_stats(self) -> Tuple[int, int]:
+        """(entries, approximate bytes)"""
+        return len(self._data), self.bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+
+# ─────────────────────────────────────────────────────────────
+# Shared (L2) cache backends
+#
+# A backend stores opaque bytes under string keys and must support
+# get/set/delete plus an atomic incr (optionally expiring, set when the
+# counter is created) used for version stamps and rate limits, and a
+# `local` flag saying whether it lives in this process. Anything with that
+# shape (e.g. a Workers KV adapter) can be plugged in.
+# ─────────────────────────────────────────────────────────────
+class MemoryBackend:
+    """
+    Process-local stand-in for a shared backend (tests, single worker).
+    A named backend joins the cache_registry memory budget; shrinking
+    drops the oldest expiring entries and never version stamps.
+    """
+
+    # Lives in this process, so a TwoTierCache in front of it skips L1
+    local = True
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.bytes = 0
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        if name:
+            cache_registry.register(self)
+
+    @staticmethod
+    def _size(key: str, value: bytes) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD
+
+    def _pop(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= self._size(key, item[0])
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                self._pop(key)
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, expires_at)
+            self.bytes += self._size(key, value)
+        if self.name:
+            cache_registry.check()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, (b"0", None))
+            if expires_at is not None and expires_at < time.time():
+                value, expires_at = b"0", None
+            if expires_at is None and ttl:
+                expires_at = time.time() + ttl
+            new = int(value) + 1
+            self._pop(key)
+            self._data[key] = (str(new).encode(), expires_at)
+            self.bytes += self._size(key, self._data[key][0])
+            return new
+
+    def shrink(self, nbytes: int) -> int:
+        """Drop the oldest entries that have a TTL until nbytes are freed."""
+        freed = 0
+        with self._lock:
+            for key in [k for k, (_, expires_at) in self._data.items() if expires_at is not None]:
+                if freed >= nbytes:
+                    break
+                before = self.bytes
+                self._pop(key)
+                freed += before - self.bytes
+        return freed
+
+    def memory_stats(self) -> Tuple[int, int]:
+        """(entries, approximate bytes)"""
+        return len(self._data), self.bytes
+
+
+class SQLiteBackend:
+    """Shared cache in a SQLite file, visible to every worker on the host."""
+
+    local = False
+
+    PURGE_EVERY = 256  # sets between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sets = 0
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._sets += 1
+            if self._sets % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                INSERT INTO cache (key, value, expires_at) VALUES (?, '1', ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = CASE WHEN expires_at < ? THEN 1 ELSE CAST(value AS INTEGER) + 1 END,
+                    expires_at = CASE WHEN expires_at < ? THEN excluded.expires_at
+                                      ELSE COALESCE(expires_at, excluded.expires_at) END
+                RETURNING value
+                """,
+                (key, expires_at, now, now),
+            ).fetchone()
+        return int(row[0])
+
+
+class RedisBackend:
+    """Shared cache in Redis (requires the optional `redis` package)."""
+
+    local = False
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(key, value, ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        if not ttl:
+            return int(self.client.incr(key))
+        pipeline = self.client.pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, int(ttl), nx=True)
+        return int(pipeline.execute()[0])
+
+
+_shared_backend = None
+
+
+def get_shared_backend():
+    """Return the process-wide L2 backend configured by CACHE_BACKEND."""
+    global _shared_backend
+    if _shared_backend is None:
+        from config import settings
+
+        if settings.CACHE_BACKEND == "sqlite":
+            _shared_backend = SQLiteBackend(settings.CACHE_URL or "showtracker-cache.db")
+        elif settings.CACHE_BACKEND == "redis":
+            _shared_backend = RedisBackend(settings.CACHE_URL or "redis://localhost:6379/0")
+        else:
+            _shared_backend = MemoryBackend(name="shared")
+    return _shared_backend
+
+
+def json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(raw: bytes) -> Any:
+    return json.loads(raw)
+
+
+class CacheEntry:
+    """One TwoTierCache key, stamped when the entry was looked up."""
+
+    __slots__ = ("cache", "key")
+
+    def __init__(self, cache: "TwoTierCache", key: str):
+        self.cache = cache
+        self.key = key
+
+    def get(self, default: Any = None) -> Any:
+        return self.cache._get(self.key, default)
+
+    def set(self, value: Any, ttl: Optional[float] = None) -> None:
+        self.cache._set(self.key, value, ttl)
+
+
+class TwoTierCache:
+    """
+    In-process LRU (L1) in front of a shared backend (L2).
+
+    Values are serialized into L2 with dumps/loads (JSON by default, so
+    anything in the shared store is data, never code) and any worker can
+    read them. L1 entries are sized from the serialized length times
+    size_factor, the in-memory bytes per serialized byte, so the memory
+    budget needs no walk over each value. When L2 is local to the process
+    (MemoryBackend) L1 is skipped, so each value is held only once.
+
+    Invalidation uses version stamps kept in L2: bump(scope) increments a
+    counter that is part of every key in that scope (bump() with no scope
+    covers the whole namespace), so stale entries in other workers' L1 are
+    simply never looked up again. Stamps are re-read from L2 at most every
+    stamp_ttl seconds, which bounds cross-worker staleness.
+
+    Read-then-fill callers should use entry(), which stamps the key once:
+    a value computed after a miss is then stored under the stamps the
+    miss saw, so a bump in between leaves it unreachable instead of
+    filing stale data under the new stamp.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend=None,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        stamp_ttl: float = 1.0,
+        dumps: Callable[[Any], bytes] = json_dumps,
+        loads: Callable[[bytes], Any] = json_loads,
+        size_factor: float = 2.0,
+    ):
+        self.namespace = namespace
+        self._backend = backend
+        self.ttl = ttl
+        self.dumps = dumps
+        self.loads = loads
+        self.size_factor = size_factor
+        self.l1 = TTLCache(maxsize=maxsize, ttl=ttl, name=namespace)
+        self._stamps = TTLCache(maxsize=maxsize, ttl=stamp_ttl)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_shared_backend()
+        return self._backend
+
+    def _stamp_key(self, scope: str) -> str:
+        return f"{self.namespace}:stamp:{scope}"
+
+    def _stamp(self, scope: str) -> int:
+        stamp = self._stamps.get(scope)
+        if stamp is None:
+            raw = self.backend.get(self._stamp_key(scope))
+            stamp = int(raw) if raw else 0
+            self._stamps.set(scope, stamp)
+        return stamp
+
+    def _full_key(self, key: str, scope: str) -> str:
+        return (
+            f"{self.namespace}:{self._stamp('')}:{scope}:{self._stamp(scope)}:{key}"
+            if scope
+            else f"{self.namespace}:{self._stamp('')}::{key}"
+        )
+
+    def _get(self, full_key: str, default: Any) -> Any:
+        local = self.backend.local
+        value = None if local else self.l1.get(full_key)
+        if value is not None:
+            return value
+        raw = self.backend.get(full_key)
+        if raw is None:
+            return default
+        try:
+            value = self.loads(raw)
+        except ValueError:
+            # Written in another format (e.g. by an older release)
+            return default
+        if not local:
+            self.l1.set(full_key, value, size=int(len(raw) * self.size_factor))
+        return value
+
+    def _set(self, full_key: str, value: Any, ttl: Optional[float]) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        raw = self.dumps(value)
+        if not self.backend.local:
+            self.l1.set(full_key, value, ttl=ttl, size=int(len(raw) * self.size_factor))
+        self.backend.set(full_key, raw, ttl=ttl)
+
+    def entry(self, key: str, scope: str = "") -> CacheEntry:
+        """Stamp a key once, for a get followed by a set on a miss."""
+        return CacheEntry(self, self._full_key(key, scope))
+
+    def get(self, key: str, scope: str = "", default: Any = None) -> Any:
+        return self._get(self._full_key(key, scope), default)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, scope: str = "") -> None:
+        self._set(self._full_key(key, scope), value, ttl)
+
+    def delete(self, key: str, scope: str = "") -> None:
+        full_key = self._full_key(key, scope)
+        self.l1.delete(full_key)
+        self.backend.delete(full_key)
+
+    def bump(self, scope: str = "") -> None:
+        """Invalidate every entry in a scope (or the whole namespace)."""
+        self._stamps.set(scope, self.backend.incr(self._stamp_key(scope)))
+
+    def clear(self) -> None:
+        """Invalidate the whole namespace in every worker."""
+        self.bump()
+        self.l1.clear()
@@ -0,0 +1,182 @@
+import gzip
+import json
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Content types that are already compressed and not worth re-encoding
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def available_encodings() -> List[str]:
+    """Encodings this server can produce, most preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported encoding from an Accept-Encoding header.
+    Returns None if the client accepts none of them.
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the given content encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class PrecompressedPayload:
+    """
+    A JSON body serialized once, with compressed variants computed at
+    creation time so cache hits are served without recompressing.
+    """
+
+    __slots__ = ("body", "variants")
+
+    def __init__(self, content: Any, minimum_size: int = 1024):
+        self.body = json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.variants: Dict[str, bytes] = {}
+        if len(self.body) >= minimum_size:
+            self.variants = {e: compress(self.body, e) for e in available_encodings()}
+
+    def to_bytes(self) -> bytes:
+        """Pack body and variants for a shared cache: a JSON header of lengths, then the bytes."""
+        parts = {"body": self.body, **self.variants}
+        header = json.dumps({name: len(part) for name, part in parts.items()}).encode("ascii")
+        return b"\n".join([header, b"".join(parts.values())])
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "PrecompressedPayload":
+        """Unpack to_bytes() output. Raises ValueError if it is malformed."""
+        header, _, data = raw.partition(b"\n")
+        lengths = json.loads(header)
+        if (
+            not isinstance(lengths, dict)
+            or "body" not in lengths
+            or not all(isinstance(n, int) and n >= 0 for n in lengths.values())
+            or sum(lengths.values()) != len(data)
+        ):
+            raise ValueError("Malformed payload")
+        parts, offset = {}, 0
+        for name, length in lengths.items():
+            parts[name] = data[offset:offset + length]
+            offset += length
+        payload = cls.__new__(cls)
+        payload.body = parts.pop("body")
+        payload.variants = parts
+        return payload
+
+    def response(self, request: Request) -> Response:
+        """Build a response using the best variant the client accepts."""
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding in self.variants:
+            headers["Content-Encoding"] = encoding
+            return Response(self.variants[encoding], media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    Compress complete responses with brotli or gzip when they are at least
+    minimum_size bytes. Streamed, already-encoded and incompressible
+    responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or start_message is None:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # Something other than the body (e.g. trailers) arrived
+                # first: send the held start unchanged so order is kept
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+                or len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            # Anything after the body (e.g. trailers) goes straight through
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
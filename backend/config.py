@@ -7,9 +7,38 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/auth/callback"
+    # Google signing keys for local id_token checks: used for the endpoint's
+    # Cache-Control max-age (this default without one), refreshed in the
+    # background this long before expiry, and refetched for an unknown key
+    # id at most this often
+    JWKS_DEFAULT_TTL_SECONDS: int = 3600
+    JWKS_REFRESH_AHEAD_SECONDS: int = 300
+    JWKS_MIN_REFRESH_SECONDS: int = 60
 
     # TMDB
     TMDB_API_KEY: str = ""
+    # "record" saves TMDb responses to TMDB_CORPUS_PATH; "replay" serves
+    # them from it without a network, with injected latency and failures
+    TMDB_TRANSPORT: str = ""
+    TMDB_CORPUS_PATH: str = "./tmdb_corpus.jsonl.gz"
+    TMDB_REPLAY_LATENCY_MS: float = 0.0
+    TMDB_REPLAY_JITTER_MS: float = 0.0
+    TMDB_REPLAY_ERROR_RATE: float = 0.0
+    TMDB_REPLAY_RATE_LIMIT_RATE: float = 0.0
+
+    # Max concurrent TMDb season requests for /api/shows/{id}/full
+    SHOW_FULL_SEASON_CONCURRENCY: int = 4
+
+    # Window for merging episode toggles sent with coalesce=true
+    EPISODE_COALESCE_WINDOW_MS: int = 300
+
+    # Background refresh of airing shows and trending lists
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_INTERVAL_SECONDS: float = 900.0
+    SCHEDULER_JITTER_SECONDS: float = 30.0
+    SCHEDULER_MAX_CONCURRENCY: int = 4
+    SCHEDULER_BATCH_SIZE: int = 50
+    TMDB_BACKGROUND_REQUESTS_PER_MINUTE: int = 120
 
     # JWT
     JWT_SECRET: str = "change-me-in-production"
@@ -22,8 +51,92 @@ class Settings(BaseSettings):
         "http://localhost:5173",
     ]
 
+    # Delta sync: compact a user's change log every N versions and keep
+    # tombstones for this many days (older clients get a full reset)
+    SYNC_COMPACT_EVERY: int = 500
+    SYNC_TOMBSTONE_DAYS: int = 30
+
+    # Admission control per worker (see admission.py): concurrent requests,
+    # wait queue length and longest queue wait for TMDb-bound routes and
+    # heavy DB reads. Requests beyond that get 503 with Retry-After.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TMDB_CONCURRENCY: int = 16
+    ADMISSION_TMDB_QUEUE_SIZE: int = 64
+    ADMISSION_TMDB_MAX_WAIT_MS: int = 2000
+    ADMISSION_DB_CONCURRENCY: int = 8
+    ADMISSION_DB_QUEUE_SIZE: int = 32
+    ADMISSION_DB_MAX_WAIT_MS: int = 1000
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Rate limits on /api routes (see ratelimit.py): requests per window per
+    # client IP and per authenticated user, with separate read and write
+    # budgets (0 disables one). RATE_LIMIT_BACKEND "memory" counts per
+    # worker; "shared" counts in the CACHE_BACKEND store across workers.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_USER_READS: int = 600
+    RATE_LIMIT_USER_WRITES: int = 120
+    RATE_LIMIT_IP_READS: int = 1200
+    RATE_LIMIT_IP_WRITES: int = 240
+
+    # Responses smaller than this (bytes) are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # Log a startup time breakdown (imports, init_db) when the app boots
+    STARTUP_PROFILE: bool = False
+
+    # Per-request cProfile capture (see profiling.py). Off by default; when
+    # on, a request is profiled if it sends an X-Profile-Token signed with
+    # PROFILING_SECRET, its path starts with one of PROFILING_ROUTES, or it
+    # falls in PROFILING_SAMPLE_RATE. The newest PROFILING_MAX_FILES
+    # profiles are kept in PROFILING_DIR.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SECRET: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_ROUTES: List[str] = []
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_MAX_FILES: int = 50
+
+    # Request tracing (see tracing.py): spans for routes, queries and
+    # outbound HTTP, exported as OTLP/JSON lines to TRACING_EXPORT_PATH
+    # and/or POSTed to an OTLP/HTTP collector at TRACING_OTLP_ENDPOINT.
+    # TRACING_SAMPLE_RATE applies to requests without a traceparent header.
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.01
+    TRACING_EXPORT_PATH: str = "./traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = ""
+
+    # Shared (L2) cache tier: "memory" (per process), "sqlite" or "redis".
+    # CACHE_URL is the SQLite file path or the Redis URL.
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = ""
+    # Approximate bytes all in-process caches may hold together (0: no
+    # limit); above it each cache evicts its share, oldest entries first
+    CACHE_MEMORY_BUDGET_BYTES: int = 256 * 1024 * 1024
+
+    # Accounts allowed to use the /api/admin endpoints
+    ADMIN_EMAILS: List[str] = []
+
+    # Local cache of TMDb posters/backdrops served by /api/images, evicted
+    # least-recently-used beyond IMAGE_CACHE_MAX_BYTES. The scheduler
+    # prefetches tracked shows' posters at IMAGE_PREFETCH_WIDTH. Set
+    # IMAGE_ACCEL_REDIRECT_PREFIX (an nginx internal location mapped to
+    # IMAGE_CACHE_DIR) to have nginx send the files.
+    IMAGE_CACHE_DIR: str = "./image_cache"
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    IMAGE_PREFETCH_WIDTH: int = 300
+    IMAGE_ACCEL_REDIRECT_PREFIX: str = ""
+
     # D1 / SQLite
     DATABASE_URL: str = "sqlite:///./showtracker.db"
+    # How long a write waits for another process's write lock
+    DB_BUSY_TIMEOUT_SECONDS: float = 5.0
+    # Prepared statements kept per connection (covers every named query)
+    DB_CACHED_STATEMENTS: int = 256
+    # Split per-user tables across this many SQLite files (1 = one file).
+    # Change it only together with `python -m reshard`.
+    DB_SHARDS: int = 1
     D1_DATABASE_ID: Optional[str] = None
 
     class Config:
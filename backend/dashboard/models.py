@@ -0,0 +1,46 @@
+from typing import Any, Dict
+
+from database import fetch_all
+
+
+def get_dashboard(user_id: str) -> Dict[str, Any]:
+    """
+    Get everything the dashboard shows in one query: tracked shows with
+    status, favorite flag, progress and next episode, plus summary stats.
+    """
+    rows = fetch_all("dashboard.library", (user_id, user_id), user_id=user_id)
+
+    shows = []
+    for row in rows:
+        r = dict(row)
+        total = r["total_episodes"] or 0
+        watched = r["watched_count"]
+        percentage = (watched / total * 100) if total > 0 else 0
+        up_next = None
+        if r["next_season"] is not None:
+            up_next = {
+                "season": r["next_season"],
+                "episode": r["next_episode"],
+                "name": r["next_episode_name"],
+                "air_date": r["next_air_date"],
+            }
+        shows.append({
+            "show_id": r["show_id"],
+            "title": r["title"],
+            "poster_path": r["poster_path"],
+            "status": r["status"],
+            "favorite": bool(r["favorite"]),
+            "total_episodes": total,
+            "total_seasons": r["total_seasons"] or 0,
+            "watched_episodes": watched,
+            "percentage": round(percentage, 1),
+            "up_next": up_next,
+        })
+
+    stats = {
+        "total": len(shows),
+        "watching": sum(1 for s in shows if s["status"] == "watching"),
+        "completed": sum(1 for s in shows if s["status"] == "completed"),
+        "episodes_watched": sum(s["watched_episodes"] for s in shows),
+    }
+    return {"shows": shows, "stats": stats}
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Request
+
+from auth.jwt_handler import get_current_user_id
+from cache import TwoTierCache
+from compression import PrecompressedPayload
+from config import settings
+from dashboard.models import get_dashboard
+from database import get_data_version
+from http_cache import etag_headers, not_modified, version_etag
+
+router = APIRouter()
+
+# Serialized dashboard per user, shared across workers. Entries are keyed
+# on the user's data_version, so a write makes the old entry unreachable
+# without any explicit invalidation.
+dashboard_cache = TwoTierCache(
+    "dashboard",
+    maxsize=1024,
+    ttl=5 * 60,
+    dumps=PrecompressedPayload.to_bytes,
+    loads=PrecompressedPayload.from_bytes,
+    # The packed form is the payload's bytes, so it is its size in memory
+    size_factor=1.0,
+)
+
+
+@router.get("")
+async def get_user_dashboard(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get the authenticated user's shows, progress, up-next episodes and
+    summary stats in a single response.
+    """
+    version = get_data_version(user_id)
+    etag = version_etag(version)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    entry = dashboard_cache.entry(f"v{version}", scope=user_id)
+    payload = entry.get()
+    if payload is None:
+        payload = PrecompressedPayload(
+            {**get_dashboard(user_id), "version": version},
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+        )
+        entry.set(payload)
+    response = payload.response(request)
+    response.headers.update(etag_headers(etag))
+    return response
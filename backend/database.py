@@ -1,12 +1,60 @@
+import os
+import re
 import sqlite3
-from contextlib import contextmanager
+import threading
+import time
+import zlib
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import Any, List, Optional
 
+import tracing
 from config import settings
+from queries import QUERIES, query_stats
 
-# For local development, use SQLite file
-DB_PATH = Path(__file__).parent / "showtracker.db"
+
+def _sqlite_path(url: str) -> Path:
+    """Resolve a sqlite:/// DATABASE_URL; relative paths are relative to backend/."""
+    path = Path(url.split("sqlite:///", 1)[-1])
+    return path if path.is_absolute() else Path(__file__).parent / path
+
+
+# SQLite file (DATABASE_URL, backend/showtracker.db by default). With
+# DB_SHARDS > 1 it holds only the shared catalog; see shard_path().
+DB_PATH = _sqlite_path(settings.DATABASE_URL)
+
+# Tables owned by a single user, split across the shard files by user_id.
+# Everything else (users, the shows catalog) stays in DB_PATH.
+USER_TABLES = (
+    "user_shows",
+    "episodes_watched",
+    "user_up_next",
+    "user_data_versions",
+    "change_log",
+    "mutation_keys",
+    "user_stats",
+    "user_stats_monthly",
+    "user_stats_genre",
+)
+
+# Stored in PRAGMA user_version; init_db skips all work when it matches.
+# Bump whenever schema.sql or COLUMN_MIGRATIONS change.
+SCHEMA_VERSION = 8
+
+# Columns added to existing tables after their first release.
+# schema.sql already contains them; these bring older databases up to date.
+COLUMN_MIGRATIONS = [
+    ("shows", "last_air_date", "TEXT"),
+    ("shows", "next_air_date", "TEXT"),
+    ("shows", "in_production", "BOOLEAN DEFAULT 0"),
+    ("user_data_versions", "sync_floor", "INTEGER NOT NULL DEFAULT 0"),
+    ("shows", "episode_run_time", "INTEGER"),
+    ("user_shows", "last_watched_at", "TIMESTAMP NOT NULL DEFAULT ''"),
+    ("user_shows", "show_rating", "REAL NOT NULL DEFAULT 0"),
+    ("shows", "popularity", "REAL"),
+    ("episodes_watched", "credited_minutes", "INTEGER NOT NULL DEFAULT 0"),
+    ("episodes_watched", "credited_genres", "TEXT NOT NULL DEFAULT ''"),
+]
 
 
 def get_db_path() -> str:
@@ -14,39 +62,244 @@ def get_db_path() -> str:
     return str(DB_PATH)
 
 
-@contextmanager
-def get_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(get_db_path())
+# ─────────────────────────────────────────────────────────────
+# Shard routing
+#
+# SQLite allows one writer per file, so with DB_SHARDS > 1 the
+# USER_TABLES live in DB_SHARDS files next to DB_PATH
+# (showtracker.shard0.db, ...) and each user's rows sit in the file their
+# user_id hashes to. Writes for users on different shards never wait on
+# each other. Shard connections attach DB_PATH read-only as "catalog", so
+# queries joining user tables with shows run unchanged; catalog writes
+# (users, shows) go through the plain DB_PATH connection.
+#
+# With DB_SHARDS = 1 (the default) shard 0 is DB_PATH itself. Moving to
+# another shard count: stop the app and run `python -m reshard`.
+# ─────────────────────────────────────────────────────────────
+def shard_count() -> int:
+    return max(1, settings.DB_SHARDS)
+
+
+def shards() -> range:
+    """Indexes of every shard, for work that spans all users."""
+    return range(shard_count())
+
+
+def shard_for(user_id: str, count: Optional[int] = None) -> int:
+    """Shard holding a user's rows (CRC32 of the id, stable across processes)."""
+    return zlib.crc32(user_id.encode()) % (count or shard_count())
+
+
+def shard_path(index: int, count: Optional[int] = None) -> Path:
+    """File of shard `index` in a layout of `count` shards (default DB_SHARDS)."""
+    if (count or shard_count()) == 1:
+        return DB_PATH
+    return DB_PATH.with_name(f"{DB_PATH.stem}.shard{index}{DB_PATH.suffix}")
+
+
+_local = threading.local()
+
+
+def _open(path: str, catalog: Optional[str] = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        timeout=settings.DB_BUSY_TIMEOUT_SECONDS,
+        cached_statements=settings.DB_CACHED_STATEMENTS,
+        uri=True,
+    )
     conn.row_factory = sqlite3.Row
+    # Safe with WAL: a crash loses no committed data, power loss at most
+    # the last transactions.
+    conn.execute("PRAGMA synchronous = NORMAL")
+    if catalog:
+        conn.execute(
+            "ATTACH DATABASE ? AS catalog",
+            (Path(catalog).resolve().as_uri() + "?mode=ro",),
+        )
+    return conn
+
+
+def _thread_connection(shard: Optional[int] = None) -> list:
+    """
+    Return this thread's [connection, depth] for the catalog (shard None)
+    or a shard, opening the connection on first use.
+    Connections are reused so their prepared-statement caches survive
+    between calls; all are reopened after a fork or if DB_PATH or
+    DB_SHARDS change.
+    """
+    root = (get_db_path(), shard_count(), os.getpid())
+    previous = getattr(_local, "root", None)
+    if previous != root:
+        if previous is not None and previous[2] == root[2]:
+            for conn, _ in _local.conns.values():
+                conn.close()
+        _local.conns, _local.root = {}, root
+
+    path = root[0] if shard is None else str(shard_path(shard))
+    entry = _local.conns.get(path)
+    if entry is None:
+        catalog = root[0] if path != root[0] else None
+        entry = _local.conns[path] = [_open(path, catalog), 0]
+    return entry
+
+
+@contextmanager
+def get_connection(user_id: Optional[str] = None, shard: Optional[int] = None):
+    """
+    Context manager for this thread's database connection: the shard
+    holding user_id's rows, shard `shard`, or else the catalog.
+    Writers from other processes are waited on for DB_BUSY_TIMEOUT_SECONDS
+    before "database is locked" is raised. Anything left uncommitted when
+    the outermost block exits is rolled back.
+    """
+    if shard is None and user_id is not None:
+        shard = shard_for(user_id)
+    entry = _thread_connection(shard)
+    conn = entry[0]
+    entry[1] += 1
     try:
         yield conn
     finally:
-        conn.close()
+        entry[1] -= 1
+        if entry[1] == 0 and conn.in_transaction:
+            conn.rollback()
+
+
+@contextmanager
+def transaction(user_id: Optional[str] = None, shard: Optional[int] = None):
+    """
+    Context manager for a connection whose writes commit together.
+    Rolls back if the block raises. user_id / shard pick the connection
+    as in get_connection; a transaction never spans two shards.
+
+    The write lock is taken up front (BEGIN IMMEDIATE) so concurrent
+    writers in other processes queue on the busy timeout instead of
+    failing when a read inside the transaction is upgraded to a write.
+    """
+    with get_connection(user_id, shard) as conn, tracing.span(
+        "db transaction", tracing.CLIENT, {"db.system": "sqlite"}
+    ):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _sql(name: str, fragments: dict) -> str:
+    return QUERIES[name].format(**fragments) if fragments else QUERIES[name]
+
+
+@contextmanager
+def _timed(name: str):
+    """
+    Record the latency of the enclosed query under its registered name,
+    and trace it as a span when the request is traced.
+    """
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"db {name}", tracing.CLIENT, {"db.system": "sqlite", "db.operation.name": name}):
+            yield
+    finally:
+        query_stats.record(name, time.perf_counter() - started)
+
+
+# Without conn, the helpers below run on the shard of user_id (pass it for
+# queries on USER_TABLES) or on the catalog.
+def fetch_all(
+    name: str, params: tuple = (), conn=None, user_id: Optional[str] = None, **fragments
+) -> List[sqlite3.Row]:
+    """Run a registered SELECT and return all rows."""
+    with get_connection(user_id) if conn is None else nullcontext(conn) as conn, _timed(name):
+        return conn.execute(_sql(name, fragments), params).fetchall()
+
+
+def fetch_one(
+    name: str, params: tuple = (), conn=None, user_id: Optional[str] = None, **fragments
+) -> Optional[sqlite3.Row]:
+    """Run a registered SELECT (or write ... RETURNING) and return the first row."""
+    with get_connection(user_id) if conn is None else nullcontext(conn) as conn, _timed(name):
+        return conn.execute(_sql(name, fragments), params).fetchone()
+
+
+def fetch_all_shards(name: str, params: tuple = (), **fragments) -> List[sqlite3.Row]:
+    """
+    Run a registered SELECT on every shard and return all rows, shard by
+    shard. Per-shard ORDER BY / LIMIT / GROUP BY are not merged; callers
+    combine the results.
+    """
+    rows: List[sqlite3.Row] = []
+    for shard in shards():
+        with get_connection(shard=shard) as conn, _timed(name):
+            rows.extend(conn.execute(_sql(name, fragments), params).fetchall())
+    return rows
+
+
+def execute(name: str, params: tuple = (), conn=None, user_id: Optional[str] = None) -> sqlite3.Cursor:
+    """
+    Run a registered write. With conn it joins the caller's transaction;
+    without, it commits on its own.
+    """
+    if conn is not None:
+        with _timed(name):
+            return conn.execute(QUERIES[name], params)
+    with get_connection(user_id) as conn:
+        with _timed(name):
+            cursor = conn.execute(QUERIES[name], params)
+        conn.commit()
+        return cursor
+
+
+def execute_batch(
+    name: str, params_list: List[tuple], conn=None, user_id: Optional[str] = None
+) -> sqlite3.Cursor:
+    """Run a registered write once per parameter tuple (executemany)."""
+    if conn is not None:
+        with _timed(name):
+            return conn.executemany(QUERIES[name], params_list)
+    with get_connection(user_id) as conn:
+        with _timed(name):
+            cursor = conn.executemany(QUERIES[name], params_list)
+        conn.commit()
+        return cursor
+
+
+def bump_data_version(conn: sqlite3.Connection, user_id: str) -> int:
+    """
+    Increment a user's data_version inside the caller's transaction.
+    Call from every write to a user's shows or watched episodes.
+    Returns the new version.
+    """
+    return fetch_one("user_data_versions.bump", (user_id,), conn=conn)[0]
 
 
-def execute_query(query: str, params: tuple = ()) -> List[sqlite3.Row]:
+def get_data_version(user_id: str) -> int:
+    """Return a user's current data_version (0 if never written)."""
+    row = fetch_one("user_data_versions.get", (user_id,), user_id=user_id)
+    return row[0] if row else 0
+
+
+# Ad-hoc SQL (scripts, tests); app code uses the named queries above.
+def execute_query(query: str, params: tuple = (), user_id: Optional[str] = None) -> List[sqlite3.Row]:
     """Execute a SELECT query and return rows."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
+    with get_connection(user_id) as conn:
+        return conn.execute(query, params).fetchall()
 
 
-def execute_write(query: str, params: tuple = ()) -> int:
+def execute_write(query: str, params: tuple = (), user_id: Optional[str] = None) -> int:
     """Execute an INSERT/UPDATE/DELETE and return lastrowid or rowcount."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
+    with get_connection(user_id) as conn:
+        cursor = conn.execute(query, params)
         conn.commit()
         return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
 
 
-def execute_many(query: str, params_list: List[tuple]) -> int:
+def execute_many(query: str, params_list: List[tuple], user_id: Optional[str] = None) -> int:
     """Execute multiple writes in a batch."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.executemany(query, params_list)
+    with get_connection(user_id) as conn:
+        cursor = conn.executemany(query, params_list)
         conn.commit()
         return cursor.rowcount
 
@@ -64,12 +317,77 @@ def rows_to_dicts(rows: List[sqlite3.Row]) -> List[dict]:
 
 
 def init_db():
-    """Initialize the database schema from schema.sql."""
+    """
+    Initialize the database schema from schema.sql: in DB_PATH, and with
+    DB_SHARDS > 1 the catalog tables there and the USER_TABLES in each
+    shard file. Does nothing for files already at SCHEMA_VERSION.
+    """
+    if shard_count() == 1:
+        with get_connection() as conn:
+            _init_schema(conn)
+        return
+    with get_connection() as conn:
+        _init_schema(conn, user_tables=False)
+    for shard in shards():
+        with get_connection(shard=shard) as conn:
+            _init_schema(conn, user_tables=True)
+
+
+def schema_script(user_tables: Optional[bool] = None) -> str:
+    """
+    schema.sql, or only its statements on USER_TABLES (True) or on the
+    other tables (False).
+    """
     schema_path = Path(__file__).parent / "schema.sql"
     if not schema_path.exists():
         raise FileNotFoundError(f"Schema file not found: {schema_path}")
+    with open(schema_path, "r") as f:
+        script = f.read()
+    if user_tables is None:
+        return script
+    script = re.sub(r"--[^\n]*", "", script)
+    statements = []
+    for statement in script.split(";"):
+        # CREATE TABLE IF NOT EXISTS <table> / CREATE INDEX ... ON <table>
+        match = re.search(r"(?:TABLE IF NOT EXISTS|\bON)\s+(\w+)", statement)
+        if match and (match.group(1) in USER_TABLES) == user_tables:
+            statements.append(statement.strip() + ";")
+    return "\n".join(statements)
 
-    with get_connection() as conn:
-        with open(schema_path, "r") as f:
-            conn.executescript(f.read())
-        conn.commit()
+
+def _init_schema(conn: sqlite3.Connection, user_tables: Optional[bool] = None):
+    """Bring one file up to SCHEMA_VERSION with schema_script(user_tables)."""
+    # WAL lets readers run alongside a writer from any process. The mode
+    # is stored in the file, so this is a no-op after the first run.
+    conn.execute("PRAGMA main.journal_mode = WAL")
+    current = conn.execute("PRAGMA main.user_version").fetchone()[0]
+    if current >= SCHEMA_VERSION:
+        return
+
+    # Columns first, so schema.sql can index them on older databases
+    _apply_column_migrations(conn)
+    conn.executescript(schema_script(user_tables))
+    if 0 < current < 6:
+        # Genres, runtimes and list sort keys were normalized in version 6
+        from shows.models import backfill_show_metadata
+
+        backfill_show_metadata(conn)
+    if 0 < current < 8 and user_tables is not False:
+        # Stats rollups arrived in version 5 and the per-watch credits they
+        # are built from in version 8; backfill both from history
+        from stats.models import rebuild_stats
+
+        rebuild_stats(conn=conn)
+    conn.execute(f"PRAGMA main.user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def _apply_column_migrations(conn: sqlite3.Connection):
+    """
+    Add any COLUMN_MIGRATIONS entries missing from the database. Tables
+    that do not exist yet are left for schema.sql to create.
+    """
+    for table, column, declaration in COLUMN_MIGRATIONS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")}
+        if existing and column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from episodes.models import apply_episode_mutations
+
+logger = logging.getLogger(__name__)
+
+BufferKey = Tuple[str, int]  # (user_id, show_id)
+EpisodeKey = Tuple[int, int]  # (season, episode)
+
+
+class WriteCoalescer:
+    """
+    Buffers episode toggles per (user, show) for a short window and writes
+    them in one transaction.
+
+    Toggles of the same episode inside the window collapse to the last
+    one, so rapid mark/unmark clicks cost a single write. Idempotency keys
+    of superseded toggles are still recorded so client retries stay safe.
+    Submitters wait for the write that carries their toggles, so a failure
+    reaches the client instead of being dropped after an acknowledgement.
+    A write that hits a locked database is retried with backoff first.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.3,
+        apply: Callable[..., List[Dict[str, Any]]] = apply_episode_mutations,
+        retries: int = 3,
+        retry_delay: float = 0.05,
+    ):
+        self.window = window
+        self.apply = apply
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._pending: Dict[BufferKey, Dict[EpisodeKey, Dict[str, Any]]] = {}
+        self._superseded: Dict[BufferKey, List[str]] = {}
+        self._timers: Dict[BufferKey, asyncio.Task] = {}
+        self._written: Dict[BufferKey, asyncio.Future] = {}
+
+    @classmethod
+    def from_settings(cls) -> "WriteCoalescer":
+        return cls(window=settings.EPISODE_COALESCE_WINDOW_MS / 1000)
+
+    async def submit(self, user_id: str, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Queue operations and wait until they are written. Returns one
+        result per operation, in order, like apply_episode_mutations; an
+        operation overtaken by a later toggle of the same episode is
+        reported as superseded. Raises if the write failed.
+        """
+        written = {}
+        for op in operations:
+            key = (user_id, op["show_id"])
+            buffer = self._pending.setdefault(key, {})
+            episode_key = (op["season"], op["episode"])
+            previous = buffer.get(episode_key)
+            if previous and previous.get("idempotency_key"):
+                self._superseded.setdefault(key, []).append(previous["idempotency_key"])
+            buffer[episode_key] = op
+            if key not in self._timers:
+                self._written[key] = asyncio.get_running_loop().create_future()
+                self._timers[key] = asyncio.create_task(self._flush_later(key))
+            written[key] = self._written[key]
+
+        # Shielded: a client disconnecting must not cancel the shared write
+        outcomes = await asyncio.gather(*(asyncio.shield(future) for future in written.values()))
+        by_buffer = dict(zip(written, outcomes))
+        results = []
+        for op in operations:
+            flushed, result = by_buffer[user_id, op["show_id"]][op["season"], op["episode"]]
+            if flushed is op:
+                results.append(result)
+            else:
+                results.append({
+                    "idempotency_key": op.get("idempotency_key"),
+                    "applied": False,
+                    "replayed": False,
+                    "superseded": True,
+                })
+        return results
+
+    def pending_count(self) -> int:
+        return sum(len(buffer) for buffer in self._pending.values())
+
+    async def _flush_later(self, key: BufferKey) -> None:
+        await asyncio.sleep(self.window)
+        self._timers.pop(key, None)
+        await self.flush(key)
+
+    async def _apply(self, key: BufferKey, operations, seen_keys) -> List[Dict[str, Any]]:
+        for attempt in range(self.retries + 1):
+            try:
+                return await asyncio.to_thread(self.apply, key[0], operations, seen_keys)
+            except sqlite3.OperationalError:
+                # Busy timeout ran out under write contention; the
+                # transaction rolled back, so the batch can simply be re-run
+                if attempt == self.retries:
+                    raise
+                logger.warning("Coalesced write for user %s show %s retrying", *key)
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+    async def flush(self, key: BufferKey) -> Optional[List[Dict[str, Any]]]:
+        """Write the buffered operations for one (user, show) and wake its submitters."""
+        operations = list(self._pending.pop(key, {}).values())
+        seen_keys = self._superseded.pop(key, [])
+        future = self._written.pop(key, None)
+        if not operations:
+            return None
+        try:
+            results = await self._apply(key, operations, seen_keys)
+        except Exception as e:
+            logger.exception("Coalesced write for user %s show %s failed", *key)
+            if future is not None and not future.done():
+                future.set_exception(e)
+            return None
+        if future is not None and not future.done():
+            future.set_result({
+                (op["season"], op["episode"]): (op, result)
+                for op, result in zip(operations, results)
+            })
+        return results
+
+    async def flush_all(self) -> None:
+        """Write everything still buffered (used at shutdown)."""
+        for task in self._timers.values():
+            task.cancel()
+        self._timers.clear()
+        for key in list(self._pending):
+            await self.flush(key)
+
+
+# Singleton instance
+episode_coalescer = WriteCoalescer.from_settings()
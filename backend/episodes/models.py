@@ -1,7 +1,21 @@
+import sqlite3
 import uuid
 from typing import List, Dict, Any, Optional, Set, Tuple
 
-from database import execute_query, execute_write, execute_many, rows_to_dicts, row_to_dict
+from database import execute, execute_batch, fetch_all, fetch_one, rows_to_dicts, transaction
+from pagination import decode_cursor, encode_cursor, select_columns
+from stats.models import record_unwatched, record_watched
+from sync.models import episode_change, record_changes
+
+# Fields a client may request from the watched episode list.
+WATCHED_EPISODE_FIELDS = {
+    "id": "id",
+    "user_id": "user_id",
+    "show_id": "show_id",
+    "season": "season",
+    "episode": "episode",
+    "watched_at": "watched_at",
+}
 
 
 def mark_episode_watched(
@@ -15,13 +29,17 @@ def mark_episode_watched(
     Returns the episode_watched id.
     """
     episode_id = str(uuid.uuid4())
-    execute_write(
-        """
-        INSERT OR IGNORE INTO episodes_watched (id, user_id, show_id, season, episode)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (episode_id, user_id, show_id, season, episode),
-    )
+    with transaction(user_id) as conn:
+        cursor = execute(
+            "episodes_watched.mark",
+            (episode_id, user_id, show_id, season, episode),
+            conn=conn,
+        )
+        if cursor.rowcount:
+            advance_up_next(conn, user_id, show_id)
+            refresh_last_watched(conn, user_id, show_id)
+            record_changes(conn, user_id, [episode_change("upsert", show_id, season, episode)])
+            record_watched(conn, user_id, [(show_id, season, episode, None)])
     return episode_id
 
 
@@ -34,17 +52,36 @@ def mark_episodes_watched_batch(
     Mark multiple episodes as watched in a batch.
     Returns count of newly marked episodes.
     """
-    params_list = [
-        (str(uuid.uuid4()), user_id, show_id, season, episode)
-        for season, episode in episodes
-    ]
-    return execute_many(
-        """
-        INSERT OR IGNORE INTO episodes_watched (id, user_id, show_id, season, episode)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        params_list,
-    )
+    with transaction(user_id) as conn:
+        # Only episodes not yet watched count towards changes and stats
+        watched = {
+            (r["season"], r["episode"])
+            for r in fetch_all("episodes_watched.set", (user_id, show_id), conn=conn)
+        }
+        new_episodes = [ep for ep in dict.fromkeys(episodes) if ep not in watched]
+        if not new_episodes:
+            return 0
+        execute_batch(
+            "episodes_watched.mark",
+            [
+                (str(uuid.uuid4()), user_id, show_id, season, episode)
+                for season, episode in new_episodes
+            ],
+            conn=conn,
+        )
+        advance_up_next(conn, user_id, show_id)
+        refresh_last_watched(conn, user_id, show_id)
+        record_changes(
+            conn,
+            user_id,
+            [episode_change("upsert", show_id, season, episode) for season, episode in new_episodes],
+        )
+        record_watched(
+            conn,
+            user_id,
+            [(show_id, season, episode, None) for season, episode in new_episodes],
+        )
+    return len(new_episodes)
 
 
 def unmark_episode_watched(
@@ -57,27 +94,238 @@ def unmark_episode_watched(
     Unmark an episode as watched.
     Returns True if an episode was removed.
     """
-    result = execute_write(
-        """
-        DELETE FROM episodes_watched
-        WHERE user_id = ? AND show_id = ? AND season = ? AND episode = ?
-        """,
-        (user_id, show_id, season, episode),
+    with transaction(user_id) as conn:
+        row = fetch_one(
+            "episodes_watched.unmark",
+            (user_id, show_id, season, episode),
+            conn=conn,
+        )
+        if row is None:
+            return False
+        rewind_up_next(conn, user_id, show_id, season, episode)
+        refresh_last_watched(conn, user_id, show_id)
+        record_changes(conn, user_id, [episode_change("delete", show_id, season, episode)])
+        record_unwatched(conn, user_id, [tuple(row)])
+    return True
+
+
+def apply_episode_mutations(
+    user_id: str,
+    operations: List[Dict[str, Any]],
+    seen_keys: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Apply a mixed list of mark/unmark operations in one transaction.
+
+    Each operation is a dict with op ("mark" or "unmark"), show_id, season,
+    episode and an optional idempotency_key. An operation whose key was
+    already applied is skipped and reported as replayed. seen_keys are
+    recorded as used without applying anything (for operations that were
+    superseded before reaching the database).
+    Returns one result per operation, in order.
+    """
+    results = []
+    touched_shows = set()
+    changes = []
+    # Marks are credited to stats after the loop; keyed so an unmark of an
+    # episode marked earlier in the batch can cancel it
+    marked: Dict[Tuple[int, int, int], Any] = {}
+    unmarked = []
+    with transaction(user_id) as conn:
+        execute("mutation_keys.prune", (user_id,), conn=conn)
+        for op in operations:
+            key = op.get("idempotency_key")
+            result = {"idempotency_key": key, "applied": False, "replayed": False}
+            if key:
+                row = fetch_one("mutation_keys.get", (user_id, key), conn=conn)
+                if row:
+                    result.update(applied=bool(row[0]), replayed=True)
+                    results.append(result)
+                    continue
+
+            show_id, season, episode = op["show_id"], op["season"], op["episode"]
+            if op["op"] == "mark":
+                cursor = execute(
+                    "episodes_watched.mark",
+                    (str(uuid.uuid4()), user_id, show_id, season, episode),
+                    conn=conn,
+                )
+                result["applied"] = cursor.rowcount > 0
+                if result["applied"]:
+                    marked[show_id, season, episode] = (show_id, season, episode, None)
+            else:
+                row = fetch_one(
+                    "episodes_watched.unmark",
+                    (user_id, show_id, season, episode),
+                    conn=conn,
+                )
+                result["applied"] = row is not None
+                if result["applied"]:
+                    rewind_up_next(conn, user_id, show_id, season, episode)
+                    if marked.pop((show_id, season, episode), None) is None:
+                        unmarked.append(tuple(row))
+            if result["applied"]:
+                touched_shows.add(show_id)
+                change_op = "upsert" if op["op"] == "mark" else "delete"
+                changes.append(episode_change(change_op, show_id, season, episode))
+
+            if key:
+                execute(
+                    "mutation_keys.insert",
+                    (user_id, key, result["applied"]),
+                    conn=conn,
+                )
+            results.append(result)
+
+        execute_batch(
+            "mutation_keys.insert_seen",
+            [(user_id, key) for key in seen_keys or []],
+            conn=conn,
+        )
+        # Unmarks above already rewound up-next; marks may need to advance it.
+        for show_id in touched_shows:
+            advance_up_next(conn, user_id, show_id)
+            refresh_last_watched(conn, user_id, show_id)
+        if changes:
+            record_changes(conn, user_id, changes)
+        record_watched(conn, user_id, list(marked.values()))
+        record_unwatched(conn, user_id, unmarked)
+    return results
+
+
+# ─────────────────────────────────────────────────────────────
+# Up-next maintenance
+#
+# user_up_next holds the first unwatched (non-special) episode of each
+# tracked show, or NULLs once the user is caught up. Marks and unmarks
+# adjust it incrementally; a full recompute only happens when a show is
+# added or its season metadata changes.
+# ─────────────────────────────────────────────────────────────
+def _find_next_unwatched(
+    conn: sqlite3.Connection,
+    user_id: str,
+    show_id: int,
+    after: Tuple[int, int] = (0, 0),
+) -> Optional[Tuple[int, int]]:
+    """Find the first unwatched episode strictly after `after`."""
+    row = fetch_one(
+        "user_up_next.find_next",
+        (show_id, after[0], after[1], user_id),
+        conn=conn,
+    )
+    return (row[0], row[1]) if row else None
+
+
+def _store_up_next(
+    conn: sqlite3.Connection,
+    user_id: str,
+    show_id: int,
+    next_episode: Optional[Tuple[int, int]],
+) -> None:
+    season, episode = next_episode if next_episode else (None, None)
+    execute("user_up_next.store", (user_id, show_id, season, episode), conn=conn)
+
+
+def refresh_up_next(conn: sqlite3.Connection, user_id: str, show_id: int) -> None:
+    """
+    Recompute the up-next entry for one tracked show from scratch.
+    Shows without cached episode metadata get no entry.
+    """
+    if not fetch_one("show_episodes.any", (show_id,), conn=conn):
+        execute("user_up_next.delete", (user_id, show_id), conn=conn)
+        return
+    _store_up_next(conn, user_id, show_id, _find_next_unwatched(conn, user_id, show_id))
+
+
+def advance_up_next(conn: sqlite3.Connection, user_id: str, show_id: int) -> None:
+    """Move the up-next entry forward if its episode has just been watched."""
+    row = fetch_one("user_up_next.watched", (user_id, show_id), conn=conn)
+    if row:
+        next_episode = _find_next_unwatched(conn, user_id, show_id, (row[0], row[1]))
+        _store_up_next(conn, user_id, show_id, next_episode)
+
+
+def rewind_up_next(
+    conn: sqlite3.Connection,
+    user_id: str,
+    show_id: int,
+    season: int,
+    episode: int,
+) -> None:
+    """Move the up-next entry back to an episode that was just unwatched."""
+    if season <= 0:
+        return
+    execute(
+        "user_up_next.rewind",
+        (season, episode, user_id, show_id, season, episode, show_id, season, episode),
+        conn=conn,
     )
-    return result > 0
+
+
+def refresh_last_watched(conn: sqlite3.Connection, user_id: str, show_id: int) -> None:
+    """Reset the show's last_watched_at (the "watched" list sort key) from its history."""
+    execute(
+        "user_shows.refresh_last_watched",
+        (user_id, show_id, user_id, show_id),
+        conn=conn,
+    )
+
+
+def get_up_next(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Get the next episode to watch for every show the user is watching.
+    Shows the user is caught up on are omitted.
+    """
+    return rows_to_dicts(fetch_all("user_up_next.feed", (user_id,), user_id=user_id))
 
 
 def get_watched_episodes(user_id: str, show_id: int) -> List[Dict[str, Any]]:
     """Get all watched episodes for a user's show."""
-    rows = execute_query(
-        """
-        SELECT * FROM episodes_watched
-        WHERE user_id = ? AND show_id = ?
-        ORDER BY season, episode
-        """,
-        (user_id, show_id),
-    )
-    return rows_to_dicts(rows)
+    return get_watched_episodes_page(user_id, show_id)["episodes"]
+
+
+def get_watched_episodes_page(
+    user_id: str,
+    show_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Get one page of watched episodes for a user's show.
+    Uses keyset pagination on (season, episode); pass the returned
+    next_cursor to fetch the following page. Raises ValueError for
+    unknown fields or a malformed cursor.
+    """
+    columns = ", ".join(select_columns(fields, WATCHED_EPISODE_FIELDS))
+    # Fetch one extra row to learn whether another page follows
+    page_size = limit + 1 if limit else -1
+    if cursor:
+        season, episode = decode_cursor(cursor, 2)
+        rows = fetch_all(
+            "episodes_watched.page_after",
+            (user_id, show_id, season, episode, page_size),
+            user_id=user_id,
+            columns=columns,
+        )
+    else:
+        rows = fetch_all(
+            "episodes_watched.page",
+            (user_id, show_id, page_size),
+            user_id=user_id,
+            columns=columns,
+        )
+
+    episodes = rows_to_dicts(rows)
+    next_cursor = None
+    if limit and len(episodes) > limit:
+        episodes = episodes[:limit]
+        next_cursor = encode_cursor(
+            [episodes[-1]["_cursor_season"], episodes[-1]["_cursor_episode"]]
+        )
+    for episode in episodes:
+        del episode["_cursor_season"], episode["_cursor_episode"]
+    return {"episodes": episodes, "next_cursor": next_cursor}
 
 
 def get_watched_episodes_set(user_id: str, show_id: int) -> Set[Tuple[int, int]]:
@@ -85,26 +333,14 @@ def get_watched_episodes_set(user_id: str, show_id: int) -> Set[Tuple[int, int]]
     Get watched episodes as a set of (season, episode) tuples.
     Useful for quick lookups.
     """
-    rows = execute_query(
-        """
-        SELECT season, episode FROM episodes_watched
-        WHERE user_id = ? AND show_id = ?
-        """,
-        (user_id, show_id),
-    )
+    rows = fetch_all("episodes_watched.set", (user_id, show_id), user_id=user_id)
     return {(r["season"], r["episode"]) for r in rows}
 
 
 def get_watched_count(user_id: str, show_id: int) -> int:
     """Get the count of watched episodes for a show."""
-    rows = execute_query(
-        """
-        SELECT COUNT(*) as count FROM episodes_watched
-        WHERE user_id = ? AND show_id = ?
-        """,
-        (user_id, show_id),
-    )
-    return rows[0]["count"] if rows else 0
+    row = fetch_one("episodes_watched.count", (user_id, show_id), user_id=user_id)
+    return row["count"] if row else 0
 
 
 def calculate_progress(
@@ -120,11 +356,8 @@ def calculate_progress(
 
     # If total_episodes not provided, try to get from shows table
     if total_episodes is None:
-        rows = execute_query(
-            "SELECT total_episodes FROM shows WHERE id = ?",
-            (show_id,),
-        )
-        total_episodes = rows[0]["total_episodes"] if rows else 0
+        row = fetch_one("shows.total_episodes", (show_id,))
+        total_episodes = row["total_episodes"] if row else 0
 
     total_episodes = total_episodes or 0
     percentage = (watched_count / total_episodes * 100) if total_episodes > 0 else 0
@@ -141,24 +374,7 @@ def get_user_progress_all_shows(user_id: str) -> List[Dict[str, Any]]:
     Get progress for all shows a user is tracking.
     Returns list of shows with their progress info.
     """
-    rows = execute_query(
-        """
-        SELECT
-            us.show_id,
-            us.status,
-            us.favorite,
-            s.title,
-            s.poster_path,
-            s.total_episodes,
-            (SELECT COUNT(*) FROM episodes_watched ew
-             WHERE ew.user_id = us.user_id AND ew.show_id = us.show_id) as watched_count
-        FROM user_shows us
-        JOIN shows s ON us.show_id = s.id
-        WHERE us.user_id = ?
-        ORDER BY us.added_at DESC
-        """,
-        (user_id,),
-    )
+    rows = fetch_all("user_shows.progress", (user_id,), user_id=user_id)
 
     result = []
     for row in rows:
@@ -1,23 +1,32 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends, Body
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request, Response
 
 from schemas import (
+    EpisodeMutationsRequest,
     EpisodeWatchedCreate,
     MarkEpisodesRequest,
     ShowProgress,
     UserProgressResponse,
 )
 from auth.jwt_handler import get_current_user_id
+from database import get_data_version
+from http_cache import etag_headers, not_modified, version_etag
+from episodes.coalescer import episode_coalescer
+from pagination import parse_fields
 from episodes.models import (
     mark_episode_watched,
     mark_episodes_watched_batch,
     unmark_episode_watched,
-    get_watched_episodes,
+    get_watched_episodes_page,
     calculate_progress,
     get_user_progress_all_shows,
     mark_season_watched,
+    get_up_next,
+    apply_episode_mutations,
 )
 
+MAX_MUTATIONS_PER_REQUEST = 500
+
 router = APIRouter()
 
 
@@ -85,14 +94,59 @@ async def unmark_watched(
     return {"message": "Episode unmarked"}
 
 
+@router.post("/mutations")
+async def apply_mutations(
+    body: EpisodeMutationsRequest,
+    coalesce: bool = Query(False, description="Buffer and merge with nearby toggles"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Apply a list of mark/unmark operations in a single transaction.
+    Operations carrying an already-applied idempotency_key are skipped.
+    With coalesce=true the operations are held briefly and merged with
+    other toggles for the same show, and the response waits for that
+    write; operations overtaken by a later toggle are reported superseded.
+    """
+    if len(body.operations) > MAX_MUTATIONS_PER_REQUEST:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_MUTATIONS_PER_REQUEST} operations per request",
+        )
+    operations = [op.model_dump() for op in body.operations]
+    if coalesce:
+        try:
+            return {"results": await episode_coalescer.submit(user_id, operations)}
+        except Exception:
+            raise HTTPException(
+                status_code=503,
+                detail="Episode changes could not be saved; retry with the same idempotency keys",
+            )
+    return {"results": apply_episode_mutations(user_id, operations)}
+
+
 @router.get("/show/{show_id}")
 async def get_show_watched_episodes(
     show_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields"),
     user_id: str = Depends(get_current_user_id),
 ):
-    """Get all watched episodes for a specific show."""
-    episodes = get_watched_episodes(user_id, show_id)
-    return {"show_id": show_id, "episodes": episodes}
+    """
+    Get watched episodes for a specific show, ordered by season/episode.
+    Without a limit all episodes are returned in a single page.
+    """
+    try:
+        page = get_watched_episodes_page(
+            user_id,
+            show_id,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"show_id": show_id, **page}
 
 
 @router.get("/show/{show_id}/progress")
@@ -105,6 +159,21 @@ async def get_show_progress(
     return {"show_id": show_id, **progress}
 
 
+@router.get("/up-next")
+async def get_up_next_feed(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Get the next episode to watch for each show the user is watching."""
+    etag = version_etag(get_data_version(user_id))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(etag_headers(etag))
+    return {"episodes": get_up_next(user_id)}
+
+
 @router.get("/progress", response_model=UserProgressResponse)
 async def get_all_progress(user_id: str = Depends(get_current_user_id)):
     """Get progress for all shows the user is tracking."""
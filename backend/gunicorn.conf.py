@@ -0,0 +1,40 @@
+"""
+Production server settings: gunicorn managing uvicorn workers.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+WEB_CONCURRENCY overrides the worker count (default: one per CPU, since
+each uvicorn worker is an event loop that can keep a core busy).
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Proxies whose X-Forwarded-For / -Proto are trusted. Uvicorn then puts the
+# real client address in the ASGI scope, which per-IP rate limits key on;
+# without it every request behind nginx shares the proxy's address.
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Import the app once in the master; workers share its memory copy-on-write
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server):
+    # Create or migrate the schema once, before any worker can race on it
+    from database import init_db
+
+    init_db()
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach, so
+    # collections in workers don't touch (and copy) the shared pages
+    gc.freeze()
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Per-user responses may be revalidated but never shared.
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def version_etag(version: int) -> str:
+    """Weak ETag for a response derived from a user's data_version."""
+    return f'W/"v{version}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client already holds etag, else None.
+    Read the data_version before building the body: a write in between
+    only makes the body newer than its ETag, which costs one extra 200.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL}
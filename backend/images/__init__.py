@@ -0,0 +1 @@
+# Image proxy module
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import tracing
+from config import settings
+from database import fetch_all_shards
+from shows.tmdb_client import TMDbClient
+
+logger = logging.getLogger(__name__)
+
+# Widths TMDb renders (posters and backdrops); requests snap up to one of
+# these so the cache holds a bounded set of variants per image.
+TMDB_WIDTHS = (92, 154, 185, 300, 342, 500, 780, 1280)
+
+# TMDb image file names: an opaque id plus extension, never a path
+IMAGE_NAME = re.compile(r"^[A-Za-z0-9_-]+\.(jpg|jpeg|png|webp|svg)$")
+
+# Hits refresh a file's mtime (its LRU position) at most this often
+TOUCH_INTERVAL = 60.0
+
+
+class ImageNotFound(Exception):
+    """TMDb has no image by that name."""
+
+
+def image_size(width: Optional[int]) -> str:
+    """Smallest TMDb size at least `width` wide; "original" without a width."""
+    if width is None:
+        return "original"
+    for candidate in TMDB_WIDTHS:
+        if candidate >= width:
+            return f"w{candidate}"
+    return "original"
+
+
+def image_etag(size: str, name: str) -> str:
+    """
+    Strong ETag for a cached image. TMDb never changes the bytes behind a
+    file name, so (size, name) identifies the content exactly.
+    """
+    return f'"{size}-{name}"'
+
+
+def _resolve_dir(path: str) -> Path:
+    directory = Path(path)
+    return directory if directory.is_absolute() else Path(__file__).parent.parent / directory
+
+
+class ImageCache:
+    """
+    TMDb images kept on local disk, evicting least recently used files
+    once they exceed max_bytes in total.
+
+    Recency is the file mtime, bumped on hits, so every worker sharing the
+    directory sees the same LRU order. Each worker tracks the bytes it has
+    written and rescans the directory when that estimate crosses the
+    budget; eviction then trims to EVICT_TO of max_bytes. Stores run in
+    threads, so the estimate and the eviction pass share a lock.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = _resolve_dir(directory)
+        self.max_bytes = max_bytes
+        self._total: Optional[int] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def path_for(self, size: str, name: str) -> Path:
+        return self.directory / f"{size}_{name}"
+
+    def lookup(self, size: str, name: str) -> Optional[Tuple[Path, os.stat_result]]:
+        """Return the cached file and its stat, marking it recently used."""
+        path = self.path_for(size, name)
+        try:
+            stat_result = path.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - stat_result.st_mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                return None  # evicted by another worker just now
+        return path, stat_result
+
+    def store(self, size: str, name: str, data: bytes) -> Path:
+        """Write an image atomically and evict if the budget is exceeded."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(size, name)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._total is None:
+                self._total = self._disk_usage()
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+        return path
+
+    def _entries(self):
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    yield entry.path, entry.stat()
+
+    def _disk_usage(self) -> int:
+        return sum(stat_result.st_size for _, stat_result in self._entries())
+
+    def evict(self) -> int:
+        """Delete least recently used files down to the target size. Returns bytes freed."""
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat_result.st_size for _, stat_result in entries)
+        target = self.max_bytes * self.EVICT_TO
+        freed = 0
+        for path, stat_result in entries:
+            if total - freed <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # another worker evicted it
+            freed += stat_result.st_size
+        self._total = total - freed
+        return freed
+
+    async def _download(self, size: str, name: str) -> bytes:
+        # Imported on first use to keep httpx out of cold-start import time
+        import httpx
+
+        attributes = {"http.method": "GET", "server.address": "image.tmdb.org", "url.path": f"/{size}/{name}"}
+        with tracing.span("tmdb image GET", tracing.CLIENT, attributes) as span:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(f"{TMDbClient.IMAGE_BASE_URL}/{size}/{name}")
+            span.set_attribute("http.status_code", response.status_code)
+        if response.status_code == 404:
+            raise ImageNotFound(name)
+        response.raise_for_status()
+        return response.content
+
+    async def _fetch(self, size: str, name: str) -> Path:
+        data = await self._download(size, name)
+        # Writing (and any eviction scan) happens off the event loop
+        return await asyncio.to_thread(self.store, size, name, data)
+
+    async def get(self, size: str, name: str) -> Tuple[Path, os.stat_result]:
+        """
+        Return the cached file for an image, downloading it on a miss.
+        Concurrent misses for the same image share one download.
+        Raises ImageNotFound if TMDb has no such image.
+        """
+        cached = self.lookup(size, name)
+        if cached:
+            return cached
+
+        key = f"{size}/{name}"
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(size, name))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        path = await asyncio.shield(pending)
+        return path, path.stat()
+
+
+async def prefetch_tracked_posters(limit: int = 50, budget=None) -> int:
+    """
+    Download posters of the most-tracked shows that are not cached yet,
+    at IMAGE_PREFETCH_WIDTH. budget (a RequestBudget) paces downloads.
+    Returns the number of posters fetched.
+    """
+    size = image_size(settings.IMAGE_PREFETCH_WIDTH)
+    fetched = 0
+    trackers: Dict[str, int] = {}
+    for row in fetch_all_shards("shows.tracked_posters", (limit,)):
+        trackers[row["poster_path"]] = trackers.get(row["poster_path"], 0) + row["trackers"]
+    for poster_path in sorted(trackers, key=lambda path: -trackers[path])[:limit]:
+        name = poster_path.lstrip("/")
+        if not IMAGE_NAME.match(name) or image_cache.lookup(size, name):
+            continue
+        if budget is not None:
+            await budget.acquire()
+        try:
+            await image_cache.get(size, name)
+            fetched += 1
+        except Exception as e:
+            logger.warning("Poster prefetch of %s failed: %s", name, e)
+    return fetched
+
+
+image_cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
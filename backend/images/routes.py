@@ -0,0 +1,45 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from config import settings
+from images.models import IMAGE_NAME, ImageNotFound, image_cache, image_etag, image_size
+
+router = APIRouter()
+
+# Image bytes never change for a name, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{name}")
+async def get_image(
+    name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4000, description="Display width in pixels"),
+):
+    """
+    Serve a TMDb poster or backdrop (the file name from poster_path /
+    backdrop_path) from the local image cache. w picks the smallest TMDb
+    rendition at least that wide; without it the original is served.
+    """
+    if not IMAGE_NAME.match(name):
+        raise HTTPException(status_code=404, detail="Image not found")
+    size = image_size(w)
+    etag = image_etag(size, name)
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path, stat_result = await image_cache.get(size, name)
+    except ImageNotFound:
+        raise HTTPException(status_code=404, detail="Image not found")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Image fetch failed: {e}")
+
+    if settings.IMAGE_ACCEL_REDIRECT_PREFIX:
+        # Let the fronting nginx send the file itself (sendfile, zero-copy)
+        headers["X-Accel-Redirect"] = f"{settings.IMAGE_ACCEL_REDIRECT_PREFIX}{path.name}"
+        return Response(headers=headers)
+    return FileResponse(path, headers=headers, stat_result=stat_result)
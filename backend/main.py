@@ -1,23 +1,63 @@
+import importlib
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from startup_profiler import startup_profiler
 
-from config import settings
-from database import init_db
+with startup_profiler.section("fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
 
-# Import routers
-from auth.routes import router as auth_router
-from shows.routes import router as shows_router
-from episodes.routes import router as episodes_router
+with startup_profiler.section("config"):
+    from compression import CompressionMiddleware
+    from config import settings
+    from database import init_db
+
+# uvicorn configures this logger, so startup reports show up in its output
+logger = logging.getLogger("uvicorn.error")
+
+# Routers as (module, prefix, tag); imported below one by one so the
+# startup profiler can attribute import time to each of them.
+ROUTERS = [
+    ("auth.routes", "/api/auth", "auth"),
+    ("shows.routes", "/api/shows", "shows"),
+    ("episodes.routes", "/api/episodes", "episodes"),
+    ("dashboard.routes", "/api/dashboard", "dashboard"),
+    ("sync.routes", "/api/sync", "sync"),
+    ("stats.routes", "/api/stats", "stats"),
+    ("images.routes", "/api/images", "images"),
+    ("admin.routes", "/api/admin", "admin"),
+]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: initialize database
-    init_db()
+    with startup_profiler.section("init_db"):
+        init_db()
+    scheduler = leader_lock = None
+    if settings.SCHEDULER_ENABLED:
+        with startup_profiler.section("shows.scheduler"):
+            from database import get_db_path
+            from shows.scheduler import RefreshScheduler, acquire_leader_lock
+
+            # With several workers only the one holding the lock refreshes
+            leader_lock = acquire_leader_lock(f"{get_db_path()}.scheduler.lock")
+            if leader_lock:
+                scheduler = RefreshScheduler.from_settings()
+                scheduler.start()
+    app.state.startup_profile = startup_profiler.report()
+    if settings.STARTUP_PROFILE:
+        logger.info(startup_profiler.format())
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop background work and write buffered episode toggles
+    if scheduler:
+        await scheduler.stop()
+    if leader_lock:
+        leader_lock.close()
+    from episodes.coalescer import episode_coalescer
+
+    await episode_coalescer.flush_all()
 
 
 app = FastAPI(
@@ -27,6 +67,35 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Response compression (brotli when installed, otherwise gzip)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Shed load on TMDb-bound and heavy DB routes instead of queueing without bound
+if settings.ADMISSION_ENABLED:
+    from admission import AdmissionMiddleware, admission_limiters
+
+    app.add_middleware(
+        AdmissionMiddleware,
+        limiters=admission_limiters,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+# Per-user and per-IP rate limits, checked before admission control
+if settings.RATE_LIMIT_ENABLED:
+    from ratelimit import RateLimitMiddleware, rate_limit_store
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=rate_limit_store,
+        window=settings.RATE_LIMIT_WINDOW_SECONDS,
+        limits={
+            ("user", "read"): settings.RATE_LIMIT_USER_READS,
+            ("user", "write"): settings.RATE_LIMIT_USER_WRITES,
+            ("ip", "read"): settings.RATE_LIMIT_IP_READS,
+            ("ip", "write"): settings.RATE_LIMIT_IP_WRITES,
+        },
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -36,10 +105,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiling, installed only when enabled so it costs nothing otherwise
+if settings.PROFILING_ENABLED:
+    from profiling import ProfilingMiddleware
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILING_DIR,
+        max_files=settings.PROFILING_MAX_FILES,
+        secret=settings.PROFILING_SECRET,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        routes=settings.PROFILING_ROUTES,
+    )
+
+# Request tracing, installed only when enabled
+if settings.TRACING_ENABLED:
+    from tracing import SpanExporter, TracingMiddleware
+
+    app.add_middleware(
+        TracingMiddleware,
+        exporter=SpanExporter(settings.TRACING_EXPORT_PATH, settings.TRACING_OTLP_ENDPOINT),
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+    )
+
 # Include routers
-app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
-app.include_router(shows_router, prefix="/api/shows", tags=["shows"])
-app.include_router(episodes_router, prefix="/api/episodes", tags=["episodes"])
+for module_name, prefix, tag in ROUTERS:
+    with startup_profiler.section(module_name):
+        module = importlib.import_module(module_name)
+    app.include_router(module.router, prefix=prefix, tags=[tag])
 
 
 @app.get("/health")
@@ -0,0 +1,50 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor string."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed or has the wrong arity.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    # Values are bound as SQL parameters, which must be scalars
+    if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated `fields` query parameter into a list."""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
+def select_columns(
+    requested: Optional[List[str]],
+    allowed: Dict[str, str],
+) -> List[str]:
+    """
+    Resolve requested field names into SQL column expressions.
+    Returns all allowed fields when nothing is requested.
+    Raises ValueError for unknown fields.
+    """
+    names = requested or list(allowed)
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [f"{allowed[n]} AS {n}" for n in names]
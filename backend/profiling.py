@@ -0,0 +1,134 @@
+"""
+On-demand per-request profiling.
+
+    python -m profiling token --ttl 3600   # value for the X-Profile-Token header
+
+ProfilingMiddleware runs cProfile around a selected request and writes the
+stats (pstats format; open with snakeviz or `python -m pstats`) to a
+directory that keeps only the newest max_files profiles. A request is
+selected by a valid X-Profile-Token, by the sample rate, or by matching a
+route prefix. The response carries the profile's file name in
+X-Profile-Id. main.py only installs the middleware when PROFILING_ENABLED
+is set, so requests pay nothing while it is off.
+"""
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import random
+import re
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+
+
+def _signature(secret: str, expires: int) -> str:
+    return hmac.new(secret.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign_profile_token(secret: str, ttl: int = 3600) -> str:
+    """Token that asks for a profile of each request sending it, valid for ttl seconds."""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_signature(secret, expires)}"
+
+
+def verify_profile_token(secret: str, token: str) -> bool:
+    """Check a token's signature and expiry."""
+    expires, _, signature = token.partition(".")
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(secret, int(expires)))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests with cProfile, one at a time per process.
+
+    cProfile follows the event loop thread: it sees async handlers but not
+    work handed to threads (sync dependencies, asyncio.to_thread), and it
+    also records whatever other requests the loop ran while this one was
+    suspended. It is most telling for CPU-bound handlers or on a quiet worker.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str,
+        max_files: int = 50,
+        secret: str = "",
+        sample_rate: float = 0.0,
+        routes: Iterable[str] = (),
+    ):
+        self.app = app
+        self.directory = Path(directory)
+        if not self.directory.is_absolute():
+            self.directory = Path(__file__).parent / self.directory
+        self.max_files = max_files
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.routes = tuple(routes)
+        self._active = False
+
+    def _selected(self, scope: Scope) -> bool:
+        token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        if token is not None:
+            return verify_profile_token(self.secret, token)
+        if self.routes and scope["path"].startswith(self.routes):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Only one cProfile can run per thread at a time
+        if scope["type"] != "http" or self._active or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{time.time_ns() // 1000}-{scope['method']}-{slug[:60]}.prof"
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            self._active = False
+            await asyncio.to_thread(self._save, profiler, name)
+
+    def _save(self, profiler: cProfile.Profile, name: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / name)
+        # Names start with a timestamp, so sorting puts the oldest first
+        profiles = sorted(self.directory.glob("*.prof"))
+        for old in profiles[: max(0, len(profiles) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+
+def main(argv: Optional[list] = None) -> None:
+    from config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    token = commands.add_parser("token", help="Print an X-Profile-Token value")
+    token.add_argument("--ttl", type=int, default=3600, help="Seconds the token stays valid")
+    args = parser.parse_args(argv)
+
+    if not settings.PROFILING_SECRET:
+        raise SystemExit("PROFILING_SECRET is not set")
+    print(sign_profile_token(settings.PROFILING_SECRET, args.ttl))
+
+
+if __name__ == "__main__":
+    main()
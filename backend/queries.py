@@ -0,0 +1,556 @@
+"""
+Named SQL statements used by the app.
+
+Every statement lives here under a "<table>.<action>" name so it is
+prepared once per connection (sqlite3's statement cache is keyed on the
+exact SQL text), its latency is tracked by name, and a test can check
+that each one has an index-backed plan. Run them with database.fetch_all,
+fetch_one, execute and execute_batch.
+
+Statements containing {columns} are templates: the caller passes a
+column list built from a field whitelist (see pagination.select_columns).
+Those containing {filters} take extra "AND ..." predicates built from a
+fixed set of clauses (see shows.models.USER_SHOW_FILTERS).
+"""
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+QUERIES: Dict[str, str] = {
+    # ── users ─────────────────────────────────────────────────
+    "users.get": "SELECT * FROM users WHERE id = ?",
+    "users.get_by_google_id": "SELECT * FROM users WHERE google_id = ?",
+    "users.insert": """
+        INSERT INTO users (id, google_id, email, name, picture_url)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    "users.update_profile": """
+        UPDATE users
+        SET name = ?, picture_url = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """,
+    # ── shows ─────────────────────────────────────────────────
+    # Catalog stubs (cached_at IS NULL) hold only a title, so they do not
+    # count as cached details
+    "shows.get": "SELECT * FROM shows WHERE id = ? AND cached_at IS NOT NULL",
+    "shows.exists": "SELECT id FROM shows WHERE id = ?",
+    "shows.total_episodes": "SELECT total_episodes FROM shows WHERE id = ?",
+    # Show fields embedded in users' lists, dashboards and progress
+    "shows.listed_fields": """
+        SELECT title, poster_path, total_episodes, total_seasons, genres,
+               tmdb_rating, episode_run_time
+        FROM shows WHERE id = ?
+    """,
+    "shows.insert": """
+        INSERT INTO shows
+        (id, title, overview, poster_path, backdrop_path, first_air_date,
+         last_air_date, next_air_date, in_production,
+         total_episodes, total_seasons, genres, tmdb_rating, episode_run_time, popularity)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "shows.update": """
+        UPDATE shows
+        SET title = ?, overview = ?, poster_path = ?, backdrop_path = ?,
+            first_air_date = ?, last_air_date = ?, next_air_date = ?,
+            in_production = ?, total_episodes = ?, total_seasons = ?,
+            genres = ?, tmdb_rating = ?, episode_run_time = ?,
+            popularity = COALESCE(?, popularity),
+            cached_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """,
+    # Tracked shows airing around now whose cache is stale, most-tracked
+    # first. Grouping on us.show_id walks idx_user_shows_show, so only
+    # tracked shows are visited however large the catalog grows.
+    "shows.to_refresh": """
+        SELECT s.id, s.total_seasons, COUNT(*) AS trackers
+        FROM user_shows us
+        JOIN shows s ON s.id = us.show_id
+        WHERE (
+            s.next_air_date BETWEEN date('now', '-1 day') AND date('now', ?)
+            OR s.last_air_date >= date('now', ?)
+        )
+          AND (s.cached_at IS NULL OR s.cached_at < datetime('now', ?))
+        GROUP BY us.show_id
+        ORDER BY trackers DESC
+        LIMIT ?
+    """,
+    # Posters of tracked shows, most-tracked first, for image prefetch
+    "shows.tracked_posters": """
+        SELECT s.poster_path, COUNT(*) AS trackers
+        FROM user_shows us
+        JOIN shows s ON s.id = us.show_id
+        WHERE s.poster_path IS NOT NULL
+        GROUP BY us.show_id
+        ORDER BY trackers DESC
+        LIMIT ?
+    """,
+    # Stub rows from the TMDb daily export. Existing rows only take the
+    # fresh popularity, so cached details are never overwritten.
+    "shows.catalog_upsert": """
+        INSERT INTO shows (id, title, popularity, cached_at)
+        VALUES (?, ?, ?, NULL)
+        ON CONFLICT(id) DO UPDATE SET popularity = excluded.popularity
+    """,
+    # Stubs still waiting for details, most popular first, after a
+    # (popularity, id) cursor
+    "shows.catalog_pending": """
+        SELECT id, popularity FROM shows
+        WHERE cached_at IS NULL AND (popularity, id) < (?, ?)
+        ORDER BY popularity DESC, id DESC
+        LIMIT ?
+    """,
+    "shows.catalog_delete_stub": "DELETE FROM shows WHERE id = ? AND cached_at IS NULL",
+    # ── show_episodes ─────────────────────────────────────────
+    "show_episodes.upsert": """
+        INSERT INTO show_episodes (show_id, season, episode, name, air_date, runtime)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(show_id, season, episode) DO UPDATE
+        SET name = excluded.name, air_date = excluded.air_date,
+            runtime = excluded.runtime
+    """,
+    "show_episodes.any": "SELECT 1 FROM show_episodes WHERE show_id = ? LIMIT 1",
+    # Episode runtime, falling back to the show's typical runtime
+    "show_episodes.runtime": """
+        SELECT COALESCE(
+            (SELECT runtime FROM show_episodes
+             WHERE show_id = ? AND season = ? AND episode = ?),
+            (SELECT episode_run_time FROM shows WHERE id = ?),
+            0
+        )
+    """,
+    # ── genres ────────────────────────────────────────────────
+    "genres.upsert": "INSERT INTO genres (name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+    "show_genres.clear": "DELETE FROM show_genres WHERE show_id = ?",
+    "show_genres.insert": """
+        INSERT OR IGNORE INTO show_genres (show_id, genre_id)
+        SELECT ?, id FROM genres WHERE name = ?
+    """,
+    "show_genres.names": """
+        SELECT g.name FROM show_genres sg
+        JOIN genres g ON g.id = sg.genre_id
+        WHERE sg.show_id = ?
+    """,
+    # ── user_shows ────────────────────────────────────────────
+    "user_shows.trackers": "SELECT user_id FROM user_shows WHERE show_id = ?",
+    "user_shows.is_tracked": "SELECT 1 FROM user_shows WHERE user_id = ? AND show_id = ?",
+    "user_shows.add": """
+        INSERT OR REPLACE INTO user_shows (id, user_id, show_id, status, favorite, show_rating)
+        VALUES (?, ?, ?, ?, ?, COALESCE((SELECT tmdb_rating FROM shows WHERE id = ?), 0))
+    """,
+    "user_shows.refresh_last_watched": """
+        UPDATE user_shows
+        SET last_watched_at = COALESCE(
+            (SELECT MAX(watched_at) FROM episodes_watched
+             WHERE user_id = ? AND show_id = ?),
+            ''
+        )
+        WHERE user_id = ? AND show_id = ?
+    """,
+    "user_shows.tracked": "SELECT 1 FROM user_shows WHERE show_id = ? LIMIT 1",
+    "user_shows.sync_rating": """
+        UPDATE user_shows SET show_rating = ?
+        WHERE show_id = ? AND show_rating != ?
+    """,
+    "user_shows.update_status": """
+        UPDATE user_shows
+        SET status = ?
+        WHERE user_id = ? AND show_id = ?
+    """,
+    "user_shows.remove": """
+        DELETE FROM user_shows
+        WHERE user_id = ? AND show_id = ?
+    """,
+    # Keyset pages, newest first; LIMIT -1 returns everything. The
+    # page_by_* variants sort on other user_shows columns, each walking
+    # its own (user_id, key DESC, id DESC) index.
+    "user_shows.page": """
+        SELECT {columns}, us.added_at AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters}
+        ORDER BY us.added_at DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.page_after": """
+        SELECT {columns}, us.added_at AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters} AND (us.added_at, us.id) < (?, ?)
+        ORDER BY us.added_at DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.page_by_watched": """
+        SELECT {columns}, us.last_watched_at AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters}
+        ORDER BY us.last_watched_at DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.page_by_watched_after": """
+        SELECT {columns}, us.last_watched_at AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters} AND (us.last_watched_at, us.id) < (?, ?)
+        ORDER BY us.last_watched_at DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.page_by_rating": """
+        SELECT {columns}, us.show_rating AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters}
+        ORDER BY us.show_rating DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.page_by_rating_after": """
+        SELECT {columns}, us.show_rating AS _cursor_key, us.id AS _cursor_id
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?{filters} AND (us.show_rating, us.id) < (?, ?)
+        ORDER BY us.show_rating DESC, us.id DESC
+        LIMIT ?
+    """,
+    "user_shows.progress": """
+        SELECT
+            us.show_id,
+            us.status,
+            us.favorite,
+            s.title,
+            s.poster_path,
+            s.total_episodes,
+            (SELECT COUNT(*) FROM episodes_watched ew
+             WHERE ew.user_id = us.user_id AND ew.show_id = us.show_id) as watched_count
+        FROM user_shows us
+        JOIN shows s ON us.show_id = s.id
+        WHERE us.user_id = ?
+        ORDER BY us.added_at DESC
+    """,
+    # ── episodes_watched ──────────────────────────────────────
+    "episodes_watched.mark": """
+        INSERT OR IGNORE INTO episodes_watched (id, user_id, show_id, season, episode)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    "episodes_watched.unmark": """
+        DELETE FROM episodes_watched
+        WHERE user_id = ? AND show_id = ? AND season = ? AND episode = ?
+        RETURNING watched_at, credited_minutes, credited_genres
+    """,
+    # What a watch added to the stats rollups, taken back on unwatch
+    "episodes_watched.credit": """
+        UPDATE episodes_watched SET credited_minutes = ?, credited_genres = ?
+        WHERE user_id = ? AND show_id = ? AND season = ? AND episode = ?
+    """,
+    # Credit every watch of a user from the current runtimes and genres
+    "episodes_watched.recredit": """
+        UPDATE episodes_watched
+        SET credited_minutes = COALESCE(
+                (SELECT runtime FROM show_episodes se
+                 WHERE se.show_id = episodes_watched.show_id
+                   AND se.season = episodes_watched.season
+                   AND se.episode = episodes_watched.episode),
+                (SELECT episode_run_time FROM shows WHERE id = episodes_watched.show_id),
+                0),
+            credited_genres = COALESCE(
+                (SELECT group_concat(g.name, ',') FROM show_genres sg
+                 JOIN genres g ON g.id = sg.genre_id
+                 WHERE sg.show_id = episodes_watched.show_id),
+                '')
+        WHERE user_id = ?
+    """,
+    "episodes_watched.set": """
+        SELECT season, episode FROM episodes_watched
+        WHERE user_id = ? AND show_id = ?
+    """,
+    "episodes_watched.count": """
+        SELECT COUNT(*) as count FROM episodes_watched
+        WHERE user_id = ? AND show_id = ?
+    """,
+    # Keyset pages in episode order; LIMIT -1 returns everything
+    "episodes_watched.page": """
+        SELECT {columns}, season AS _cursor_season, episode AS _cursor_episode
+        FROM episodes_watched
+        WHERE user_id = ? AND show_id = ?
+        ORDER BY season, episode
+        LIMIT ?
+    """,
+    "episodes_watched.page_after": """
+        SELECT {columns}, season AS _cursor_season, episode AS _cursor_episode
+        FROM episodes_watched
+        WHERE user_id = ? AND show_id = ? AND (season, episode) > (?, ?)
+        ORDER BY season, episode
+        LIMIT ?
+    """,
+    "episodes_watched.users": "SELECT DISTINCT user_id FROM episodes_watched",
+    # Watch counts and credited minutes per genre set and month, for rebuilding stats
+    "episodes_watched.history_rollup": """
+        SELECT credited_genres, strftime('%Y-%m', watched_at) AS month,
+               COUNT(*) AS episodes, SUM(credited_minutes) AS minutes
+        FROM episodes_watched
+        WHERE user_id = ?
+        GROUP BY credited_genres, month
+    """,
+    # ── mutation_keys ─────────────────────────────────────────
+    "mutation_keys.prune": """
+        DELETE FROM mutation_keys
+        WHERE user_id = ? AND created_at < datetime('now', '-1 day')
+    """,
+    "mutation_keys.get": """
+        SELECT applied FROM mutation_keys
+        WHERE user_id = ? AND idempotency_key = ?
+    """,
+    "mutation_keys.insert": """
+        INSERT INTO mutation_keys (user_id, idempotency_key, applied)
+        VALUES (?, ?, ?)
+    """,
+    "mutation_keys.insert_seen": """
+        INSERT OR IGNORE INTO mutation_keys (user_id, idempotency_key, applied)
+        VALUES (?, ?, 0)
+    """,
+    # ── user_up_next ──────────────────────────────────────────
+    # First unwatched non-special episode after (season, episode)
+    "user_up_next.find_next": """
+        SELECT se.season, se.episode FROM show_episodes se
+        WHERE se.show_id = ? AND se.season > 0 AND (se.season, se.episode) > (?, ?)
+          AND NOT EXISTS (
+            SELECT 1 FROM episodes_watched ew
+            WHERE ew.user_id = ? AND ew.show_id = se.show_id
+              AND ew.season = se.season AND ew.episode = se.episode
+          )
+        ORDER BY se.season, se.episode
+        LIMIT 1
+    """,
+    "user_up_next.store": """
+        INSERT INTO user_up_next (user_id, show_id, season, episode)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, show_id) DO UPDATE
+        SET season = excluded.season, episode = excluded.episode,
+            updated_at = CURRENT_TIMESTAMP
+    """,
+    "user_up_next.delete": "DELETE FROM user_up_next WHERE user_id = ? AND show_id = ?",
+    # The stored up-next episode, if it has been watched since
+    "user_up_next.watched": """
+        SELECT un.season, un.episode FROM user_up_next un
+        JOIN episodes_watched ew
+          ON ew.user_id = un.user_id AND ew.show_id = un.show_id
+         AND ew.season = un.season AND ew.episode = un.episode
+        WHERE un.user_id = ? AND un.show_id = ?
+    """,
+    "user_up_next.rewind": """
+        UPDATE user_up_next
+        SET season = ?, episode = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = ? AND show_id = ?
+          AND (season IS NULL OR (season, episode) > (?, ?))
+          AND EXISTS (
+            SELECT 1 FROM show_episodes
+            WHERE show_id = ? AND season = ? AND episode = ?
+          )
+    """,
+    "user_up_next.feed": """
+        SELECT
+            un.show_id,
+            s.title,
+            s.poster_path,
+            un.season,
+            un.episode,
+            se.name AS episode_name,
+            se.air_date
+        FROM user_up_next un
+        JOIN user_shows us ON us.user_id = un.user_id AND us.show_id = un.show_id
+        JOIN shows s ON s.id = un.show_id
+        LEFT JOIN show_episodes se
+          ON se.show_id = un.show_id AND se.season = un.season AND se.episode = un.episode
+        WHERE un.user_id = ? AND un.season IS NOT NULL AND us.status = 'watching'
+        ORDER BY un.updated_at DESC
+    """,
+    # ── dashboard ─────────────────────────────────────────────
+    "dashboard.library": """
+        SELECT
+            us.show_id,
+            us.status,
+            us.favorite,
+            s.title,
+            s.poster_path,
+            s.total_episodes,
+            s.total_seasons,
+            COALESCE(w.watched_count, 0) AS watched_count,
+            un.season AS next_season,
+            un.episode AS next_episode,
+            se.name AS next_episode_name,
+            se.air_date AS next_air_date
+        FROM user_shows us
+        JOIN shows s ON s.id = us.show_id
+        LEFT JOIN (
+            SELECT show_id, COUNT(*) AS watched_count
+            FROM episodes_watched
+            WHERE user_id = ?
+            GROUP BY show_id
+        ) w ON w.show_id = us.show_id
+        LEFT JOIN user_up_next un
+          ON un.user_id = us.user_id AND un.show_id = us.show_id
+        LEFT JOIN show_episodes se
+          ON se.show_id = un.show_id AND se.season = un.season AND se.episode = un.episode
+        WHERE us.user_id = ?
+        ORDER BY us.added_at DESC, us.id DESC
+    """,
+    # ── user_stats rollups ────────────────────────────────────
+    "user_stats.add": """
+        INSERT INTO user_stats (user_id, episodes, minutes) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE
+        SET episodes = episodes + excluded.episodes, minutes = minutes + excluded.minutes
+    """,
+    "user_stats_monthly.add": """
+        INSERT INTO user_stats_monthly (user_id, month, episodes, minutes) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, month) DO UPDATE
+        SET episodes = episodes + excluded.episodes, minutes = minutes + excluded.minutes
+    """,
+    "user_stats_genre.add": """
+        INSERT INTO user_stats_genre (user_id, genre, episodes, minutes) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, genre) DO UPDATE
+        SET episodes = episodes + excluded.episodes, minutes = minutes + excluded.minutes
+    """,
+    "user_stats.get": "SELECT episodes, minutes FROM user_stats WHERE user_id = ?",
+    "user_stats_monthly.by_user": """
+        SELECT month, episodes, minutes FROM user_stats_monthly
+        WHERE user_id = ? AND episodes > 0
+        ORDER BY month
+    """,
+    "user_stats_genre.by_user": """
+        SELECT genre, episodes, minutes FROM user_stats_genre
+        WHERE user_id = ? AND episodes > 0
+        ORDER BY minutes DESC, episodes DESC
+    """,
+    "user_stats.delete": "DELETE FROM user_stats WHERE user_id = ?",
+    "user_stats_monthly.delete": "DELETE FROM user_stats_monthly WHERE user_id = ?",
+    "user_stats_genre.delete": "DELETE FROM user_stats_genre WHERE user_id = ?",
+    "user_stats.clear": "DELETE FROM user_stats",
+    "user_stats_monthly.clear": "DELETE FROM user_stats_monthly",
+    "user_stats_genre.clear": "DELETE FROM user_stats_genre",
+    # ── user_data_versions ────────────────────────────────────
+    "user_data_versions.bump": """
+        INSERT INTO user_data_versions (user_id, version) VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+        RETURNING version
+    """,
+    "user_data_versions.get": "SELECT version, sync_floor FROM user_data_versions WHERE user_id = ?",
+    "user_data_versions.raise_floor": """
+        UPDATE user_data_versions SET sync_floor = MAX(sync_floor, ?)
+        WHERE user_id = ?
+    """,
+    # ── change_log ────────────────────────────────────────────
+    "change_log.insert": """
+        INSERT INTO change_log (user_id, version, entity, op, show_id, season, episode)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+    "change_log.compact": """
+        DELETE FROM change_log
+        WHERE user_id = ? AND id NOT IN (
+            SELECT MAX(id) FROM change_log
+            WHERE user_id = ?
+            GROUP BY entity, show_id, season, episode
+        )
+    """,
+    "change_log.expired_tombstone_floor": """
+        SELECT MAX(version) FROM change_log
+        WHERE user_id = ? AND op = 'delete' AND created_at < datetime('now', ?)
+    """,
+    "change_log.expire_tombstones": """
+        DELETE FROM change_log
+        WHERE user_id = ? AND op = 'delete' AND created_at < datetime('now', ?)
+    """,
+    "change_log.snapshot_shows": """
+        SELECT 'upsert' AS op, us.show_id, us.status, us.favorite, us.added_at,
+               s.title, s.poster_path, s.total_episodes, s.total_seasons
+        FROM user_shows us
+        JOIN shows s ON s.id = us.show_id
+        WHERE us.user_id = ?
+    """,
+    "change_log.snapshot_episodes": """
+        SELECT 'upsert' AS op, show_id, season, episode, watched_at
+        FROM episodes_watched
+        WHERE user_id = ?
+    """,
+    # Shows changed after a version, joined with their current row
+    "change_log.changed_shows": """
+        SELECT c.show_id, us.status, us.favorite, us.added_at,
+               s.title, s.poster_path, s.total_episodes, s.total_seasons,
+               us.show_id IS NOT NULL AS present
+        FROM (
+            SELECT show_id
+            FROM change_log
+            WHERE user_id = ? AND version > ? AND entity = 'show'
+            GROUP BY show_id
+        ) c
+        LEFT JOIN user_shows us ON us.user_id = ? AND us.show_id = c.show_id
+        LEFT JOIN shows s ON s.id = c.show_id
+    """,
+    # Episodes changed after a version, joined with their current row
+    "change_log.changed_episodes": """
+        SELECT c.show_id, c.season, c.episode, ew.watched_at,
+               ew.id IS NOT NULL AS present
+        FROM (
+            SELECT show_id, season, episode
+            FROM change_log
+            WHERE user_id = ? AND version > ? AND entity = 'episode'
+            GROUP BY show_id, season, episode
+        ) c
+        LEFT JOIN episodes_watched ew
+          ON ew.user_id = ? AND ew.show_id = c.show_id
+         AND ew.season = c.season AND ew.episode = c.episode
+    """,
+}
+
+
+class QueryStats:
+    """
+    Per-query latency, by registered name. Keeps running totals plus the
+    most recent `window` samples for percentiles.
+    """
+
+    def __init__(self, window: int = 512):
+        self.window = window
+        self._lock = threading.Lock()
+        self._count: Dict[str, int] = {}
+        self._total: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+        self._recent: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._count[name] = self._count.get(name, 0) + 1
+            self._total[name] = self._total.get(name, 0.0) + seconds
+            self._max[name] = max(self._max.get(name, 0.0), seconds)
+            recent = self._recent.get(name)
+            if recent is None:
+                recent = self._recent[name] = deque(maxlen=self.window)
+            recent.append(seconds)
+
+    def snapshot(self, name: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Return count, mean, p50, p95 and max (in ms) per query, slowest total first."""
+        with self._lock:
+            names = [name] if name else list(self._count)
+            result = {}
+            for n in names:
+                if n not in self._count:
+                    continue
+                recent = sorted(self._recent[n])
+                result[n] = {
+                    "count": self._count[n],
+                    "total_ms": round(self._total[n] * 1000, 3),
+                    "mean_ms": round(self._total[n] / self._count[n] * 1000, 3),
+                    "p50_ms": round(recent[len(recent) // 2] * 1000, 3),
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 3),
+                    "max_ms": round(self._max[n] * 1000, 3),
+                }
+        return dict(sorted(result.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._count.clear()
+            self._total.clear()
+            self._max.clear()
+            self._recent.clear()
+
+
+# Singleton instance
+query_stats = QueryStats()
@@ -0,0 +1,214 @@
+"""
+Sliding-window API rate limiting per user and per client IP.
+
+Every /api request is counted against its client IP. Requests with a
+valid bearer token are also counted against the token's user_id. Reads
+(GET, HEAD) and writes have separate budgets. Windows are approximated
+from two fixed-window counters: the previous window's count, weighted
+by how much of it still overlaps, plus the current one. That keeps each
+check O(1), with one small record per key.
+
+MemoryRateLimitStore keeps counters in the worker and drops idle keys
+every window. SharedRateLimitStore keeps them in a cache backend
+(SQLite file or Redis) so all workers share one budget.
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cache import TTLCache
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class MemoryRateLimitStore:
+    """Per-worker counters: key -> [window index, current count, previous count]."""
+
+    # hit() only touches memory, so it runs on the event loop
+    blocking = False
+
+    def __init__(self):
+        self._counters: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def hit(self, key: str, window: float, now: float) -> Tuple[int, int, float]:
+        """Count a request; returns (current, previous, elapsed share of the window)."""
+        index = int(now // window)
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(index)
+                self._next_sweep = now + window
+            counter = self._counters.get(key)
+            if counter is None or counter[0] < index - 1:
+                counter = self._counters[key] = [index, 0, 0]
+            elif counter[0] == index - 1:
+                counter[:] = [index, 0, counter[1]]
+            counter[1] += 1
+            return counter[1], counter[2], (now % window) / window
+
+    def _sweep(self, index: int) -> None:
+        # Keys idle for a whole window no longer affect any count
+        idle = [key for key, counter in self._counters.items() if counter[0] < index - 1]
+        for key in idle:
+            del self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class SharedRateLimitStore:
+    """Counters in a shared cache backend, one expiring key per window."""
+
+    # hit() is a SQLite write or Redis round trip; run it off the event loop
+    blocking = True
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from cache import get_shared_backend
+
+            self._backend = get_shared_backend()
+        return self._backend
+
+    def hit(self, key: str, window: float, now: float) -> Tuple[int, int, float]:
+        index = int(now // window)
+        current = self.backend.incr(f"ratelimit:{key}:{index}", ttl=2 * window)
+        previous = self.backend.get(f"ratelimit:{key}:{index - 1}")
+        return current, int(previous) if previous else 0, (now % window) / window
+
+    def reset(self) -> None:
+        pass
+
+
+class RateLimitMiddleware:
+    """
+    Enforces per-IP and per-user budgets on /api routes and reports the
+    tightest one in RateLimit-Limit / -Remaining / -Reset headers (plus
+    the X-RateLimit-* equivalents); over budget it answers 429 with
+    Retry-After.
+
+    limits maps (subject, kind) to requests per window, where subject is
+    "ip" or "user" and kind is "read" or "write".
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store,
+        limits: Dict[Tuple[str, str], int],
+        window: float = 60.0,
+        prefix: str = "/api/",
+    ):
+        self.app = app
+        self.store = store
+        self.limits = limits
+        self.window = window
+        self.prefix = prefix
+        # Decoding a JWT on every request is the costly part; remember results
+        self._token_users = TTLCache(maxsize=4096, ttl=300, name="ratelimit_tokens")
+
+    def _user_id(self, scope: Scope) -> Optional[str]:
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        user_id = self._token_users.get(token)
+        if user_id is None:
+            from fastapi import HTTPException
+
+            from auth.jwt_handler import verify_token
+
+            try:
+                user_id = verify_token(token).get("user_id") or ""
+            except HTTPException:
+                user_id = ""  # invalid tokens are limited by IP only
+            self._token_users.set(token, user_id)
+        return user_id or None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        kind = "write" if scope["method"] in WRITE_METHODS else "read"
+        client = scope.get("client")
+        subjects = [("ip", client[0] if client else "unknown")]
+        user_id = self._user_id(scope)
+        if user_id:
+            subjects.append(("user", user_id))
+
+        now = time.time()
+        reset = math.ceil(self.window - now % self.window)
+        tightest: Optional[Tuple[int, int]] = None  # (remaining, limit)
+        for subject, value in subjects:
+            limit = self.limits.get((subject, kind))
+            if not limit:
+                continue
+            key = f"{subject}:{kind}:{value}"
+            if self.store.blocking:
+                current, previous, elapsed = await asyncio.to_thread(self.store.hit, key, self.window, now)
+            else:
+                current, previous, elapsed = self.store.hit(key, self.window, now)
+            count = previous * (1 - elapsed) + current
+            remaining = max(0, math.floor(limit - count))
+            if count > limit:
+                await self._reject(send, limit, reset)
+                return
+            if tightest is None or remaining < tightest[0]:
+                tightest = (remaining, limit)
+
+        if tightest is None:
+            await self.app(scope, receive, send)
+            return
+        headers = self._headers(tightest[1], tightest[0], reset)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers:
+                    response_headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _headers(limit: int, remaining: int, reset: int) -> List[Tuple[str, str]]:
+        values = (("Limit", limit), ("Remaining", remaining), ("Reset", reset))
+        return [(f"{prefix}{name}", str(value)) for prefix in ("RateLimit-", "X-RateLimit-") for name, value in values]
+
+    async def _reject(self, send: Send, limit: int, reset: int) -> None:
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        headers += [(b"retry-after", str(reset).encode())]
+        headers += [(name.lower().encode(), value.encode()) for name, value in self._headers(limit, 0, reset)]
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def store_from_settings():
+    from config import settings
+
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        return SharedRateLimitStore()
+    return MemoryRateLimitStore()
+
+
+rate_limit_store = store_from_settings()
@@ -0,0 +1,136 @@
+"""
+Move users' rows between shard files for a new DB_SHARDS.
+
+    python -m reshard --to 4            # from the current DB_SHARDS
+    python -m reshard --from 4 --to 1   # back to a single file
+
+Stop the app first, then set DB_SHARDS to the new count and start it
+again. Every user whose shard file differs under the new count has
+their USER_TABLES rows copied to it and then deleted from the old file,
+a batch of users at a time. An interrupted run can simply be re-run: a
+user still present in an old file is copied over again from scratch.
+"""
+import argparse
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import database
+from config import settings
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=settings.DB_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    return conn
+
+
+def _tables(conn: sqlite3.Connection, schema: str = "main") -> List[str]:
+    names = {row[0] for row in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+    return [table for table in database.USER_TABLES if table in names]
+
+
+def _prepare_target(path: Path) -> None:
+    """Create the USER_TABLES in a shard file if it lacks them."""
+    conn = _connect(path)
+    try:
+        conn.executescript(database.schema_script(user_tables=True))
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION}")
+    finally:
+        conn.close()
+
+
+def _users(path: Path) -> List[str]:
+    conn = _connect(path)
+    try:
+        selects = [f"SELECT user_id FROM {table}" for table in _tables(conn)]
+        if not selects:
+            return []
+        return [row[0] for row in conn.execute(" UNION ".join(selects))]
+    finally:
+        conn.close()
+
+
+def _move(source: Path, target: Path, user_ids: List[str]) -> None:
+    """Copy the users' rows into target, commit, then delete them from source."""
+    conn = _connect(target)
+    try:
+        conn.execute("ATTACH DATABASE ? AS src", (str(source),))
+        conn.execute("CREATE TEMP TABLE moving (user_id TEXT PRIMARY KEY)")
+        conn.executemany("INSERT INTO temp.moving VALUES (?)", [(u,) for u in user_ids])
+        moving = "user_id IN (SELECT user_id FROM temp.moving)"
+        tables = _tables(conn, "src")
+
+        conn.execute("BEGIN IMMEDIATE")
+        for table in tables:
+            info = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+            # A single-column INTEGER PRIMARY KEY is the rowid (change_log.id);
+            # it is renumbered in the target, and ORDER BY rowid keeps each
+            # user's entries in order
+            primary_key = [row for row in info if row[5]]
+            rowid_alias = (
+                primary_key[0][1]
+                if len(primary_key) == 1 and primary_key[0][2].upper() == "INTEGER"
+                else None
+            )
+            columns = ", ".join(row[1] for row in info if row[1] != rowid_alias)
+            conn.execute(f"DELETE FROM main.{table} WHERE {moving}")
+            conn.execute(
+                f"INSERT INTO main.{table} ({columns}) "
+                f"SELECT {columns} FROM src.{table} WHERE {moving} ORDER BY rowid"
+            )
+        conn.execute("COMMIT")
+
+        conn.execute("BEGIN IMMEDIATE")
+        for table in tables:
+            conn.execute(f"DELETE FROM src.{table} WHERE {moving}")
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def reshard(source_count: int, target_count: int, batch_size: int = 500) -> int:
+    """
+    Move every user from the source_count layout to the shard they hash
+    to under target_count. Returns the number of users moved.
+    """
+    targets = [database.shard_path(i, target_count) for i in range(target_count)]
+    for path in targets:
+        _prepare_target(path)
+
+    moved = 0
+    for index in range(source_count):
+        source = database.shard_path(index, source_count)
+        if not source.exists():
+            continue
+        by_target: Dict[Path, List[str]] = defaultdict(list)
+        for user_id in _users(source):
+            target = targets[database.shard_for(user_id, target_count)]
+            if target != source:
+                by_target[target].append(user_id)
+        for target, user_ids in by_target.items():
+            for start in range(0, len(user_ids), batch_size):
+                _move(source, target, user_ids[start:start + batch_size])
+            moved += len(user_ids)
+            print(f"{source.name} -> {target.name}: {len(user_ids)} user(s)")
+    return moved
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--from", dest="source", type=int, default=settings.DB_SHARDS,
+                        help="Shard count the files are in now (default DB_SHARDS)")
+    parser.add_argument("--to", dest="target", type=int, required=True, help="New shard count")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users moved per transaction")
+    args = parser.parse_args(argv)
+    if args.source < 1 or args.target < 1:
+        raise SystemExit("Shard counts must be at least 1")
+
+    moved = reshard(args.source, args.target, args.batch_size)
+    print(f"Moved {moved} user(s); set DB_SHARDS={args.target} before starting the app")
+
+
+if __name__ == "__main__":
+    main()
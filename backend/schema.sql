@@ -17,14 +17,34 @@ CREATE TABLE IF NOT EXISTS shows (
     poster_path TEXT,
     backdrop_path TEXT,
     first_air_date TEXT,
+    last_air_date TEXT,
+    next_air_date TEXT,  -- air date of the next scheduled episode
+    in_production BOOLEAN DEFAULT 0,
     total_episodes INTEGER,
     total_seasons INTEGER,
     genres TEXT,  -- JSON string: "Drama,Thriller"
     tmdb_rating REAL,
+    episode_run_time INTEGER,  -- typical episode length in minutes
+    popularity REAL,  -- TMDb popularity, from details or the daily export
     external_ids TEXT,  -- JSON: {imdb_id, etc}
     cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Genres, normalized from TMDb show details (shows.genres keeps the
+-- display string)
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL COLLATE NOCASE
+);
+
+CREATE TABLE IF NOT EXISTS show_genres (
+    show_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    PRIMARY KEY(show_id, genre_id),
+    FOREIGN KEY(show_id) REFERENCES shows(id),
+    FOREIGN KEY(genre_id) REFERENCES genres(id)
+);
+
 -- User's shows (tracking)
 CREATE TABLE IF NOT EXISTS user_shows (
     id TEXT PRIMARY KEY,
@@ -33,6 +53,11 @@ CREATE TABLE IF NOT EXISTS user_shows (
     status TEXT DEFAULT 'watching',  -- watching, completed, dropped, paused
     favorite BOOLEAN DEFAULT 0,
     added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Kept in step with episodes_watched / shows so list filters and sorts
+    -- can be served from user_shows indexes alone. '' and 0 mean unknown,
+    -- which keeps the keyset comparisons NULL-free.
+    last_watched_at TIMESTAMP NOT NULL DEFAULT '',
+    show_rating REAL NOT NULL DEFAULT 0,  -- copy of shows.tmdb_rating
     UNIQUE(user_id, show_id),
     FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY(show_id) REFERENCES shows(id)
@@ -46,12 +71,124 @@ CREATE TABLE IF NOT EXISTS episodes_watched (
     season INTEGER NOT NULL,
     episode INTEGER NOT NULL,
     watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Minutes and genres ("Drama,Crime") this watch added to the stats
+    -- rollups; unwatching takes back exactly these
+    credited_minutes INTEGER NOT NULL DEFAULT 0,
+    credited_genres TEXT NOT NULL DEFAULT '',
     UNIQUE(user_id, show_id, season, episode),
     FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY(show_id) REFERENCES shows(id)
 );
 
+-- Episode metadata (cached from TMDb season responses)
+CREATE TABLE IF NOT EXISTS show_episodes (
+    show_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    episode INTEGER NOT NULL,
+    name TEXT,
+    air_date TEXT,
+    runtime INTEGER,
+    PRIMARY KEY(show_id, season, episode),
+    FOREIGN KEY(show_id) REFERENCES shows(id)
+);
+
+-- Next unwatched episode per tracked show (NULL season/episode = caught up)
+CREATE TABLE IF NOT EXISTS user_up_next (
+    user_id TEXT NOT NULL,
+    show_id INTEGER NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(user_id, show_id),
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY(show_id) REFERENCES shows(id)
+);
+
+-- Per-user change counter, bumped in the same transaction as every write
+-- to user_shows / episodes_watched. Caches and ETags key on it.
+-- sync_floor: oldest version /api/sync can serve deltas from (tombstones
+-- up to it have been compacted away).
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    sync_floor INTEGER NOT NULL DEFAULT 0
+);
+
+-- Append-only log of user_shows / episodes_watched changes for delta sync.
+-- entity is 'show' or 'episode' (season/episode are NULL for shows), op is
+-- 'upsert' or 'delete'. Compaction keeps only the latest entry per key.
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    entity TEXT NOT NULL,
+    op TEXT NOT NULL,
+    show_id INTEGER NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Idempotency keys of applied episode mutations (pruned after a day)
+CREATE TABLE IF NOT EXISTS mutation_keys (
+    user_id TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    applied BOOLEAN NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(user_id, idempotency_key)
+);
+
+-- Watch statistics rollups, maintained incrementally on every mark/unmark
+-- (stats/models.py) and rebuilt from history by `python -m stats.rebuild`.
+-- Minutes come from show_episodes.runtime (0 when unknown), as credited
+-- on episodes_watched when the episode was marked.
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    episodes INTEGER NOT NULL DEFAULT 0,
+    minutes INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_stats_monthly (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,  -- YYYY-MM (UTC) of watched_at
+    episodes INTEGER NOT NULL DEFAULT 0,
+    minutes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY(user_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS user_stats_genre (
+    user_id TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    episodes INTEGER NOT NULL DEFAULT 0,
+    minutes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY(user_id, genre)
+);
+
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_user_shows_user_id ON user_shows(user_id);
 CREATE INDEX IF NOT EXISTS idx_episodes_user ON episodes_watched(user_id, show_id);
 CREATE INDEX IF NOT EXISTS idx_shows_title ON shows(title);
+CREATE INDEX IF NOT EXISTS idx_user_shows_show ON user_shows(show_id);
+
+-- Covering indexes for keyset-paginated list reads
+CREATE INDEX IF NOT EXISTS idx_user_shows_user_added
+    ON user_shows(user_id, added_at DESC, id DESC, show_id, status, favorite);
+CREATE INDEX IF NOT EXISTS idx_episodes_user_show_order
+    ON episodes_watched(user_id, show_id, season, episode, watched_at, id);
+
+-- Filtered and sorted variants of the user show list
+CREATE INDEX IF NOT EXISTS idx_user_shows_user_status
+    ON user_shows(user_id, status, added_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_user_shows_user_favorite
+    ON user_shows(user_id, added_at DESC, id DESC) WHERE favorite = 1;
+CREATE INDEX IF NOT EXISTS idx_user_shows_user_watched
+    ON user_shows(user_id, last_watched_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_user_shows_user_rating
+    ON user_shows(user_id, show_rating DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_show_genres_genre ON show_genres(genre_id, show_id);
+
+-- Catalog entries loaded from the TMDb export but not fetched in detail yet
+CREATE INDEX IF NOT EXISTS idx_shows_catalog_pending
+    ON shows(popularity DESC, id DESC) WHERE cached_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_change_log_user_version ON change_log(user_id, version);
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 
 
@@ -114,6 +114,15 @@ class MarkEpisodesRequest(BaseModel):
     episodes: List[EpisodeWatchedBase]  # list of season/episode pairs
 
 
+class EpisodeMutation(EpisodeWatchedBase):
+    op: Literal["mark", "unmark"]
+    idempotency_key: Optional[str] = None  # client-generated, e.g. a UUID
+
+
+class EpisodeMutationsRequest(BaseModel):
+    operations: List[EpisodeMutation]
+
+
 class ShowProgress(BaseModel):
     show_id: int
     title: str
@@ -0,0 +1,148 @@
+"""
+Seed the shows catalog from TMDb's daily ID export and fill in details.
+
+    python -m shows.catalog load tv_series_ids_MM_DD_YYYY.json.gz
+    python -m shows.catalog enrich --limit 500
+
+`load` streams the gzipped NDJSON export into stub rows (id, title,
+popularity) in large transactions, holding one batch in memory at a time.
+`enrich` fetches details for the most popular stubs through TMDbClient,
+paced by the background request budget. Enriched rows leave the pending
+set, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from database import execute, execute_batch, fetch_all, init_db, transaction
+from shows.models import cache_show_from_tmdb
+from shows.scheduler import RequestBudget
+from shows.tmdb_client import TMDbClient, tmdb_client
+
+logger = logging.getLogger(__name__)
+
+# Rows written per transaction while loading an export
+LOAD_BATCH_SIZE = 10000
+
+
+def read_export(path: str) -> Iterator[Tuple[int, str, float]]:
+    """
+    Yield (id, title, popularity) for each show in a TMDb ID export,
+    gzipped or plain NDJSON. Adult entries and malformed lines are skipped.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                show_id = int(entry["id"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping malformed export line %d", line_number)
+                continue
+            if entry.get("adult"):
+                continue
+            title = entry.get("original_name") or entry.get("name") or "Unknown"
+            yield show_id, title, float(entry.get("popularity") or 0)
+
+
+def load_export(path: str, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """Upsert every show in an export as a catalog stub. Returns rows loaded."""
+    loaded = 0
+    batch: List[Tuple[int, str, float]] = []
+    for row in read_export(path):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            loaded += _write_batch(batch)
+            batch = []
+    if batch:
+        loaded += _write_batch(batch)
+    return loaded
+
+
+def _write_batch(batch: List[Tuple[int, str, float]]) -> int:
+    with transaction() as conn:
+        execute_batch("shows.catalog_upsert", batch, conn=conn)
+    return len(batch)
+
+
+def _is_not_found(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 404
+
+
+async def enrich_catalog(
+    limit: int = 100,
+    client: TMDbClient = tmdb_client,
+    budget: Optional[RequestBudget] = None,
+    concurrency: int = 4,
+) -> Dict[str, int]:
+    """
+    Fetch TMDb details for up to `limit` of the most popular catalog stubs.
+    Stubs TMDb no longer knows are deleted; other failures are left for
+    the next run. Returns counts of enriched, missing and failed shows.
+    """
+    budget = budget or RequestBudget(settings.TMDB_BACKGROUND_REQUESTS_PER_MINUTE)
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"enriched": 0, "missing": 0, "failed": 0}
+
+    async def enrich(show_id: int) -> None:
+        async with semaphore:
+            await budget.acquire()
+            try:
+                details = await client.get_show_details(show_id, use_cache=False)
+            except Exception as e:
+                if _is_not_found(e):
+                    execute("shows.catalog_delete_stub", (show_id,))
+                    counts["missing"] += 1
+                else:
+                    logger.warning("Enriching show %s failed: %s", show_id, e)
+                    counts["failed"] += 1
+                return
+            cache_show_from_tmdb(details)
+            counts["enriched"] += 1
+
+    # Walk the pending set by cursor so failures don't stall the run
+    cursor = (float("inf"), 0)
+    remaining = limit
+    while remaining > 0:
+        rows = fetch_all("shows.catalog_pending", (*cursor, min(remaining, 100)))
+        if not rows:
+            break
+        cursor = (rows[-1]["popularity"], rows[-1]["id"])
+        remaining -= len(rows)
+        await asyncio.gather(*(enrich(row["id"]) for row in rows))
+    return counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="Load a TMDb daily ID export")
+    load.add_argument("path", help="Export file (.json.gz or NDJSON)")
+    load.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+    enrich = commands.add_parser("enrich", help="Fetch details for popular stubs")
+    enrich.add_argument("--limit", type=int, default=100)
+    enrich.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.command == "load":
+        count = load_export(args.path, args.batch_size)
+        print(f"Loaded {count} show(s)")
+    else:
+        counts = asyncio.run(enrich_catalog(args.limit, concurrency=args.concurrency))
+        print(
+            f"Enriched {counts['enriched']} show(s), "
+            f"removed {counts['missing']}, failed {counts['failed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
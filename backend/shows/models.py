@@ -1,8 +1,61 @@
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
-from database import execute_query, execute_write, row_to_dict, rows_to_dicts
+from database import (
+    execute,
+    execute_batch,
+    fetch_all,
+    fetch_all_shards,
+    fetch_one,
+    get_connection,
+    row_to_dict,
+    rows_to_dicts,
+    shards,
+    transaction,
+)
+from episodes.models import refresh_last_watched, refresh_up_next
+from pagination import decode_cursor, encode_cursor, select_columns
+from sync.models import record_changes, show_change
+
+# Fields a client may request from the user show list, mapped to SQL columns.
+USER_SHOW_FIELDS = {
+    "id": "us.id",
+    "user_id": "us.user_id",
+    "show_id": "us.show_id",
+    "status": "us.status",
+    "favorite": "us.favorite",
+    "added_at": "us.added_at",
+    "title": "s.title",
+    "poster_path": "s.poster_path",
+    "total_episodes": "s.total_episodes",
+    "total_seasons": "s.total_seasons",
+    "tmdb_rating": "s.tmdb_rating",
+    "genres": "s.genres",
+    "episode_run_time": "s.episode_run_time",
+    "last_watched_at": "NULLIF(us.last_watched_at, '')",
+}
+
+# Sort orders for the user show list: (first page query, later pages query)
+USER_SHOW_SORTS = {
+    "added": ("user_shows.page", "user_shows.page_after"),
+    "watched": ("user_shows.page_by_watched", "user_shows.page_by_watched_after"),
+    "rating": ("user_shows.page_by_rating", "user_shows.page_by_rating_after"),
+}
+
+# Filters for the user show list, spliced into the {filters} slot of the
+# page queries. Favorite is a literal so idx_user_shows_user_favorite
+# (a partial index) can serve it.
+USER_SHOW_FILTERS = {
+    "status": " AND us.status = ?",
+    "favorite": " AND us.favorite = 1",
+    "not_favorite": " AND us.favorite = 0",
+    "genre": (
+        " AND EXISTS (SELECT 1 FROM show_genres sg JOIN genres g ON g.id = sg.genre_id"
+        " WHERE sg.show_id = us.show_id AND g.name = ?)"
+    ),
+    "min_rating": " AND us.show_rating >= ?",
+}
 
 
 def cache_show_from_tmdb(tmdb_data: Dict[str, Any]) -> int:
@@ -16,6 +69,10 @@ def cache_show_from_tmdb(tmdb_data: Dict[str, Any]) -> int:
     poster_path = tmdb_data.get("poster_path")
     backdrop_path = tmdb_data.get("backdrop_path")
     first_air_date = tmdb_data.get("first_air_date")
+    last_air_date = tmdb_data.get("last_air_date")
+    next_episode = tmdb_data.get("next_episode_to_air") or {}
+    next_air_date = next_episode.get("air_date")
+    in_production = bool(tmdb_data.get("in_production", False))
 
     # Handle total episodes/seasons
     total_episodes = tmdb_data.get("number_of_episodes")
@@ -25,69 +82,155 @@ def cache_show_from_tmdb(tmdb_data: Dict[str, Any]) -> int:
     genres_raw = tmdb_data.get("genres", [])
     if isinstance(genres_raw, list) and genres_raw:
         if isinstance(genres_raw[0], dict):
-            genres = ",".join(g.get("name", "") for g in genres_raw)
+            genre_names = [g.get("name", "") for g in genres_raw]
         else:
-            genres = ",".join(str(g) for g in genres_raw)
+            genre_names = [str(g) for g in genres_raw]
     else:
-        genres = ""
+        genre_names = []
+    genres = ",".join(genre_names)
 
     tmdb_rating = tmdb_data.get("vote_average")
+    # TMDb lists every distinct episode length; keep the typical one
+    run_times = [t for t in tmdb_data.get("episode_run_time") or [] if t]
+    episode_run_time = round(sum(run_times) / len(run_times)) if run_times else None
+    popularity = tmdb_data.get("popularity")
+    listed = (title, poster_path, total_episodes, total_seasons, genres, tmdb_rating, episode_run_time)
 
-    # Check if show already cached
-    existing = execute_query("SELECT id FROM shows WHERE id = ?", (show_id,))
-    if existing:
-        # Update existing cache
-        execute_write(
-            """
-            UPDATE shows
-            SET title = ?, overview = ?, poster_path = ?, backdrop_path = ?,
-                first_air_date = ?, total_episodes = ?, total_seasons = ?,
-                genres = ?, tmdb_rating = ?, cached_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-            """,
+    with transaction() as conn:
+        previous = fetch_one("shows.listed_fields", (show_id,), conn=conn)
+        _store_show(
+            conn,
+            show_id,
             (
                 title,
                 overview,
                 poster_path,
                 backdrop_path,
                 first_air_date,
+                last_air_date,
+                next_air_date,
+                in_production,
                 total_episodes,
                 total_seasons,
                 genres,
                 tmdb_rating,
-                show_id,
+                episode_run_time,
+                popularity,
             ),
         )
+        _store_show_genres(conn, show_id, genre_names)
+    if previous is not None and tuple(previous) == listed:
+        return show_id
+
+    # Trackers' lists, dashboards and progress embed these fields, so each
+    # tracker gets a show upsert in the change log (moving data_version, the
+    # cache key and ETag, and reaching delta sync clients). The rating
+    # copies sit with the trackers' other rows, on every shard.
+    rating = tmdb_rating or 0
+    for shard in _shards_matching("user_shows.tracked", (show_id,)):
+        with transaction(shard=shard) as conn:
+            execute("user_shows.sync_rating", (rating, show_id, rating), conn=conn)
+            for row in fetch_all("user_shows.trackers", (show_id,), conn=conn):
+                record_changes(conn, row["user_id"], [show_change("upsert", show_id)])
+
+    return show_id
+
+
+def _shards_matching(name: str, params: tuple) -> List[int]:
+    """
+    Shards where a registered SELECT finds a row. Checked with plain reads,
+    so shards with nothing to update never have their write lock taken.
+    """
+    matching = []
+    for shard in shards():
+        with get_connection(shard=shard) as conn:
+            if fetch_one(name, params, conn=conn):
+                matching.append(shard)
+    return matching
+
+
+def _store_show(conn, show_id: int, values: tuple) -> None:
+    """Insert or update a cached show row; values follow the shows.update order."""
+    # Check if show already cached
+    existing = fetch_one("shows.exists", (show_id,), conn=conn)
+    if existing:
+        # Update existing cache
+        execute("shows.update", (*values, show_id), conn=conn)
     else:
         # Insert new show
-        execute_write(
-            """
-            INSERT INTO shows
-            (id, title, overview, poster_path, backdrop_path, first_air_date,
-             total_episodes, total_seasons, genres, tmdb_rating)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                show_id,
-                title,
-                overview,
-                poster_path,
-                backdrop_path,
-                first_air_date,
-                total_episodes,
-                total_seasons,
-                genres,
-                tmdb_rating,
-            ),
+        execute("shows.insert", (show_id, *values), conn=conn)
+
+
+def _store_show_genres(conn, show_id: int, names: List[str]) -> None:
+    """Replace a show's rows in show_genres, creating unseen genres."""
+    names = [name.strip() for name in names if name and name.strip()]
+    execute("show_genres.clear", (show_id,), conn=conn)
+    execute_batch("genres.upsert", [(name,) for name in names], conn=conn)
+    execute_batch("show_genres.insert", [(show_id, name) for name in names], conn=conn)
+
+
+def backfill_show_metadata(conn) -> None:
+    """
+    Fill show_genres and the user_shows sort keys on a database created
+    before they existed. Runs once, from init_db.
+    """
+    for show_id, genres in conn.execute("SELECT id, genres FROM shows WHERE genres != ''"):
+        _store_show_genres(conn, show_id, genres.split(","))
+    conn.execute(
+        """
+        UPDATE user_shows
+        SET show_rating = COALESCE(
+                (SELECT tmdb_rating FROM shows WHERE id = user_shows.show_id), 0),
+            last_watched_at = COALESCE(
+                (SELECT MAX(watched_at) FROM episodes_watched ew
+                 WHERE ew.user_id = user_shows.user_id AND ew.show_id = user_shows.show_id),
+                '')
+        """
+    )
+
+
+def cache_season_from_tmdb(show_id: int, season_data: Dict[str, Any]) -> int:
+    """
+    Cache episode metadata from a TMDb season response and refresh the
+    up-next entries of every user tracking the show.
+    Returns the number of episodes cached.
+    """
+    season_number = season_data.get("season_number")
+    params_list = [
+        (
+            show_id,
+            ep.get("season_number", season_number),
+            ep["episode_number"],
+            ep.get("name"),
+            ep.get("air_date"),
+            ep.get("runtime"),
         )
+        for ep in season_data.get("episodes", [])
+        if "episode_number" in ep
+    ]
+    if not params_list:
+        return 0
 
-    return show_id
+    with transaction() as conn:
+        execute_batch("show_episodes.upsert", params_list, conn=conn)
+    # Committed first, so each shard's catalog view has the new episodes
+    for shard in _shards_matching("user_shows.tracked", (show_id,)):
+        with transaction(shard=shard) as conn:
+            trackers = fetch_all("user_shows.trackers", (show_id,), conn=conn)
+            for row in trackers:
+                refresh_up_next(conn, row["user_id"], show_id)
+                record_changes(conn, row["user_id"], [show_change("upsert", show_id)])
+    return len(params_list)
 
 
 def get_cached_show(show_id: int) -> Optional[Dict[str, Any]]:
     """Get a show from local cache by ID."""
-    rows = execute_query("SELECT * FROM shows WHERE id = ?", (show_id,))
-    return row_to_dict(rows[0]) if rows else None
+    return row_to_dict(fetch_one("shows.get", (show_id,)))
+
+
+def is_show_tracked(user_id: str, show_id: int) -> bool:
+    """Check whether a show is in the user's tracking list."""
+    return fetch_one("user_shows.is_tracked", (user_id, show_id), user_id=user_id) is not None
 
 
 def is_cache_stale(cached_at: str, max_age_days: int = 7) -> bool:
@@ -102,19 +245,114 @@ def is_cache_stale(cached_at: str, max_age_days: int = 7) -> bool:
         return True
 
 
+def get_shows_to_refresh(
+    limit: int = 50,
+    stale_after_hours: int = 6,
+    window_days: int = 7,
+) -> List[Dict[str, Any]]:
+    """
+    Get tracked shows with recent or upcoming air dates whose cache is
+    older than stale_after_hours, most-tracked first. With several
+    shards, trackers are summed over each shard's top `limit` shows.
+    """
+    rows = fetch_all_shards(
+        "shows.to_refresh",
+        (
+            f"+{window_days} day",
+            f"-{window_days} day",
+            f"-{stale_after_hours} hour",
+            limit,
+        ),
+    )
+    shows: Dict[int, Dict[str, Any]] = {}
+    for row in rows_to_dicts(rows):
+        if row["id"] in shows:
+            shows[row["id"]]["trackers"] += row["trackers"]
+        else:
+            shows[row["id"]] = row
+    return sorted(shows.values(), key=lambda show: -show["trackers"])[:limit]
+
+
 def get_user_shows(user_id: str) -> list:
     """Get all shows a user is tracking."""
-    rows = execute_query(
-        """
-        SELECT us.*, s.title, s.poster_path, s.total_episodes, s.total_seasons, s.tmdb_rating
-        FROM user_shows us
-        JOIN shows s ON us.show_id = s.id
-        WHERE us.user_id = ?
-        ORDER BY us.added_at DESC
-        """,
-        (user_id,),
-    )
-    return rows_to_dicts(rows)
+    return get_user_shows_page(user_id)["shows"]
+
+
+def _list_filters(
+    status: Optional[str] = None,
+    favorite: Optional[bool] = None,
+    genre: Optional[str] = None,
+    min_rating: Optional[float] = None,
+) -> Tuple[str, tuple]:
+    """Build the {filters} fragment and its parameters for the page queries."""
+    clauses, params = [], []
+    if status is not None:
+        clauses.append(USER_SHOW_FILTERS["status"])
+        params.append(status)
+    if favorite is not None:
+        clauses.append(USER_SHOW_FILTERS["favorite" if favorite else "not_favorite"])
+    if genre is not None:
+        clauses.append(USER_SHOW_FILTERS["genre"])
+        params.append(genre)
+    if min_rating is not None:
+        clauses.append(USER_SHOW_FILTERS["min_rating"])
+        params.append(min_rating)
+    return "".join(clauses), tuple(params)
+
+
+def get_user_shows_page(
+    user_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    sort: str = "added",
+    status: Optional[str] = None,
+    favorite: Optional[bool] = None,
+    genre: Optional[str] = None,
+    min_rating: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Get one page of a user's tracked shows, optionally filtered.
+    sort is "added" (newest first), "watched" (most recently watched
+    first, never-watched last) or "rating" (highest TMDb rating first).
+    Uses keyset pagination on (sort key, id); pass the returned
+    next_cursor with the same sort and filters to fetch the following
+    page. Raises ValueError for an unknown sort or fields, or a
+    malformed cursor.
+    """
+    if sort not in USER_SHOW_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    first_query, after_query = USER_SHOW_SORTS[sort]
+    columns = ", ".join(select_columns(fields, USER_SHOW_FIELDS))
+    filters, filter_params = _list_filters(status, favorite, genre, min_rating)
+    # Fetch one extra row to learn whether another page follows
+    page_size = limit + 1 if limit else -1
+    if cursor:
+        key, last_id = decode_cursor(cursor, 2)
+        rows = fetch_all(
+            after_query,
+            (user_id, *filter_params, key, last_id, page_size),
+            user_id=user_id,
+            columns=columns,
+            filters=filters,
+        )
+    else:
+        rows = fetch_all(
+            first_query,
+            (user_id, *filter_params, page_size),
+            user_id=user_id,
+            columns=columns,
+            filters=filters,
+        )
+
+    shows = rows_to_dicts(rows)
+    next_cursor = None
+    if limit and len(shows) > limit:
+        shows = shows[:limit]
+        next_cursor = encode_cursor([shows[-1]["_cursor_key"], shows[-1]["_cursor_id"]])
+    for show in shows:
+        del show["_cursor_key"], show["_cursor_id"]
+    return {"shows": shows, "next_cursor": next_cursor}
 
 
 def add_show_to_user(
@@ -130,36 +368,32 @@ def add_show_to_user(
     import uuid
 
     user_show_id = str(uuid.uuid4())
-    execute_write(
-        """
-        INSERT OR REPLACE INTO user_shows (id, user_id, show_id, status, favorite)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (user_show_id, user_id, show_id, status, favorite),
-    )
+    with transaction(user_id) as conn:
+        execute(
+            "user_shows.add",
+            (user_show_id, user_id, show_id, status, favorite, show_id),
+            conn=conn,
+        )
+        refresh_up_next(conn, user_id, show_id)
+        refresh_last_watched(conn, user_id, show_id)
+        record_changes(conn, user_id, [show_change("upsert", show_id)])
     return user_show_id
 
 
 def update_user_show_status(user_id: str, show_id: int, status: str) -> bool:
     """Update the status of a user's show."""
-    result = execute_write(
-        """
-        UPDATE user_shows
-        SET status = ?
-        WHERE user_id = ? AND show_id = ?
-        """,
-        (status, user_id, show_id),
-    )
-    return result > 0
+    with transaction(user_id) as conn:
+        cursor = execute("user_shows.update_status", (status, user_id, show_id), conn=conn)
+        if cursor.rowcount:
+            record_changes(conn, user_id, [show_change("upsert", show_id)])
+    return cursor.rowcount > 0
 
 
 def remove_show_from_user(user_id: str, show_id: int) -> bool:
     """Remove a show from user's tracking list."""
-    result = execute_write(
-        """
-        DELETE FROM user_shows
-        WHERE user_id = ? AND show_id = ?
-        """,
-        (user_id, show_id),
-    )
-    return result > 0
+    with transaction(user_id) as conn:
+        cursor = execute("user_shows.remove", (user_id, show_id), conn=conn)
+        if cursor.rowcount:
+            execute("user_up_next.delete", (user_id, show_id), conn=conn)
+            record_changes(conn, user_id, [show_change("delete", show_id)])
+    return cursor.rowcount > 0
@@ -1,14 +1,24 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends
+import asyncio
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 
 from schemas import ShowSearchResponse, ShowSearchResult, UserShowCreate
 from auth.jwt_handler import get_current_user_id
-from shows.tmdb_client import tmdb_client
+from cache import CacheEntry, TTLCache, TwoTierCache
+from compression import PrecompressedPayload
+from config import settings
+from database import get_data_version
+from episodes.models import get_watched_episodes_set
+from http_cache import etag_headers, not_modified, version_etag
+from pagination import parse_fields
+from shows.tmdb_client import DETAILS_TTL, tmdb_client
 from shows.models import (
     cache_show_from_tmdb,
+    cache_season_from_tmdb,
     get_cached_show,
+    is_show_tracked,
     is_cache_stale,
-    get_user_shows,
+    get_user_shows_page,
     add_show_to_user,
     update_user_show_status,
     remove_show_from_user,
@@ -16,6 +26,40 @@ from shows.models import (
 
 router = APIRouter()
 
+# Serialized (and precompressed) bodies of hot read-only responses
+payload_cache = TwoTierCache(
+    "payloads",
+    maxsize=512,
+    ttl=10 * 60,
+    dumps=PrecompressedPayload.to_bytes,
+    loads=PrecompressedPayload.from_bytes,
+    # The packed form is the payload's bytes, so it is its size in memory
+    size_factor=1.0,
+)
+
+
+# Seasons whose episodes were written to show_episodes recently
+stored_seasons = TTLCache(maxsize=4096, ttl=DETAILS_TTL)
+
+
+def _cache_payload(entry: CacheEntry, content) -> PrecompressedPayload:
+    payload = PrecompressedPayload(content, minimum_size=settings.COMPRESSION_MIN_SIZE)
+    entry.set(payload)
+    return payload
+
+
+async def _fetch_season(show_id: int, season_number: int) -> Dict[str, Any]:
+    """
+    Fetch a season from TMDb and persist its episode metadata, at most
+    once per DETAILS_TTL, if the show itself is cached.
+    """
+    data = await tmdb_client.get_season_details(show_id, season_number)
+    key = (show_id, season_number)
+    if key not in stored_seasons and get_cached_show(show_id):
+        cache_season_from_tmdb(show_id, data)
+        stored_seasons.set(key, True)
+    return data
+
 
 @router.get("/search", response_model=ShowSearchResponse)
 async def search_shows(
@@ -51,32 +95,42 @@ async def search_shows(
 
 @router.get("/trending")
 async def get_trending_shows(
+    request: Request,
     time_window: str = Query("week", regex="^(day|week)$"),
 ):
     """Get trending TV shows."""
-    try:
-        shows = await tmdb_client.get_trending_shows(time_window=time_window)
-        return {"results": shows}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"TMDb API error: {str(e)}")
+    entry = payload_cache.entry(f"trending:{time_window}")
+    payload = entry.get()
+    if payload is None:
+        try:
+            shows = await tmdb_client.get_trending_shows(time_window=time_window)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"TMDb API error: {str(e)}")
+        payload = _cache_payload(entry, {"results": shows})
+    return payload.response(request)
 
 
 @router.get("/{show_id}")
-async def get_show_details(show_id: int):
+async def get_show_details(request: Request, show_id: int):
     """
     Get detailed information about a TV show.
     Uses cached data if available and fresh, otherwise fetches from TMDb.
     """
+    entry = payload_cache.entry(f"show:{show_id}")
+    payload = entry.get()
+    if payload is not None:
+        return payload.response(request)
+
     # Check cache first
     cached = get_cached_show(show_id)
     if cached and not is_cache_stale(cached.get("cached_at", "")):
-        return cached
+        return _cache_payload(entry, cached).response(request)
 
     # Fetch from TMDb
     try:
         data = await tmdb_client.get_show_details(show_id)
         cache_show_from_tmdb(data)
-        return data
+        return _cache_payload(entry, data).response(request)
     except Exception as e:
         # If TMDb fails but we have stale cache, return it
         if cached:
@@ -85,13 +139,91 @@ async def get_show_details(show_id: int):
 
 
 @router.get("/{show_id}/seasons/{season_number}")
-async def get_season_details(show_id: int, season_number: int):
+async def get_season_details(request: Request, show_id: int, season_number: int):
     """Get details about a specific season including all episodes."""
+    entry = payload_cache.entry(f"season:{show_id}:{season_number}")
+    payload = entry.get()
+    if payload is not None:
+        return payload.response(request)
+
     try:
-        data = await tmdb_client.get_season_details(show_id, season_number)
-        return data
+        data = await _fetch_season(show_id, season_number)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Season not found: {str(e)}")
+    return _cache_payload(entry, data).response(request)
+
+
+@router.get("/{show_id}/full")
+async def get_show_full(
+    show_id: int,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get show details, every season's episodes and the user's watched
+    flags in one response. Seasons are fetched concurrently, at most
+    SHOW_FULL_SEASON_CONCURRENCY at a time.
+    """
+    watched_task = asyncio.create_task(
+        asyncio.to_thread(get_watched_episodes_set, user_id, show_id)
+    )
+    in_list_task = asyncio.create_task(
+        asyncio.to_thread(is_show_tracked, user_id, show_id)
+    )
+
+    try:
+        details = await tmdb_client.get_show_details(show_id)
+    except Exception as e:
+        watched_task.cancel()
+        in_list_task.cancel()
+        raise HTTPException(status_code=404, detail=f"Show not found: {str(e)}")
+    if not get_cached_show(show_id):
+        cache_show_from_tmdb(details)
+
+    season_numbers = [
+        s["season_number"]
+        for s in details.get("seasons", [])
+        if s.get("season_number", 0) > 0
+    ]
+    semaphore = asyncio.Semaphore(settings.SHOW_FULL_SEASON_CONCURRENCY)
+
+    async def load_season(season_number: int) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await _fetch_season(show_id, season_number)
+            except Exception:
+                return None
+
+    seasons_data = await asyncio.gather(*(load_season(n) for n in season_numbers))
+    watched = await watched_task
+    in_list = await in_list_task
+
+    seasons = []
+    for season_number, data in zip(season_numbers, seasons_data):
+        if data is None:
+            continue
+        seasons.append({
+            "season_number": season_number,
+            "name": data.get("name"),
+            "air_date": data.get("air_date"),
+            "episodes": [
+                {
+                    "episode_number": ep["episode_number"],
+                    "name": ep.get("name"),
+                    "air_date": ep.get("air_date"),
+                    "runtime": ep.get("runtime"),
+                    "watched": (season_number, ep["episode_number"]) in watched,
+                }
+                for ep in data.get("episodes", [])
+                if "episode_number" in ep
+            ],
+        })
+
+    return {
+        "show": details,
+        "in_list": in_list,
+        "watched_count": len(watched),
+        "seasons": seasons,
+    }
 
 
 @router.post("/add")
@@ -126,10 +258,46 @@ async def add_show_to_list(
 
 
 @router.get("/user/list")
-async def get_user_show_list(user_id: str = Depends(get_current_user_id)):
-    """Get all shows the authenticated user is tracking."""
-    shows = get_user_shows(user_id)
-    return {"shows": shows}
+async def get_user_show_list(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields"),
+    sort: str = Query("added", regex="^(added|watched|rating)$"),
+    status: Optional[str] = Query(None, regex="^(watching|completed|dropped|paused)$"),
+    favorite: Optional[bool] = Query(None),
+    genre: Optional[str] = Query(None, description="Genre name, e.g. Drama"),
+    min_rating: Optional[float] = Query(None, ge=0, le=10),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get the shows the authenticated user is tracking, newest first by
+    default, or by most recently watched or rating, optionally filtered.
+    Without a limit all shows are returned in a single page. version can
+    be passed to /api/sync to pull later changes.
+    """
+    version = get_data_version(user_id)
+    etag = version_etag(version)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        page = get_user_shows_page(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+            sort=sort,
+            status=status,
+            favorite=favorite,
+            genre=genre,
+            min_rating=min_rating,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers.update(etag_headers(etag))
+    return {**page, "version": version}
 
 
 @router.patch("/{show_id}/status")
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+from images.models import prefetch_tracked_posters
+from shows.models import cache_season_from_tmdb, cache_show_from_tmdb, get_shows_to_refresh
+from shows.tmdb_client import TMDbClient, tmdb_client
+
+logger = logging.getLogger(__name__)
+
+
+class RequestBudget:
+    """
+    Token bucket limiting how many TMDb requests background work may make.
+    Tokens refill continuously at requests_per_minute.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.capacity = max(1, requests_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available without waiting."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RefreshScheduler:
+    """
+    Periodically refreshes airing shows and trending lists from TMDb so
+    that user requests find warm caches.
+
+    Each run refreshes the trending lists, then the most-tracked shows
+    with recent or upcoming air dates, then downloads posters of tracked
+    shows missing from the image cache. Work is spread out by a random
+    start delay per show, bounded by max_concurrency and charged against
+    a shared RequestBudget.
+    """
+
+    def __init__(
+        self,
+        client: TMDbClient = tmdb_client,
+        interval: float = 900.0,
+        jitter: float = 30.0,
+        max_concurrency: int = 4,
+        batch_size: int = 50,
+        budget: Optional[RequestBudget] = None,
+    ):
+        self.client = client
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.budget = budget or RequestBudget(120)
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "RefreshScheduler":
+        return cls(
+            interval=settings.SCHEDULER_INTERVAL_SECONDS,
+            jitter=settings.SCHEDULER_JITTER_SECONDS,
+            max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+            batch_size=settings.SCHEDULER_BATCH_SIZE,
+            budget=RequestBudget(settings.TMDB_BACKGROUND_REQUESTS_PER_MINUTE),
+        )
+
+    def start(self) -> None:
+        """Start the refresh loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop and wait for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        # Stagger the first run so workers booting together don't align.
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Background refresh failed")
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run one refresh pass. Returns counts of refreshed items."""
+        refreshed_trending = 0
+        for time_window in ("day", "week"):
+            await self.budget.acquire()
+            try:
+                await self.client.get_trending_shows(time_window, use_cache=False)
+                refreshed_trending += 1
+            except Exception as e:
+                logger.warning("Trending refresh (%s) failed: %s", time_window, e)
+
+        shows = get_shows_to_refresh(limit=self.batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def refresh(show: Dict[str, Any]) -> bool:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+            async with semaphore:
+                return await self.refresh_show(show["id"])
+
+        results = await asyncio.gather(*(refresh(show) for show in shows))
+        posters = await prefetch_tracked_posters(limit=self.batch_size, budget=self.budget)
+        return {"trending": refreshed_trending, "shows": sum(results), "posters": posters}
+
+    async def refresh_show(self, show_id: int) -> bool:
+        """Refresh a show's details and its latest season. Returns success."""
+        try:
+            await self.budget.acquire()
+            details = await self.client.get_show_details(show_id, use_cache=False)
+            cache_show_from_tmdb(details)
+
+            latest_season = details.get("number_of_seasons")
+            if latest_season:
+                await self.budget.acquire()
+                season = await self.client.get_season_details(
+                    show_id, latest_season, use_cache=False
+                )
+                cache_season_from_tmdb(show_id, season)
+            return True
+        except Exception as e:
+            logger.warning("Refresh of show %s failed: %s", show_id, e)
+            return False
+
+
+def acquire_leader_lock(path: str):
+    """
+    Try to become the single process (among workers on this host) that
+    runs background refresh. Returns the open lock file, which must stay
+    referenced while leading, or None if another process holds the lock.
+    """
+    lock_file = open(path, "a")
+    try:
+        import fcntl
+    except ImportError:  # not POSIX: assume a single process
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
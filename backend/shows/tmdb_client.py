@@ -1,8 +1,15 @@
-import httpx
 from typing import List, Dict, Any, Optional
+from urllib.parse import urlencode
 
+import tracing
+from cache import TwoTierCache
 from config import settings
 
+# Cache lifetimes (seconds) for TMDb responses
+SEARCH_TTL = 10 * 60
+DETAILS_TTL = 6 * 60 * 60
+TRENDING_TTL = 60 * 60
+
 
 class TMDbClient:
     """Client for The Movie Database (TMDb) API."""
@@ -10,8 +17,15 @@ class TMDbClient:
     BASE_URL = "https://api.themoviedb.org/3"
     IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
 
-    def __init__(self):
+    def __init__(self, transport=None):
         self.api_key = settings.TMDB_API_KEY
+        if transport is None and settings.TMDB_TRANSPORT:
+            from shows.tmdb_transport import transport_from_settings
+
+            transport = transport_from_settings()
+        # httpx transport for every request; None uses the network
+        self.transport = transport
+        self.cache = TwoTierCache("tmdb", maxsize=2048, ttl=DETAILS_TTL)
 
     def _get_headers(self) -> Dict[str, str]:
         return {
@@ -19,6 +33,44 @@ class TMDbClient:
             "User-Agent": "ShowTracker/0.1.0",
         }
 
+    async def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> Any:
+        """
+        GET a TMDb endpoint and return the decoded JSON body.
+        Responses are cached for `ttl` seconds; use_cache=False skips the
+        lookup but still stores the fresh response.
+        """
+        # Imported on first use to keep httpx out of cold-start import time
+        import httpx
+
+        params = params or {}
+        entry = self.cache.entry(f"{path}?{urlencode(sorted(params.items()))}")
+        if ttl and use_cache:
+            cached = entry.get()
+            if cached is not None:
+                return cached
+
+        attributes = {"http.method": "GET", "server.address": "api.themoviedb.org", "url.path": path}
+        with tracing.span("tmdb GET", tracing.CLIENT, attributes) as span:
+            async with httpx.AsyncClient(timeout=10.0, transport=self.transport) as client:
+                response = await client.get(
+                    f"{self.BASE_URL}{path}",
+                    params={"api_key": self.api_key, **params},
+                    headers=self._get_headers(),
+                )
+                span.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
+                data = response.json()
+
+        if ttl:
+            entry.set(data, ttl=ttl)
+        return data
+
     async def search_shows(
         self,
         query: str,
@@ -29,86 +81,62 @@ class TMDbClient:
         Search for TV shows by query.
         Returns paginated results with show metadata.
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/search/tv",
-                params={
-                    "api_key": self.api_key,
-                    "query": query,
-                    "page": page,
-                    "language": language,
-                },
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._get(
+            "/search/tv",
+            {"query": query, "page": page, "language": language},
+            ttl=SEARCH_TTL,
+        )
 
     async def get_show_details(
         self,
         show_id: int,
         language: str = "en-US",
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Get detailed information about a specific TV show.
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/tv/{show_id}",
-                params={
-                    "api_key": self.api_key,
-                    "language": language,
-                },
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._get(
+            f"/tv/{show_id}",
+            {"language": language},
+            ttl=DETAILS_TTL,
+            use_cache=use_cache,
+        )
 
     async def get_show_external_ids(self, show_id: int) -> Dict[str, Any]:
         """Get external IDs (IMDB, etc.) for a show."""
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/tv/{show_id}/external_ids",
-                params={"api_key": self.api_key},
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._get(f"/tv/{show_id}/external_ids", ttl=DETAILS_TTL)
 
     async def get_trending_shows(
         self,
         time_window: str = "week",
+        use_cache: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Get trending TV shows.
         time_window: 'day' or 'week'
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/trending/tv/{time_window}",
-                params={"api_key": self.api_key},
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json().get("results", [])
+        data = await self._get(
+            f"/trending/tv/{time_window}",
+            ttl=TRENDING_TTL,
+            use_cache=use_cache,
+        )
+        return data.get("results", [])
 
     async def get_season_details(
         self,
         show_id: int,
         season_number: int,
         language: str = "en-US",
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """Get details about a specific season including episodes."""
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{self.BASE_URL}/tv/{show_id}/season/{season_number}",
-                params={
-                    "api_key": self.api_key,
-                    "language": language,
-                },
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._get(
+            f"/tv/{show_id}/season/{season_number}",
+            {"language": language},
+            ttl=DETAILS_TTL,
+            use_cache=use_cache,
+        )
 
     @staticmethod
     def get_poster_url(poster_path: Optional[str], size: str = "w300") -> Optional[str]:
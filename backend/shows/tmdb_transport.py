@@ -0,0 +1,152 @@
+"""
+httpx transports that record TMDb responses to a corpus file and replay
+them without a network, for deterministic tests and benchmarks.
+
+A corpus is gzipped NDJSON, one response per line:
+{"key": "GET /3/tv/1399?language=en-US", "status": 200, "body": "..."}.
+The api_key parameter never enters the key or the file.
+"""
+import asyncio
+import gzip
+import json
+import random
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from config import settings
+
+# Body TMDb returns for unknown resources
+NOT_FOUND_BODY = json.dumps(
+    {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."}
+)
+
+
+def request_key(request: httpx.Request) -> str:
+    """Corpus key for a request: method, path and sorted query without api_key."""
+    params = sorted((k, v) for k, v in request.url.params.multi_items() if k != "api_key")
+    query = "&".join(f"{k}={v}" for k, v in params)
+    return f"{request.method} {request.url.path}" + (f"?{query}" if query else "")
+
+
+def load_corpus(path: Path) -> Dict[str, Tuple[int, str]]:
+    """Read a corpus into {key: (status, body)}; later lines win."""
+    corpus: Dict[str, Tuple[int, str]] = {}
+    if not path.exists():
+        return corpus
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                corpus[entry["key"]] = (entry["status"], entry["body"])
+    return corpus
+
+
+def _json_response(status: int, body: str, headers: Optional[dict] = None) -> httpx.Response:
+    return httpx.Response(
+        status,
+        headers={"content-type": "application/json;charset=utf-8", **(headers or {})},
+        content=body.encode(),
+    )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Passes requests to the network and appends each response to the
+    corpus. Rate-limit and server errors are not recorded.
+    """
+
+    def __init__(self, path: Path, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.path = path
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        # Concurrent appends must not interleave their gzip members
+        self._lock = threading.Lock()
+
+    def _append(self, entry: dict) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending adds a gzip member; readers see one continuous stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        body = (await response.aread()).decode()
+        await response.aclose()
+        if response.status_code != 429 and response.status_code < 500:
+            entry = {"key": request_key(request), "status": response.status_code, "body": body}
+            # File I/O off the event loop
+            await asyncio.to_thread(self._append, entry)
+        return _json_response(response.status_code, body)
+
+    async def aclose(self) -> None:
+        # TMDbClient opens an AsyncClient per request, and each one closes
+        # its transport on exit; keep the inner connection pool alive
+        pass
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Answers requests from a corpus. Each response is delayed by latency
+    plus up to jitter seconds. A rate_limit_rate share of responses are
+    429s and an error_rate share are 503s. Requests missing from the
+    corpus get TMDb's 404. Pass a seed for repeatable fault sequences.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.corpus = load_corpus(path)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return _json_response(429, '{"status_code": 25}', {"retry-after": "1"})
+        if roll < self.rate_limit_rate + self.error_rate:
+            return _json_response(503, '{"status_code": 11}')
+
+        status, body = self.corpus.get(request_key(request), (404, NOT_FOUND_BODY))
+        return _json_response(status, body)
+
+
+def _resolve_path(path: str) -> Path:
+    corpus = Path(path)
+    return corpus if corpus.is_absolute() else Path(__file__).parent.parent / corpus
+
+
+def transport_from_settings() -> Optional[httpx.AsyncBaseTransport]:
+    """The transport TMDB_TRANSPORT selects, or None for the plain network."""
+    mode = settings.TMDB_TRANSPORT
+    if not mode:
+        return None
+    path = _resolve_path(settings.TMDB_CORPUS_PATH)
+    if mode == "record":
+        return RecordingTransport(path)
+    if mode == "replay":
+        return ReplayTransport(
+            path,
+            latency=settings.TMDB_REPLAY_LATENCY_MS / 1000,
+            jitter=settings.TMDB_REPLAY_JITTER_MS / 1000,
+            error_rate=settings.TMDB_REPLAY_ERROR_RATE,
+            rate_limit_rate=settings.TMDB_REPLAY_RATE_LIMIT_RATE,
+        )
+    raise ValueError(f"Unknown TMDB_TRANSPORT: {mode!r}")
@@ -0,0 +1,55 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+
+class StartupProfiler:
+    """
+    Records how long each startup step takes and which modules it imported.
+    Steps are timed with `section`; report() summarises them slowest first.
+    For a per-module breakdown of a single step run `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def section(self, name: str):
+        """Time a startup step and record the modules it imported."""
+        modules_before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            imported = sorted(set(sys.modules) - modules_before)
+            self.sections.append({
+                "name": name,
+                "ms": round(elapsed * 1000, 2),
+                "modules_imported": len(imported),
+                "top_level_imports": sorted({m.split(".")[0] for m in imported}),
+            })
+
+    def report(self) -> Dict[str, Any]:
+        """Return total elapsed time and all sections, slowest first."""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "sections": sorted(self.sections, key=lambda s: s["ms"], reverse=True),
+        }
+
+    def format(self) -> str:
+        """Render the report as an aligned text table."""
+        report = self.report()
+        lines = [f"Startup took {report['total_ms']:.1f} ms"]
+        for s in report["sections"]:
+            lines.append(
+                f"  {s['ms']:>9.1f} ms  {s['name']:<24} "
+                f"{s['modules_imported']} modules ({', '.join(s['top_level_imports'][:6])})"
+            )
+        return "\n".join(lines)
+
+
+# Created at import time so main.py can time its own imports
+startup_profiler = StartupProfiler()
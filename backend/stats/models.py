@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import execute, execute_batch, fetch_all, fetch_one, rows_to_dicts, shards, transaction
+
+# (show_id, season, episode, watched_at); watched_at is None for "now".
+WatchEvent = Tuple[int, int, int, Optional[str]]
+# (watched_at, credited_minutes, credited_genres) of a removed episodes_watched
+# row, as returned by episodes_watched.unmark
+RemovedWatch = Tuple[str, int, str]
+
+
+def _show_genres(conn, show_id: int) -> List[str]:
+    return [row[0] for row in fetch_all("show_genres.names", (show_id,), conn=conn)]
+
+
+def _add_rollups(
+    conn,
+    user_id: str,
+    monthly: Dict[str, List[int]],
+    by_genre: Dict[str, List[int]],
+) -> None:
+    """Add [episodes, minutes] deltas to the user's rollup rows."""
+    episodes = sum(delta[0] for delta in monthly.values())
+    minutes = sum(delta[1] for delta in monthly.values())
+    execute("user_stats.add", (user_id, episodes, minutes), conn=conn)
+    execute_batch(
+        "user_stats_monthly.add",
+        [(user_id, month, *delta) for month, delta in monthly.items()],
+        conn=conn,
+    )
+    execute_batch(
+        "user_stats_genre.add",
+        [(user_id, genre, *delta) for genre, delta in by_genre.items()],
+        conn=conn,
+    )
+
+
+def record_watched(conn, user_id: str, events: List[WatchEvent]) -> None:
+    """
+    Add newly watched episodes to the user's stats rollups, inside the
+    caller's transaction. Events without a watched_at count towards the
+    current month. The runtime and genres credited are stored on each
+    episodes_watched row, so an unwatch takes back exactly those even if
+    the show's metadata changes in between.
+    """
+    if not events:
+        return
+    current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    monthly: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    by_genre: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    genres_by_show: Dict[int, List[str]] = {}
+    credits = []
+
+    for show_id, season, episode, watched_at in events:
+        minutes = fetch_one(
+            "show_episodes.runtime", (show_id, season, episode, show_id), conn=conn
+        )[0]
+        if show_id not in genres_by_show:
+            genres_by_show[show_id] = _show_genres(conn, show_id)
+        genres = genres_by_show[show_id]
+        credits.append((minutes, ",".join(genres), user_id, show_id, season, episode))
+
+        month = watched_at[:7] if watched_at else current_month
+        for delta in [monthly[month]] + [by_genre[g] for g in genres]:
+            delta[0] += 1
+            delta[1] += minutes
+
+    execute_batch("episodes_watched.credit", credits, conn=conn)
+    _add_rollups(conn, user_id, monthly, by_genre)
+
+
+def record_unwatched(conn, user_id: str, removed: List[RemovedWatch]) -> None:
+    """
+    Take unwatched episodes out of the user's stats rollups, inside the
+    caller's transaction, using what record_watched credited for them.
+    """
+    if not removed:
+        return
+    monthly: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    by_genre: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    for watched_at, minutes, genres in removed:
+        month = watched_at[:7]
+        for delta in [monthly[month]] + [by_genre[g] for g in genres.split(",") if g]:
+            delta[0] -= 1
+            delta[1] -= minutes
+
+    _add_rollups(conn, user_id, monthly, by_genre)
+
+
+def rebuild_stats(user_id: Optional[str] = None, conn=None) -> int:
+    """
+    Recompute stats rollups from the watch history, for one user or for
+    everyone. Pass conn to run inside the caller's transaction, which
+    covers the users on that connection's shard. Without it, everyone is
+    rebuilt one shard (and transaction) at a time.
+    Returns the number of users rebuilt.
+    """
+    if conn is None and user_id is not None:
+        with transaction(user_id) as conn:
+            return rebuild_stats(user_id, conn=conn)
+    if conn is None:
+        rebuilt = 0
+        for shard in shards():
+            with transaction(shard=shard) as conn:
+                rebuilt += rebuild_stats(conn=conn)
+        return rebuilt
+
+    if user_id is None:
+        for table in ("user_stats", "user_stats_monthly", "user_stats_genre"):
+            execute(f"{table}.clear", conn=conn)
+        user_ids = [row[0] for row in fetch_all("episodes_watched.users", conn=conn)]
+    else:
+        for table in ("user_stats", "user_stats_monthly", "user_stats_genre"):
+            execute(f"{table}.delete", (user_id,), conn=conn)
+        user_ids = [user_id]
+
+    for uid in user_ids:
+        # Re-credit every watch from the current metadata, then total the credits
+        execute("episodes_watched.recredit", (uid,), conn=conn)
+        monthly: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        by_genre: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for row in fetch_all("episodes_watched.history_rollup", (uid,), conn=conn):
+            genres, month, episodes, minutes = row
+            for delta in [monthly[month]] + [by_genre[g] for g in genres.split(",") if g]:
+                delta[0] += episodes
+                delta[1] += minutes
+        if monthly:
+            _add_rollups(conn, uid, monthly, by_genre)
+    return len(user_ids)
+
+
+def get_stats(user_id: str) -> Dict[str, Any]:
+    """
+    Get a user's watch statistics from the precomputed rollups.
+    Months are in ascending order, genres by time watched.
+    """
+    row = fetch_one("user_stats.get", (user_id,), user_id=user_id)
+    episodes, minutes = (row[0], row[1]) if row else (0, 0)
+    return {
+        "episodes": episodes,
+        "minutes": minutes,
+        "hours": round(minutes / 60, 1),
+        "by_month": rows_to_dicts(fetch_all("user_stats_monthly.by_user", (user_id,), user_id=user_id)),
+        "by_genre": rows_to_dicts(fetch_all("user_stats_genre.by_user", (user_id,), user_id=user_id)),
+    }
@@ -0,0 +1,24 @@
+"""
+Rebuild watch statistics rollups from the watch history.
+
+    python -m stats.rebuild            # every user
+    python -m stats.rebuild --user ID  # one user
+"""
+import argparse
+
+from database import init_db
+from stats.models import rebuild_stats
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user", help="Only rebuild this user's stats")
+    args = parser.parse_args(argv)
+
+    init_db()
+    count = rebuild_stats(args.user)
+    print(f"Rebuilt stats for {count} user(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Request, Response
+
+from auth.jwt_handler import get_current_user_id
+from database import get_data_version
+from http_cache import etag_headers, not_modified, version_etag
+from stats.models import get_stats
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_user_stats(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Get the user's watch totals, per month and per genre."""
+    etag = version_etag(get_data_version(user_id))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers.update(etag_headers(etag))
+    return get_stats(user_id)
@@ -0,0 +1 @@
+# Delta sync module
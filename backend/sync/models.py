@@ -0,0 +1,126 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from database import (
+    bump_data_version,
+    execute,
+    execute_batch,
+    fetch_all,
+    fetch_one,
+    get_connection,
+    rows_to_dicts,
+)
+
+# (entity, op, show_id, season, episode); season/episode are None for shows.
+Change = Tuple[str, str, int, Optional[int], Optional[int]]
+
+
+def show_change(op: str, show_id: int) -> Change:
+    return ("show", op, show_id, None, None)
+
+
+def episode_change(op: str, show_id: int, season: int, episode: int) -> Change:
+    return ("episode", op, show_id, season, episode)
+
+
+def record_changes(conn, user_id: str, changes: List[Change]) -> int:
+    """
+    Bump the user's data_version and append changes to the change log,
+    inside the caller's transaction. Every SYNC_COMPACT_EVERY versions the
+    user's log is compacted as part of the same write.
+    Returns the new version.
+    """
+    version = bump_data_version(conn, user_id)
+    execute_batch(
+        "change_log.insert",
+        [(user_id, version, *change) for change in changes],
+        conn=conn,
+    )
+    if version % settings.SYNC_COMPACT_EVERY == 0:
+        compact_change_log(conn, user_id)
+    return version
+
+
+def compact_change_log(conn, user_id: str, tombstone_days: Optional[int] = None) -> int:
+    """
+    Drop change log entries superseded by a later entry for the same key,
+    then drop tombstones older than tombstone_days and raise the user's
+    sync_floor past them. Returns the number of entries removed.
+    """
+    if tombstone_days is None:
+        tombstone_days = settings.SYNC_TOMBSTONE_DAYS
+    removed = execute("change_log.compact", (user_id, user_id), conn=conn).rowcount
+
+    horizon = (user_id, f"-{tombstone_days} day")
+    floor = fetch_one("change_log.expired_tombstone_floor", horizon, conn=conn)[0]
+    if floor is not None:
+        removed += execute("change_log.expire_tombstones", horizon, conn=conn).rowcount
+        execute("user_data_versions.raise_floor", (floor, user_id), conn=conn)
+    return removed
+
+
+def get_changes(user_id: str, since: int = 0) -> Dict[str, Any]:
+    """
+    Get the user's show and watched-episode changes after version since.
+
+    Only the latest change per show / episode is returned; deletions come
+    back as tombstones (op "delete"). If since is 0, older than the
+    compaction horizon or ahead of the server, the full library is returned
+    with reset=True and the client must replace its local copy.
+    """
+    with get_connection(user_id) as conn:
+        # One read transaction so version and changes come from one
+        # snapshot; get_connection rolls it back on exit.
+        conn.execute("BEGIN")
+        row = fetch_one("user_data_versions.get", (user_id,), conn=conn)
+        version, floor = (row[0], row[1]) if row else (0, 0)
+
+        if since <= 0 or since < floor or since > version:
+            return {
+                "version": version,
+                "reset": True,
+                "shows": _snapshot_shows(conn, user_id),
+                "episodes": _snapshot_episodes(conn, user_id),
+            }
+        return {
+            "version": version,
+            "reset": False,
+            "shows": _changed_shows(conn, user_id, since),
+            "episodes": _changed_episodes(conn, user_id, since),
+        }
+
+
+def _snapshot_shows(conn, user_id: str) -> List[Dict[str, Any]]:
+    rows = fetch_all("change_log.snapshot_shows", (user_id,), conn=conn)
+    return [_with_bool_favorite(show) for show in rows_to_dicts(rows)]
+
+
+def _snapshot_episodes(conn, user_id: str) -> List[Dict[str, Any]]:
+    return rows_to_dicts(fetch_all("change_log.snapshot_episodes", (user_id,), conn=conn))
+
+
+def _changed_shows(conn, user_id: str, since: int) -> List[Dict[str, Any]]:
+    rows = fetch_all("change_log.changed_shows", (user_id, since, user_id), conn=conn)
+    return [_as_change(row, ("show_id",)) for row in rows]
+
+
+def _changed_episodes(conn, user_id: str, since: int) -> List[Dict[str, Any]]:
+    rows = fetch_all("change_log.changed_episodes", (user_id, since, user_id), conn=conn)
+    return [_as_change(row, ("show_id", "season", "episode")) for row in rows]
+
+
+def _as_change(row, key_fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Turn a changed key joined with its current row into an upsert, or a
+    tombstone if the row no longer exists.
+    """
+    change = dict(row)
+    if not change.pop("present"):
+        return {"op": "delete", **{field: change[field] for field in key_fields}}
+    change = {"op": "upsert", **change}
+    return _with_bool_favorite(change) if "favorite" in change else change
+
+
+def _with_bool_favorite(show: Dict[str, Any]) -> Dict[str, Any]:
+    show["favorite"] = bool(show["favorite"])
+    return show
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Query
+
+from auth.jwt_handler import get_current_user_id
+from sync.models import get_changes
+
+router = APIRouter()
+
+
+@router.get("")
+async def sync_changes(
+    since: int = Query(0, ge=0, description="Version from the previous sync"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get the user's show and watched-episode changes since a version.
+    Pass the returned version as since on the next call.
+    """
+    return get_changes(user_id, since)
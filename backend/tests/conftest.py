@@ -14,6 +14,7 @@ os.environ["GOOGLE_CLIENT_ID"] = "test-client-id"
 os.environ["GOOGLE_CLIENT_SECRET"] = "test-client-secret"
 os.environ["TMDB_API_KEY"] = "test-tmdb-key"
 os.environ["JWT_SECRET"] = "test-jwt-secret-for-testing-only"
+os.environ["SCHEDULER_ENABLED"] = "false"
 
 
 @pytest.fixture(scope="function")
@@ -34,17 +35,21 @@ def temp_db():
     
     # Cleanup
     database.DB_PATH = original_path
-    try:
-        os.unlink(db_path)
-    except OSError:
-        pass
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
 
 
 @pytest.fixture(scope="function")
 def client(temp_db):
     """Create a test client with a fresh database."""
     from main import app
-    
+    from ratelimit import rate_limit_store
+
+    # Every test client shares one IP; start each test with fresh budgets
+    rate_limit_store.reset()
     with TestClient(app) as test_client:
         yield test_client
 
@@ -0,0 +1,58 @@
+"""Tests for admin diagnostics endpoints."""
+
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def admin_headers(auth_headers, test_user):
+    """Auth headers for a user listed in ADMIN_EMAILS."""
+    with patch("auth.jwt_handler.settings.ADMIN_EMAILS", [test_user["email"].upper()]):
+        yield auth_headers
+
+
+def test_admin_requires_admin_email(client, auth_headers):
+    """Test that admin endpoints reject anonymous and non-admin users."""
+    assert client.get("/api/admin/memory").status_code == 403
+    assert client.get("/api/admin/memory", headers=auth_headers).status_code == 403
+
+
+def test_memory_report_lists_caches(client, admin_headers):
+    """Test that the memory report covers registered caches and the budget."""
+    response = client.get("/api/admin/memory", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    names = {cache["name"] for cache in data["caches"]}
+    assert {"tmdb", "payloads", "dashboard"} <= names
+    assert data["budget_bytes"] > 0
+    assert data["total_bytes"] == sum(cache["bytes"] for cache in data["caches"])
+
+
+def test_memory_snapshots_diff_allocations(client, admin_headers):
+    """Test that the second snapshot reports growth since the first."""
+    try:
+        first = client.post("/api/admin/memory/snapshots", headers=admin_headers).json()
+        assert first["compared_to_previous"] is False
+
+        retained = [bytearray(1024) for _ in range(2000)]  # noqa: F841
+        second = client.post(
+            "/api/admin/memory/snapshots?limit=5", headers=admin_headers
+        ).json()
+        assert second["compared_to_previous"] is True
+        assert len(second["top"]) <= 5
+        assert any(
+            "test_admin.py" in stat["traceback"][0] and stat["size_diff"] >= 2000 * 1024
+            for stat in second["top"]
+        )
+    finally:
+        response = client.delete("/api/admin/memory/snapshots", headers=admin_headers)
+    assert response.json() == {"tracemalloc": False}
+
+
+def test_admission_stats(client, admin_headers):
+    """Test that admission counters are reported per route class."""
+    client.get("/api/episodes/progress", headers=admin_headers)
+    data = client.get("/api/admin/admission", headers=admin_headers).json()
+    assert set(data) == {"tmdb", "heavy_db"}
+    assert data["heavy_db"]["admitted"] >= 1
+    assert data["heavy_db"]["active"] == 0
@@ -1,5 +1,9 @@
 """Tests for authentication endpoints."""
 
+import asyncio
+import time
+from unittest.mock import patch
+
 import pytest
 
 
@@ -66,3 +70,141 @@ def test_invalid_jwt_token_fails():
         verify_token("invalid-token")
     
     assert exc_info.value.status_code == 401
+
+
+@pytest.fixture
+def google_keys():
+    """
+    Stand in for Google's JWKS: a local RSA key published in google_jwks.
+    Yields a function that signs id_token claims with it.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk, jwt
+
+    from auth.jwks import google_jwks
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    google_jwks.load({"keys": [{**public, "kid": "test-key", "use": "sig"}]})
+
+    def sign(claims=None, key=pem, kid="test-key"):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": "test-client-id",
+            "sub": "google-123",
+            "email": "test@example.com",
+            "name": "Test User",
+            "picture": "https://example.com/pic.jpg",
+            "iat": now,
+            "exp": now + 3600,
+            **(claims or {}),
+        }
+        return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+    yield sign
+    google_jwks.clear()
+
+
+def _token_response(id_token):
+    from auth.google_oauth import GoogleTokenResponse
+
+    return GoogleTokenResponse(
+        access_token="access",
+        id_token=id_token,
+        expires_in=3600,
+        token_type="Bearer",
+        scope="openid email profile",
+    )
+
+
+@patch("auth.routes.get_user_info")
+@patch("auth.routes.exchange_code_for_token")
+def test_callback_verifies_id_token_locally(mock_exchange, mock_userinfo, client, google_keys):
+    """Test that login uses the id_token profile without calling userinfo."""
+    from auth.jwt_handler import verify_token
+    from database import fetch_one
+
+    mock_exchange.return_value = _token_response(google_keys())
+
+    response = client.get("/api/auth/callback?code=abc")
+    assert response.status_code == 200
+    mock_userinfo.assert_not_called()
+    user_id = verify_token(response.json()["access_token"])["user_id"]
+    assert fetch_one("users.get", (user_id,))["email"] == "test@example.com"
+
+
+@patch("auth.routes.get_user_info")
+@patch("auth.routes.exchange_code_for_token")
+def test_callback_falls_back_to_userinfo(mock_exchange, mock_userinfo, client, google_keys):
+    """Test that userinfo is used when Google's keys cannot be fetched."""
+    from auth.google_oauth import GoogleUserInfo
+    from auth.jwks import google_jwks
+
+    mock_exchange.return_value = _token_response(google_keys())
+    mock_userinfo.return_value = GoogleUserInfo(sub="google-123", email="test@example.com")
+    google_jwks.clear()
+
+    with patch.object(google_jwks, "_fetch", side_effect=OSError("offline")):
+        response = client.get("/api/auth/callback?code=abc")
+    assert response.status_code == 200
+    mock_userinfo.assert_called_once_with("access")
+
+
+@patch("auth.routes.get_user_info")
+@patch("auth.routes.exchange_code_for_token")
+def test_callback_rejects_bad_id_token(mock_exchange, mock_userinfo, client, google_keys):
+    """Test that a token signed by another key or for another client is refused."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    other = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    for id_token in (google_keys(key=other), google_keys({"aud": "someone-else"})):
+        mock_exchange.return_value = _token_response(id_token)
+        response = client.get("/api/auth/callback?code=abc")
+        assert response.status_code == 400
+    mock_userinfo.assert_not_called()
+
+
+def test_jwks_cache_honours_cache_control():
+    """Test max-age parsing, background refresh near expiry and unknown-kid refetch."""
+    from auth.jwks import JWKSCache, cache_max_age
+
+    assert cache_max_age("public, max-age=21015, must-revalidate") == 21015
+    assert cache_max_age("no-store") is None
+
+    cache = JWKSCache("https://example.com/certs")
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        cache.load({"keys": [{"kid": f"k{len(fetches)}"}]}, max_age=100)
+
+    async def scenario():
+        with patch.object(cache, "_fetch", side_effect=fetch):
+            assert await cache.get_key("k1") == {"kid": "k1"}
+            assert await cache.get_key("k1") == {"kid": "k1"}
+            assert len(fetches) == 1
+            # Unknown kids only refetch once the minimum interval has passed
+            assert await cache.get_key("k2") is None
+            assert len(fetches) == 1
+            cache._fetched_at -= 120
+            assert await cache.get_key("k2") == {"kid": "k2"}
+
+            # Close to expiry the cached key is served and refreshed behind it
+            cache.load({"keys": [{"kid": "k2"}]}, max_age=10)
+            assert await cache.get_key("k2") == {"kid": "k2"}
+            await cache._refresh_task
+            assert len(fetches) == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,216 @@
+"""Tests for the in-process and shared cache tiers."""
+
+import pytest
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test LRU eviction once maxsize is reached."""
+    from cache import TTLCache
+
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """Test that expired entries are not returned."""
+    from cache import TTLCache
+
+    cache = TTLCache()
+    cache.set("a", 1, ttl=-1)
+    assert cache.get("a") is None
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """A shared backend: the in-memory stand-in or a SQLite file."""
+    from cache import MemoryBackend, SQLiteBackend
+
+    if request.param == "memory":
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / "cache.db"))
+
+
+def test_backend_roundtrip(backend):
+    """Test get/set/delete/incr on each backend."""
+    backend.set("k", b"value", ttl=60)
+    assert backend.get("k") == b"value"
+    backend.delete("k")
+    assert backend.get("k") is None
+
+    backend.set("gone", b"x", ttl=-1)
+    assert backend.get("gone") is None
+
+    assert backend.incr("counter") == 1
+    assert backend.incr("counter") == 2
+
+
+def test_two_tier_cache_shares_between_workers(backend):
+    """Test that two workers (separate L1s) see each other's writes."""
+    from cache import TwoTierCache
+
+    worker_a = TwoTierCache("test", backend=backend, stamp_ttl=0)
+    worker_b = TwoTierCache("test", backend=backend, stamp_ttl=0)
+
+    worker_a.set("show:1", {"title": "Dark"})
+    assert worker_b.get("show:1") == {"title": "Dark"}
+
+
+def test_two_tier_cache_scope_bump_invalidates_other_workers(backend):
+    """Test version-stamp invalidation across workers."""
+    from cache import TwoTierCache
+
+    worker_a = TwoTierCache("test", backend=backend, stamp_ttl=0)
+    worker_b = TwoTierCache("test", backend=backend, stamp_ttl=0)
+
+    worker_a.set("dashboard", "old", scope="user-1")
+    worker_a.set("dashboard", "other", scope="user-2")
+    assert worker_b.get("dashboard", scope="user-1") == "old"
+
+    worker_b.bump(scope="user-1")
+    assert worker_a.get("dashboard", scope="user-1") is None
+    assert worker_a.get("dashboard", scope="user-2") == "other"
+
+    worker_b.clear()
+    assert worker_a.get("dashboard", scope="user-2") is None
+
+
+def test_two_tier_cache_entry_fills_under_the_stamp_it_missed(backend):
+    """Test that a bump between a miss and its fill leaves the filled value unreachable."""
+    from cache import TwoTierCache
+
+    worker_a = TwoTierCache("test", backend=backend, stamp_ttl=0)
+    worker_b = TwoTierCache("test", backend=backend, stamp_ttl=0)
+
+    entry = worker_a.entry("dashboard", scope="user-1")
+    assert entry.get() is None
+    worker_b.bump(scope="user-1")
+    entry.set("computed before the bump")
+    assert worker_a.get("dashboard", scope="user-1") is None
+    assert worker_b.get("dashboard", scope="user-1") is None
+
+
+def test_two_tier_cache_stores_json_in_l2(backend):
+    """Test that L2 holds JSON and undecodable entries read as misses."""
+    import pickle
+
+    from cache import TwoTierCache
+
+    worker_a = TwoTierCache("test", backend=backend, stamp_ttl=0)
+    worker_b = TwoTierCache("test", backend=backend, stamp_ttl=0)
+
+    worker_a.set("show:1", {"title": "Dark"})
+    assert backend.get("test:0::show:1") == b'{"title":"Dark"}'
+    backend.set("test:0::show:2", pickle.dumps({"title": "1899"}), ttl=60)
+    assert worker_b.get("show:2") is None
+
+
+def test_precompressed_payload_round_trips_through_bytes():
+    """Test that a payload packed for L2 unpacks with the same body and variants."""
+    from compression import PrecompressedPayload
+
+    payload = PrecompressedPayload({"results": ["x" * 2000]}, minimum_size=100)
+    restored = PrecompressedPayload.from_bytes(payload.to_bytes())
+    assert restored.body == payload.body
+    assert restored.variants == payload.variants and "gzip" in restored.variants
+    with pytest.raises(ValueError):
+        PrecompressedPayload.from_bytes(payload.to_bytes()[:-1])
+
+
+def test_approx_size_counts_nested_objects():
+    """Test that size estimates follow containers and count shared objects once."""
+    from cache import approx_size
+
+    text = "x" * 1000
+    assert approx_size({"a": [text]}) > 1000
+    assert approx_size([text, text]) < approx_size([text, "y" * 1000])
+
+    # The walk is capped, so a huge graph costs a bounded number of visits
+    big = [[i] for i in range(10_000)]
+    assert approx_size(big) < approx_size(big, limit=100_000)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An isolated cache registry with a small budget."""
+    from cache import CacheRegistry
+
+    registry = CacheRegistry(budget=20_000)
+    monkeypatch.setattr("cache.cache_registry", registry)
+    return registry
+
+
+def test_named_cache_tracks_bytes(registry):
+    """Test that a named cache's byte count follows sets, replacements and deletes."""
+    from cache import TTLCache
+
+    cache = TTLCache(name="payloads")
+    cache.set("a", "x" * 1000)
+    one = cache.bytes
+    assert one > 1000
+    cache.set("a", "x" * 1000)
+    cache.set("b", "x" * 1000)
+    assert cache.bytes == 2 * one
+    cache.delete("a")
+    assert registry.stats()["caches"] == [{"name": "payloads", "entries": 1, "bytes": one}]
+
+
+def test_two_tier_l1_sized_from_serialized_length(registry, tmp_path):
+    """Test that L1 entries are sized from what was written to L2, not by walking the value."""
+    from cache import ENTRY_OVERHEAD, SQLiteBackend, TwoTierCache, approx_size
+
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    cache = TwoTierCache("sized", backend=backend, stamp_ttl=0, size_factor=1.5)
+    cache.set("show:1", {"overview": "x" * 1000})
+    raw = backend.get("sized:0::show:1")
+    key_size = approx_size("sized:0::show:1")
+    assert cache.l1.bytes == int(len(raw) * 1.5) + key_size + ENTRY_OVERHEAD
+
+
+def test_two_tier_skips_l1_in_front_of_local_backend(registry):
+    """Test that values behind an in-process backend are held once, in L2 only."""
+    from cache import MemoryBackend, TwoTierCache
+
+    backend = MemoryBackend(name="shared")
+    cache = TwoTierCache("local", backend=backend, stamp_ttl=0)
+    cache.set("show:1", {"overview": "x" * 1000})
+    assert cache.get("show:1") == {"overview": "x" * 1000}
+    assert len(cache.l1) == 0 and cache.l1.bytes == 0
+    assert backend.bytes > 1000
+
+
+def test_registry_budget_evicts_across_caches(registry):
+    """Test that exceeding the budget makes every cache shed its share, oldest first."""
+    from cache import MemoryBackend, TTLCache
+
+    big, small = TTLCache(name="big"), TTLCache(name="small")
+    shared = MemoryBackend(name="shared")
+    shared.incr("ns:stamp:")
+    for i in range(3):
+        small.set(f"s{i}", "x" * 1000)
+        shared.set(f"l2-{i}", b"x" * 1000, ttl=60)
+    for i in range(12):
+        big.set(f"b{i}", "x" * 1000)
+
+    assert registry.evictions >= 1
+    assert registry.total_bytes() <= registry.budget
+    assert big.get("b11") is not None and big.get("b0") is None
+    assert len(small) < 3
+    # Version stamps are never evicted
+    assert shared.get("ns:stamp:") == b"1"
+
+
+def test_backend_incr_with_ttl(backend):
+    """Test that an expiring counter restarts after its TTL, and plain ones never expire."""
+    assert backend.incr("rl:a", ttl=60) == 1
+    assert backend.incr("rl:a", ttl=60) == 2
+    assert backend.incr("rl:gone", ttl=-1) == 1
+    assert backend.incr("rl:gone", ttl=60) == 1
+    assert backend.incr("stamp") == 1
+    assert backend.incr("stamp") == 2
@@ -0,0 +1,102 @@
+"""Tests for the dashboard endpoint."""
+
+
+def _seed_library(user_id):
+    from episodes.models import mark_episodes_watched_batch
+    from shows.models import add_show_to_user, cache_season_from_tmdb, cache_show_from_tmdb
+
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "number_of_episodes": 4})
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "number_of_episodes": 2})
+    cache_season_from_tmdb(1399, {
+        "season_number": 1,
+        "episodes": [{"episode_number": ep, "name": f"Ep {ep}"} for ep in range(1, 5)],
+    })
+    add_show_to_user(user_id, 1399)
+    add_show_to_user(user_id, 1396, status="completed", favorite=True)
+    mark_episodes_watched_batch(user_id, 1399, [(1, 1), (1, 2)])
+    mark_episodes_watched_batch(user_id, 1396, [(1, 1), (1, 2)])
+
+
+def test_dashboard_requires_auth(client):
+    """Test that the dashboard requires authentication."""
+    response = client.get("/api/dashboard")
+    assert response.status_code == 403
+
+
+def test_dashboard_combines_progress_and_up_next(client, auth_headers, test_user):
+    """Test that one response carries shows, progress, up-next and stats."""
+    _seed_library(test_user["id"])
+
+    response = client.get("/api/dashboard", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    shows = {s["show_id"]: s for s in data["shows"]}
+    assert shows[1399]["watched_episodes"] == 2
+    assert shows[1399]["percentage"] == 50.0
+    assert shows[1399]["up_next"]["episode"] == 3
+    assert shows[1396]["favorite"] is True
+    assert shows[1396]["up_next"] is None
+    assert data["stats"] == {
+        "total": 2,
+        "watching": 1,
+        "completed": 1,
+        "episodes_watched": 4,
+    }
+
+
+def test_dashboard_cache_invalidated_by_writes(client, auth_headers, test_user):
+    """Test that a cached dashboard is rebuilt after the user marks an episode."""
+    from episodes.models import mark_episode_watched
+
+    _seed_library(test_user["id"])
+    before = client.get("/api/dashboard", headers=auth_headers).json()
+
+    mark_episode_watched(test_user["id"], 1399, 1, 3)
+    after = client.get("/api/dashboard", headers=auth_headers).json()
+
+    assert before["stats"]["episodes_watched"] == 4
+    assert after["stats"]["episodes_watched"] == 5
+    assert {s["show_id"]: s for s in after["shows"]}[1399]["up_next"]["episode"] == 4
+
+
+def test_dashboard_etag_follows_data_version(client, auth_headers, test_user):
+    """Test that an unchanged dashboard revalidates with 304 until a write."""
+    from episodes.models import mark_episode_watched
+
+    _seed_library(test_user["id"])
+    first = client.get("/api/dashboard", headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert etag == f'W/"v{first.json()["version"]}"'
+
+    revalidated = client.get(
+        "/api/dashboard", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+
+    mark_episode_watched(test_user["id"], 1399, 1, 3)
+    changed = client.get(
+        "/api/dashboard", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_dashboard_refreshed_when_tracked_show_changes(client, auth_headers, test_user):
+    """Test that a catalog refresh changing a tracked show invalidates the cached dashboard."""
+    from shows.models import cache_show_from_tmdb
+
+    _seed_library(test_user["id"])
+    first = client.get("/api/dashboard", headers=auth_headers)
+    etag = first.headers["ETag"]
+
+    # Refetching unchanged details keeps the ETag
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "number_of_episodes": 4})
+    same = client.get("/api/dashboard", headers={**auth_headers, "If-None-Match": etag})
+    assert same.status_code == 304
+
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "number_of_episodes": 10})
+    changed = client.get("/api/dashboard", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    shows = {s["show_id"]: s for s in changed.json()["shows"]}
+    assert shows[1399]["total_episodes"] == 10
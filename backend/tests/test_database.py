@@ -88,3 +88,344 @@ def test_rows_to_dicts(temp_db):
     assert isinstance(dicts, list)
     assert len(dicts) == 3
     assert all(isinstance(d, dict) for d in dicts)
+
+
+def test_init_db_records_schema_version(temp_db):
+    """Test that init_db stamps the schema version and skips when current."""
+    from database import SCHEMA_VERSION, execute_query, execute_write, init_db
+
+    assert execute_query("PRAGMA user_version")[0][0] == SCHEMA_VERSION
+
+    # A current database is left alone: a dropped index is not recreated
+    execute_write("DROP INDEX idx_shows_title")
+    init_db()
+    indexes = execute_query(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_shows_title'"
+    )
+    assert indexes == []
+
+
+def test_init_db_migrates_old_columns(temp_db):
+    """Test that init_db adds columns missing from an older database."""
+    import sqlite3
+    import database
+
+    conn = sqlite3.connect(temp_db)
+    conn.executescript(
+        """
+        DROP TABLE shows;
+        CREATE TABLE shows (
+            id INTEGER PRIMARY KEY, title TEXT NOT NULL,
+            cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        PRAGMA user_version = 0;
+        """
+    )
+    conn.close()
+
+    database.init_db()
+    columns = {r["name"] for r in database.execute_query("PRAGMA table_info(shows)")}
+    assert {"last_air_date", "next_air_date", "in_production", "popularity"} <= columns
+
+
+def test_init_db_backfills_stats_on_upgrade(temp_db, test_user):
+    """Test that upgrading from before the stats rollups rebuilds them from history."""
+    import sqlite3
+    import database
+    from stats.models import get_stats
+
+    conn = sqlite3.connect(temp_db)
+    conn.executescript(
+        f"""
+        INSERT INTO shows (id, title) VALUES (1399, 'Game of Thrones');
+        INSERT INTO episodes_watched (id, user_id, show_id, season, episode)
+        VALUES ('a', '{test_user["id"]}', 1399, 1, 1);
+        DROP TABLE user_stats;
+        PRAGMA user_version = 4;
+        """
+    )
+    conn.close()
+
+    database.init_db()
+    assert get_stats(test_user["id"])["episodes"] == 1
+
+
+def test_init_db_backfills_show_metadata_on_upgrade(temp_db, test_user):
+    """Test that upgrading to normalized genres fills show_genres and list sort keys."""
+    import sqlite3
+    import database
+    from shows.models import get_user_shows_page
+
+    conn = sqlite3.connect(temp_db)
+    conn.executescript(
+        f"""
+        INSERT INTO shows (id, title, genres, tmdb_rating) VALUES (1399, 'GoT', 'Drama,Fantasy', 8.4);
+        INSERT INTO user_shows (id, user_id, show_id) VALUES ('us', '{test_user["id"]}', 1399);
+        INSERT INTO episodes_watched (id, user_id, show_id, season, episode, watched_at)
+        VALUES ('a', '{test_user["id"]}', 1399, 1, 1, '2024-03-01 20:00:00');
+        PRAGMA user_version = 5;
+        """
+    )
+    conn.close()
+
+    database.init_db()
+    page = get_user_shows_page(test_user["id"], genre="Fantasy", min_rating=8)
+    assert [s["last_watched_at"] for s in page["shows"]] == ["2024-03-01 20:00:00"]
+
+
+def test_data_version_bumped_by_mutations_only(temp_db, test_user):
+    """Test that every user-data write bumps data_version and no-ops do not."""
+    from database import get_data_version
+    from episodes.models import mark_episode_watched, unmark_episode_watched
+    from shows.models import (
+        add_show_to_user,
+        cache_show_from_tmdb,
+        remove_show_from_user,
+        update_user_show_status,
+    )
+
+    user_id = test_user["id"]
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones"})
+    assert get_data_version(user_id) == 0
+
+    add_show_to_user(user_id, 1399)
+    mark_episode_watched(user_id, 1399, 1, 1)
+    assert get_data_version(user_id) == 2
+
+    mark_episode_watched(user_id, 1399, 1, 1)
+    assert not update_user_show_status(user_id, 9999, "completed")
+    assert not unmark_episode_watched(user_id, 1399, 1, 5)
+    assert get_data_version(user_id) == 2
+
+    update_user_show_status(user_id, 1399, "completed")
+    unmark_episode_watched(user_id, 1399, 1, 1)
+    remove_show_from_user(user_id, 1399)
+    assert get_data_version(user_id) == 5
+
+
+def _mark_range(user_id, show_id, start, count):
+    from episodes.models import mark_episode_watched
+
+    for episode in range(start, start + count):
+        mark_episode_watched(user_id, show_id, 1, episode)
+
+
+def test_concurrent_writes_from_several_processes(temp_db, test_user):
+    """Test that writers in separate processes queue on the lock instead of failing."""
+    import multiprocessing
+
+    from database import execute_query, get_data_version
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+
+    user_id = test_user["id"]
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones"})
+    add_show_to_user(user_id, 1399)
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_mark_range, args=(user_id, 1399, 1 + i * 25, 25))
+        for i in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    assert execute_query("PRAGMA journal_mode")[0][0] == "wal"
+    count = execute_query(
+        "SELECT COUNT(*) FROM episodes_watched WHERE user_id = ?", (user_id,)
+    )[0][0]
+    assert count == 100
+    assert get_data_version(user_id) == 101
+
+
+@pytest.fixture
+def db_dir(tmp_path, monkeypatch):
+    """Point DB_PATH at a fresh file in its own directory, with room for shard files."""
+    import database
+
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "showtracker.db")
+    return tmp_path
+
+
+@pytest.fixture
+def sharded_db(db_dir, monkeypatch):
+    """A fresh database split into 3 shards."""
+    import database
+    from config import settings
+
+    monkeypatch.setattr(settings, "DB_SHARDS", 3)
+    database.init_db()
+    return db_dir
+
+
+def _users_on_shards(count):
+    """Return user ids that hash to distinct shards, one per shard."""
+    from database import shard_for
+
+    users = {}
+    n = 0
+    while len(users) < count:
+        users.setdefault(shard_for(f"user-{n}", count), f"user-{n}")
+        n += 1
+    return [users[index] for index in range(count)]
+
+
+def _table_user_ids(path, table):
+    import sqlite3
+
+    conn = sqlite3.connect(str(path))
+    try:
+        return {row[0] for row in conn.execute(f"SELECT user_id FROM {table}")}
+    finally:
+        conn.close()
+
+
+def test_sharded_layout_keeps_user_rows_on_their_shard(sharded_db):
+    """Test that user rows go to the user's shard and catalog joins still work."""
+    import database
+    from dashboard.models import get_dashboard
+    from episodes.models import get_up_next, mark_episode_watched
+    from shows.models import (
+        add_show_to_user,
+        cache_season_from_tmdb,
+        cache_show_from_tmdb,
+        get_shows_to_refresh,
+        get_user_shows,
+    )
+
+    users = _users_on_shards(3)
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "vote_average": 8.4})
+    for user_id in users:
+        add_show_to_user(user_id, 1399)
+    mark_episode_watched(users[1], 1399, 1, 1)
+    cache_season_from_tmdb(1399, {"season_number": 1, "episodes": [{"episode_number": n} for n in (1, 2)]})
+
+    for index, user_id in enumerate(users):
+        assert database.shard_path(index) == sharded_db / f"showtracker.shard{index}.db"
+        assert _table_user_ids(database.shard_path(index), "user_shows") == {user_id}
+        assert get_user_shows(user_id)[0]["title"] == "Game of Thrones"
+    assert _table_user_ids(database.shard_path(1), "episodes_watched") == {users[1]}
+    # Season metadata reached the trackers on every shard
+    assert get_up_next(users[0])[0]["episode"] == 1
+    assert get_up_next(users[1])[0]["episode"] == 2
+    assert get_dashboard(users[1])["shows"][0]["watched_episodes"] == 1
+
+    # The catalog file holds no per-user tables; shards hold no catalog
+    tables = "SELECT name FROM main.sqlite_master WHERE type = 'table'"
+    assert "user_shows" not in {row[0] for row in database.execute_query(tables)}
+    assert "shows" not in {row[0] for row in database.execute_query(tables, user_id=users[0])}
+
+    database.execute_write("UPDATE shows SET cached_at = '2000-01-01', next_air_date = date('now')")
+    assert get_shows_to_refresh()[0]["trackers"] == 3
+
+
+def test_caching_shows_only_locks_shards_with_trackers(sharded_db):
+    """Test that catalog updates take a shard's write lock only when it has rows to update."""
+    from unittest.mock import patch
+
+    import shows.models
+    from shows.models import add_show_to_user, cache_season_from_tmdb, cache_show_from_tmdb
+
+    users = _users_on_shards(3)
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "vote_average": 8.0})
+    add_show_to_user(users[2], 1399)
+
+    locked = []
+    real_transaction = shows.models.transaction
+
+    def recording_transaction(user_id=None, shard=None):
+        locked.append(shard)
+        return real_transaction(user_id, shard)
+
+    with patch.object(shows.models, "transaction", recording_transaction):
+        cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "vote_average": 9.0})
+        cache_season_from_tmdb(1396, {"season_number": 1, "episodes": [{"episode_number": 1}]})
+        assert locked == [None, None]  # catalog writes only
+        cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "vote_average": 8.0})
+        assert locked == [None, None, None]  # rating unchanged
+        cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "vote_average": 8.5})
+        cache_season_from_tmdb(1399, {"season_number": 1, "episodes": [{"episode_number": 1}]})
+    assert locked == [None, None, None, None, 2, None, 2]
+
+
+def test_shard_connections_attach_catalog_read_only(sharded_db):
+    """Test that a shard connection cannot write to the catalog."""
+    import sqlite3
+
+    import database
+
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        database.execute_write("INSERT INTO shows (id, title) VALUES (1, 'x')", user_id="user-0")
+
+
+def _user_rows(user_id):
+    """Every USER_TABLES row of a user, read through the router, without change_log ids."""
+    import database
+
+    rows = {}
+    for table in database.USER_TABLES:
+        result = database.execute_query(
+            f"SELECT * FROM {table} WHERE user_id = ? ORDER BY rowid", (user_id,), user_id=user_id
+        )
+        rows[table] = [
+            {k: v for k, v in dict(row).items() if not (table == "change_log" and k == "id")}
+            for row in result
+        ]
+    return rows
+
+
+def test_reshard_moves_users_and_back(db_dir, monkeypatch):
+    """Test that resharding moves every user's rows and keeps their data intact."""
+    import database
+    from config import settings
+    from episodes.models import (
+        apply_episode_mutations,
+        get_watched_episodes,
+        mark_episode_watched,
+        unmark_episode_watched,
+    )
+    from reshard import reshard
+    from shows.models import add_show_to_user, cache_season_from_tmdb, cache_show_from_tmdb
+    from sync.models import get_changes
+
+    database.init_db()
+    users = _users_on_shards(3)
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "genres": [{"name": "Drama"}]})
+    cache_season_from_tmdb(
+        1399, {"season_number": 1, "episodes": [{"episode_number": n, "runtime": 60} for n in (1, 2, 3)]}
+    )
+    for user_id in users:
+        add_show_to_user(user_id, 1399)
+        mark_episode_watched(user_id, 1399, 1, 1)
+        mark_episode_watched(user_id, 1399, 1, 2)
+        unmark_episode_watched(user_id, 1399, 1, 1)
+        apply_episode_mutations(
+            user_id, [{"op": "mark", "show_id": 1399, "season": 1, "episode": 3, "idempotency_key": "k1"}]
+        )
+    before = {user_id: _user_rows(user_id) for user_id in users}
+    # Every per-user table has rows to move
+    for rows in before.values():
+        assert all(rows[table] for table in database.USER_TABLES)
+    changes = {user_id: get_changes(user_id, 1) for user_id in users}
+
+    assert reshard(1, 3) == 3
+    monkeypatch.setattr(settings, "DB_SHARDS", 3)
+    for table in database.USER_TABLES:
+        assert _table_user_ids(database.DB_PATH, table) == set()
+    for index, user_id in enumerate(users):
+        for table in database.USER_TABLES:
+            assert _table_user_ids(database.shard_path(index), table) == {user_id}
+        assert _user_rows(user_id) == before[user_id]
+        assert [e["episode"] for e in get_watched_episodes(user_id, 1399)] == [2, 3]
+        assert get_changes(user_id, 1) == changes[user_id]
+
+    # Back to one file; a second run finds nothing left to move
+    assert reshard(3, 1) == 3
+    assert reshard(3, 1) == 0
+    monkeypatch.setattr(settings, "DB_SHARDS", 1)
+    assert _table_user_ids(database.DB_PATH, "user_shows") == set(users)
+    for user_id in users:
+        assert _user_rows(user_id) == before[user_id]
+        assert get_changes(user_id, 1) == changes[user_id]
@@ -103,3 +103,208 @@ def test_episode_models_calculate_progress(temp_db, test_user):
     assert progress["watched"] == 3
     assert progress["total"] == 10
     assert progress["percentage"] == 30.0
+
+
+def test_watched_episodes_page_keyset(temp_db, test_user):
+    """Test keyset pagination over (season, episode)."""
+    from episodes.models import mark_episodes_watched_batch, get_watched_episodes_page
+
+    episodes = [(s, e) for s in (1, 2) for e in range(1, 5)]
+    mark_episodes_watched_batch(test_user["id"], 1399, episodes)
+
+    first = get_watched_episodes_page(
+        test_user["id"], 1399, limit=5, fields=["season", "episode"]
+    )
+    assert [(e["season"], e["episode"]) for e in first["episodes"]] == episodes[:5]
+    assert set(first["episodes"][0]) == {"season", "episode"}
+
+    second = get_watched_episodes_page(
+        test_user["id"], 1399, limit=5, cursor=first["next_cursor"]
+    )
+    assert [(e["season"], e["episode"]) for e in second["episodes"]] == episodes[5:]
+    assert second["next_cursor"] is None
+
+
+def _cache_two_seasons(show_id=1399):
+    from shows.models import cache_show_from_tmdb, cache_season_from_tmdb
+
+    cache_show_from_tmdb({"id": show_id, "name": "Game of Thrones"})
+    for season in (0, 1, 2):
+        cache_season_from_tmdb(show_id, {
+            "season_number": season,
+            "episodes": [
+                {"episode_number": ep, "name": f"S{season}E{ep}"} for ep in (1, 2, 3)
+            ],
+        })
+
+
+def test_up_next_tracks_marks_and_unmarks(temp_db, test_user):
+    """Test that the up-next entry moves with marks and unmarks."""
+    from episodes.models import (
+        get_up_next,
+        mark_episode_watched,
+        mark_season_watched,
+        unmark_episode_watched,
+    )
+    from shows.models import add_show_to_user
+
+    _cache_two_seasons()
+    add_show_to_user(test_user["id"], 1399)
+
+    def up_next():
+        return [(e["season"], e["episode"]) for e in get_up_next(test_user["id"])]
+
+    assert up_next() == [(1, 1)]
+
+    mark_episode_watched(test_user["id"], 1399, 1, 2)
+    assert up_next() == [(1, 1)]
+
+    mark_episode_watched(test_user["id"], 1399, 1, 1)
+    assert up_next() == [(1, 3)]
+
+    mark_season_watched(test_user["id"], 1399, 2, 3)
+    mark_episode_watched(test_user["id"], 1399, 1, 3)
+    assert up_next() == []
+
+    unmark_episode_watched(test_user["id"], 1399, 2, 2)
+    assert up_next() == [(2, 2)]
+    unmark_episode_watched(test_user["id"], 1399, 1, 1)
+    assert up_next() == [(1, 1)]
+
+
+def test_up_next_refreshes_on_new_season(temp_db, test_user):
+    """Test that caching new season metadata reopens a caught-up show."""
+    from episodes.models import get_up_next, mark_season_watched
+    from shows.models import add_show_to_user, cache_season_from_tmdb
+
+    _cache_two_seasons()
+    add_show_to_user(test_user["id"], 1399)
+    mark_season_watched(test_user["id"], 1399, 1, 3)
+    mark_season_watched(test_user["id"], 1399, 2, 3)
+    assert get_up_next(test_user["id"]) == []
+
+    cache_season_from_tmdb(1399, {
+        "season_number": 3,
+        "episodes": [{"episode_number": 1, "name": "Premiere"}],
+    })
+    feed = get_up_next(test_user["id"])
+    assert feed[0]["season"] == 3
+    assert feed[0]["episode_name"] == "Premiere"
+
+
+def test_up_next_requires_auth(client):
+    """Test that the up-next feed requires authentication."""
+    response = client.get("/api/episodes/up-next")
+    assert response.status_code == 403
+
+
+def test_apply_episode_mutations_idempotent(temp_db, test_user):
+    """Test that mixed mutations apply once per idempotency key."""
+    from episodes.models import apply_episode_mutations, get_watched_episodes_set
+
+    operations = [
+        {"op": "mark", "show_id": 1399, "season": 1, "episode": 1, "idempotency_key": "a"},
+        {"op": "mark", "show_id": 1399, "season": 1, "episode": 2, "idempotency_key": "b"},
+        {"op": "unmark", "show_id": 1399, "season": 1, "episode": 1, "idempotency_key": "c"},
+    ]
+    results = apply_episode_mutations(test_user["id"], operations)
+    assert [r["applied"] for r in results] == [True, True, True]
+    assert get_watched_episodes_set(test_user["id"], 1399) == {(1, 2)}
+
+    # Retrying the same request changes nothing
+    retried = apply_episode_mutations(test_user["id"], operations)
+    assert all(r["replayed"] for r in retried)
+    assert get_watched_episodes_set(test_user["id"], 1399) == {(1, 2)}
+
+
+def test_mutations_endpoint(client, auth_headers, test_user):
+    """Test the batched mutation endpoint."""
+    response = client.post(
+        "/api/episodes/mutations",
+        json={"operations": [
+            {"op": "mark", "show_id": 1399, "season": 1, "episode": 1},
+            {"op": "mark", "show_id": 1399, "season": 1, "episode": 2},
+        ]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [r["applied"] for r in response.json()["results"]] == [True, True]
+
+    response = client.post(
+        "/api/episodes/mutations",
+        json={"operations": [{"op": "watch", "show_id": 1399, "season": 1, "episode": 1}]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_write_coalescer_merges_toggles(temp_db, test_user):
+    """Test that toggles within the window collapse to one write."""
+    import asyncio
+    from episodes.coalescer import WriteCoalescer
+    from episodes.models import apply_episode_mutations, get_watched_episodes_set
+
+    calls = []
+
+    def apply(user_id, operations, seen_keys):
+        calls.append(operations)
+        return apply_episode_mutations(user_id, operations, seen_keys)
+
+    async def scenario():
+        coalescer = WriteCoalescer(window=0.05, apply=apply)
+        user_id = test_user["id"]
+        submitted = [
+            asyncio.create_task(coalescer.submit(user_id, [op]))
+            for op in (
+                {"op": "mark", "show_id": 1, "season": 1, "episode": 1, "idempotency_key": "k1"},
+                {"op": "unmark", "show_id": 1, "season": 1, "episode": 1, "idempotency_key": "k2"},
+                {"op": "mark", "show_id": 1, "season": 1, "episode": 2},
+            )
+        ]
+        await asyncio.sleep(0)
+        assert coalescer.pending_count() == 2
+        results = await asyncio.gather(*submitted)
+        assert coalescer.pending_count() == 0
+        return [r[0] for r in results]
+
+    first, second, third = asyncio.run(scenario())
+    assert first["superseded"] is True and first["applied"] is False
+    assert third["applied"] is True
+
+    assert len(calls) == 1
+    assert get_watched_episodes_set(test_user["id"], 1) == {(1, 2)}
+    # The superseded key is remembered, so a retry of it is a no-op
+    replay = apply_episode_mutations(
+        test_user["id"],
+        [{"op": "mark", "show_id": 1, "season": 1, "episode": 1, "idempotency_key": "k1"}],
+    )
+    assert replay[0]["replayed"] is True
+
+
+def test_write_coalescer_retries_and_surfaces_failures(temp_db, test_user):
+    """Test that a locked database is retried and a failed write reaches the submitter."""
+    import asyncio
+    import sqlite3
+    from episodes.coalescer import WriteCoalescer
+    from episodes.models import apply_episode_mutations, get_watched_episodes_set
+
+    attempts = []
+
+    def flaky(user_id, operations, seen_keys):
+        attempts.append(operations)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return apply_episode_mutations(user_id, operations, seen_keys)
+
+    def broken(user_id, operations, seen_keys):
+        raise sqlite3.OperationalError("database is locked")
+
+    op = {"op": "mark", "show_id": 1, "season": 1, "episode": 1}
+    retrying = WriteCoalescer(window=0.01, apply=flaky, retry_delay=0.01)
+    results = asyncio.run(retrying.submit(test_user["id"], [op]))
+    assert len(attempts) == 3 and results[0]["applied"] is True
+    assert get_watched_episodes_set(test_user["id"], 1) == {(1, 1)}
+
+    failing = WriteCoalescer(window=0.01, apply=broken, retries=1, retry_delay=0.01)
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(failing.submit(test_user["id"], [op]))
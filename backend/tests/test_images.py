@@ -0,0 +1,132 @@
+"""Tests for the image proxy and its disk cache."""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    """Point the image cache at an empty directory."""
+    from images.models import image_cache
+
+    original = image_cache.directory, image_cache.max_bytes, image_cache._total
+    image_cache.directory, image_cache._total = tmp_path, None
+    yield tmp_path
+    image_cache.directory, image_cache.max_bytes, image_cache._total = original
+
+
+def test_image_size_snaps_to_tmdb_widths():
+    """Test that requested widths map to the smallest TMDb size that covers them."""
+    from images.models import image_size
+
+    assert image_size(280) == "w300"
+    assert image_size(342) == "w342"
+    assert image_size(2000) == "original"
+    assert image_size(None) == "original"
+
+
+def test_image_served_from_cache_with_strong_etag(client, image_dir):
+    """Test that an image is fetched once, then served from disk and revalidated."""
+    from images.models import image_cache
+
+    with patch.object(image_cache, "_download", AsyncMock(return_value=b"jpeg-bytes")) as download:
+        first = client.get("/api/images/abc123.jpg?w=280")
+        second = client.get("/api/images/abc123.jpg?w=300")
+
+    assert first.status_code == 200
+    assert first.content == b"jpeg-bytes"
+    assert first.headers["content-type"] == "image/jpeg"
+    assert first.headers["etag"] == '"w300-abc123.jpg"'
+    assert "immutable" in first.headers["cache-control"]
+    assert second.content == b"jpeg-bytes"
+    download.assert_awaited_once_with("w300", "abc123.jpg")
+    assert (image_dir / "w300_abc123.jpg").exists()
+
+    cached = client.get("/api/images/abc123.jpg?w=300", headers={"If-None-Match": '"w300-abc123.jpg"'})
+    assert cached.status_code == 304
+
+
+def test_image_rejects_unknown_names(client, image_dir):
+    """Test that only TMDb-style file names are proxied."""
+    from images.models import ImageNotFound, image_cache
+
+    assert client.get("/api/images/..passwd").status_code == 404
+    with patch.object(image_cache, "_download", AsyncMock(side_effect=ImageNotFound("x"))):
+        assert client.get("/api/images/missing.jpg").status_code == 404
+
+
+def test_image_accel_redirect(client, image_dir):
+    """Test that nginx is asked to send the file when a redirect prefix is set."""
+    from images.models import image_cache
+
+    with patch.object(image_cache, "_download", AsyncMock(return_value=b"png")), \
+            patch("images.routes.settings.IMAGE_ACCEL_REDIRECT_PREFIX", "/_images/"):
+        response = client.get("/api/images/poster.png?w=92")
+    assert response.headers["x-accel-redirect"] == "/_images/w92_poster.png"
+    assert response.content == b""
+
+
+def test_disk_cache_evicts_least_recently_used(image_dir):
+    """Test that the cache stays within its byte budget, evicting the oldest use first."""
+    from images.models import image_cache
+
+    image_cache.max_bytes = 250
+    for age, name in ((300, "a.jpg"), (200, "b.jpg")):
+        path = image_cache.store("w92", name, b"x" * 100)
+        os.utime(path, (path.stat().st_mtime - age,) * 2)
+
+    # Reading a.jpg makes b.jpg the least recently used
+    assert image_cache.lookup("w92", "a.jpg")
+    image_cache.store("w92", "c.jpg", b"x" * 100)
+
+    assert sorted(p.name for p in image_dir.iterdir()) == ["w92_a.jpg", "w92_c.jpg"]
+    assert image_cache._total == 200
+
+
+def test_concurrent_stores_keep_an_exact_total(image_dir):
+    """Test that stores from many threads never lose an update to the byte count."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from images.models import image_cache
+
+    image_cache.max_bytes = 10**9
+    image_cache.store("w92", "seed.jpg", b"x")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda n: image_cache.store("w92", f"{n}.jpg", b"x" * 100), range(200)))
+    assert image_cache._total == image_cache._disk_usage() == 1 + 200 * 100
+
+
+def test_concurrent_misses_share_one_download(image_dir):
+    """Test that simultaneous requests for an uncached image download it once."""
+    from images.models import image_cache
+
+    async def slow_download(size, name):
+        await asyncio.sleep(0.01)
+        return b"bytes"
+
+    async def scenario():
+        with patch.object(image_cache, "_download", side_effect=slow_download) as download:
+            results = await asyncio.gather(*(image_cache.get("w185", "x.jpg") for _ in range(5)))
+        assert download.call_count == 1
+        return results
+
+    results = asyncio.run(scenario())
+    assert {path.name for path, _ in results} == {"w185_x.jpg"}
+
+
+def test_prefetch_tracked_posters(temp_db, test_user, image_dir):
+    """Test that posters of tracked shows are prefetched once."""
+    from images.models import image_cache, prefetch_tracked_posters
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "poster_path": "/got.jpg"})
+    cache_show_from_tmdb({"id": 1396, "name": "Untracked", "poster_path": "/bb.jpg"})
+    add_show_to_user(test_user["id"], 1399)
+
+    with patch.object(image_cache, "_download", AsyncMock(return_value=b"p")) as download:
+        assert asyncio.run(prefetch_tracked_posters()) == 1
+        assert asyncio.run(prefetch_tracked_posters()) == 0
+    download.assert_awaited_once_with("w300", "got.jpg")
@@ -33,3 +33,365 @@ def test_openapi_json(client):
     data = response.json()
     assert "openapi" in data
     assert data["info"]["title"] == "ShowTracker API"
+
+
+def test_large_responses_are_compressed(client):
+    """Test that responses above the threshold are gzip-compressed."""
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["info"]["title"] == "ShowTracker API"
+
+
+def test_small_responses_are_not_compressed(client):
+    """Test that responses below the threshold are sent as-is."""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in response.headers
+
+
+def test_compression_keeps_message_order_before_the_body():
+    """Test that a non-body message before the body follows the held-back start."""
+    import asyncio
+
+    from compression import CompressionMiddleware
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [], "trailers": True})
+        await send({"type": "http.response.trailers", "headers": [], "more_trailers": False})
+        await send({"type": "http.response.body", "body": b"x" * 2000})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message["type"])
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    assert sent == ["http.response.start", "http.response.trailers", "http.response.body"]
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation."""
+    from compression import available_encodings, negotiate_encoding
+
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("deflate, gzip") == "gzip"
+    assert negotiate_encoding("*") == available_encodings()[0]
+
+
+def test_startup_profile_recorded(client):
+    """Test that startup timings are recorded per module."""
+    from main import app
+
+    report = app.state.startup_profile
+    names = {s["name"] for s in report["sections"]}
+    assert {"auth.routes", "shows.routes", "episodes.routes", "init_db"} <= names
+    assert report["total_ms"] > 0
+
+
+def _profiled_app(tmp_path, **options):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from profiling import ProfilingMiddleware
+
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        return {"total": sum(i * i for i in range(10000))}
+
+    @app.get("/fast")
+    async def fast():
+        return {}
+
+    app.add_middleware(ProfilingMiddleware, directory=str(tmp_path), secret="s3cret", **options)
+    return TestClient(app)
+
+
+def test_profiling_triggered_by_signed_header(tmp_path):
+    """Test that only a valid, unexpired profile token captures a profile."""
+    import pstats
+    from profiling import sign_profile_token
+
+    client = _profiled_app(tmp_path)
+    assert "x-profile-id" not in client.get("/slow").headers
+    for token in ("123.bad", sign_profile_token("other"), sign_profile_token("s3cret", ttl=-1)):
+        assert "x-profile-id" not in client.get("/slow", headers={"X-Profile-Token": token}).headers
+    assert list(tmp_path.iterdir()) == []
+
+    response = client.get("/slow", headers={"X-Profile-Token": sign_profile_token("s3cret")})
+    assert response.json()["total"] > 0
+    profile = tmp_path / response.headers["x-profile-id"]
+    stats = pstats.Stats(str(profile))
+    assert any(func[2] == "slow" for func in stats.stats)
+
+
+def test_profiling_routes_and_ring_bound(tmp_path):
+    """Test that allowlisted routes are profiled and only the newest profiles are kept."""
+    client = _profiled_app(tmp_path, routes=["/slow"], max_files=3)
+
+    ids = [client.get("/slow").headers["x-profile-id"] for _ in range(5)]
+    assert "x-profile-id" not in client.get("/fast").headers
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(ids[-3:])
+
+
+def _traced_client(exporter, sample_rate=1.0):
+    from fastapi.testclient import TestClient
+    from main import app
+    from tracing import TracingMiddleware
+
+    return TestClient(TracingMiddleware(app, exporter, sample_rate=sample_rate))
+
+
+def _exported(exporter, count=1):
+    import time
+
+    deadline = time.monotonic() + 5
+    while len(exporter.traces) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return exporter.traces
+
+
+class _CollectingExporter:
+    def __init__(self):
+        from tracing import SpanExporter
+
+        self.traces = []
+        self.otlp = SpanExporter()
+
+    def export(self, spans):
+        self.traces.append(self.otlp.document(spans)["resourceSpans"][0]["scopeSpans"][0]["spans"])
+
+
+def test_tracing_spans_route_db_and_tmdb(temp_db, auth_headers):
+    """Test that a traced request records nested route, TMDb and query spans."""
+    from unittest.mock import patch
+    import httpx
+    from shows.tmdb_client import tmdb_client
+
+    exporter = _CollectingExporter()
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"id": 1399, "name": "GoT"}))
+    with patch.object(tmdb_client, "transport", upstream):
+        response = _traced_client(exporter).post(
+            "/api/shows/add", json={"show_id": 1399}, headers=auth_headers
+        )
+    assert response.status_code == 200
+
+    spans = _exported(exporter)[0]
+    by_name = {s["name"]: s for s in spans}
+    root = by_name["POST /api/shows/add"]
+    assert "parentSpanId" not in root
+    assert {s["traceId"] for s in spans} == {root["traceId"]}
+    assert by_name["tmdb GET"]["parentSpanId"] == root["spanId"]
+    by_id = {s["spanId"]: s for s in spans}
+    # cache_show_from_tmdb's existence check runs inside its own transaction
+    transaction = by_id[by_name["db shows.exists"]["parentSpanId"]]
+    assert transaction["name"] == "db transaction"
+    assert transaction["parentSpanId"] == root["spanId"]
+    assert "db user_shows.add" in by_name
+    attributes = {a["key"]: a["value"] for a in by_name["tmdb GET"]["attributes"]}
+    assert attributes["http.status_code"] == {"intValue": "200"}
+
+
+def test_tracing_honours_traceparent_and_sampling(temp_db):
+    """Test that incoming traceparent continues a trace and unsampled requests export nothing."""
+    exporter = _CollectingExporter()
+    client = _traced_client(exporter, sample_rate=0.0)
+
+    client.get("/health")
+    client.get("/health", headers={"traceparent": f"00-{'a' * 32}-{'b' * 16}-00"})
+    client.get("/health", headers={"traceparent": f"00-{'a' * 32}-{'b' * 16}-01"})
+
+    (spans,) = _exported(exporter)
+    assert spans[0]["traceId"] == "a" * 32
+    assert spans[0]["parentSpanId"] == "b" * 16
+    assert spans[0]["name"] == "GET /health"
+
+
+def test_span_exporter_writes_otlp_json_lines(tmp_path):
+    """Test that the file exporter writes one OTLP resourceSpans document per trace."""
+    import json
+    from tracing import SERVER, Span, SpanExporter
+
+    finished = []
+    Span("a" * 32, None, "GET /", SERVER, finished).end()
+    exporter = SpanExporter(str(tmp_path / "traces.jsonl"))
+    exporter.export(finished)
+    exporter.export(finished)
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+    document = json.loads(lines[0])["resourceSpans"][0]
+    assert document["resource"]["attributes"][0]["value"] == {"stringValue": "showtracker-api"}
+    assert document["scopeSpans"][0]["spans"][0]["kind"] == SERVER
+
+
+def test_admission_route_classes():
+    """Test that TMDb-bound and heavy DB routes are classified, others are not."""
+    from admission import route_class
+
+    assert route_class("/api/shows/search") == "tmdb"
+    assert route_class("/api/shows/1399/full") == "tmdb"
+    assert route_class("/api/episodes/progress") == "heavy_db"
+    assert route_class("/api/shows/user/list") is None
+    assert route_class("/health") is None
+
+
+def test_admission_limiter_queues_then_sheds():
+    """Test that waiters get freed slots in order and overflow is shed."""
+    import asyncio
+    from admission import AdmissionLimiter
+
+    async def scenario():
+        limiter = AdmissionLimiter("tmdb", concurrency=1, queue_size=1, max_wait=0.5)
+        assert await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not await limiter.acquire()  # queue full
+        limiter.release()
+        assert await queued
+        assert limiter.active == 1
+
+        limiter.max_wait = 0.01
+        assert not await limiter.acquire()  # outwaited its budget
+        limiter.release()
+        assert limiter.active == 0
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["admitted"], stats["shed_queue_full"], stats["shed_timeout"]) == (2, 1, 1)
+
+
+def test_admission_middleware_sheds_with_retry_after():
+    """Test that requests beyond the limit get 503 + Retry-After while admitted ones finish."""
+    import asyncio
+    import httpx
+    from fastapi import FastAPI
+    from admission import AdmissionLimiter, AdmissionMiddleware
+
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/api/shows/search")
+    async def search():
+        await release.wait()
+        return {"ok": True}
+
+    limiters = {"tmdb": AdmissionLimiter("tmdb", concurrency=1, queue_size=0, max_wait=1.0)}
+    app.add_middleware(AdmissionMiddleware, limiters=limiters, retry_after=2)
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/api/shows/search"))
+            await asyncio.sleep(0.05)
+            shed = await client.get("/api/shows/search")
+            release.set()
+            return await first, shed
+
+    admitted, shed = asyncio.run(scenario())
+    assert admitted.status_code == 200
+    assert admitted.headers["server-timing"].startswith("queue;dur=")
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "2"
+
+
+def test_rate_limit_store_slides_and_sweeps():
+    """Test that the previous window carries over and idle keys are dropped."""
+    from ratelimit import MemoryRateLimitStore
+
+    store = MemoryRateLimitStore()
+    for _ in range(3):
+        store.hit("ip:read:a", 60, now=100)
+    assert store.hit("ip:read:a", 60, now=135) == (1, 3, 0.25)
+    store.hit("ip:read:b", 60, now=140)
+    assert len(store) == 2
+
+    store.hit("ip:read:c", 60, now=300)  # a and b idle for over a window
+    assert len(store) == 1
+
+
+def _rate_limited_app(store, limits):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from ratelimit import RateLimitMiddleware
+
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def items():
+        return []
+
+    @app.post("/api/items")
+    async def add_item():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, store=store, limits=limits, window=60)
+    return TestClient(app)
+
+
+def test_rate_limit_per_user_read_and_write_budgets():
+    """Test separate read/write budgets per user, standard headers and 429s."""
+    from auth.jwt_handler import create_access_token
+    from ratelimit import MemoryRateLimitStore
+
+    client = _rate_limited_app(
+        MemoryRateLimitStore(),
+        {("user", "read"): 2, ("user", "write"): 1, ("ip", "read"): 100, ("ip", "write"): 100},
+    )
+    alice = {"Authorization": f"Bearer {create_access_token('alice')}"}
+    bob = {"Authorization": f"Bearer {create_access_token('bob')}"}
+
+    first = client.get("/api/items", headers=alice)
+    assert (first.headers["ratelimit-limit"], first.headers["ratelimit-remaining"]) == ("2", "1")
+    assert first.headers["x-ratelimit-remaining"] == "1"
+    assert client.get("/api/items", headers=alice).status_code == 200
+    limited = client.get("/api/items", headers=alice)
+    assert limited.status_code == 429
+    assert 0 < int(limited.headers["retry-after"]) <= 60
+
+    assert client.post("/api/items", headers=alice).status_code == 200
+    assert client.post("/api/items", headers=alice).status_code == 429
+    assert client.get("/api/items", headers=bob).status_code == 200
+
+
+def test_rate_limit_per_ip_and_shared_store(tmp_path):
+    """Test that IP budgets apply to anonymous clients and a shared store spans workers."""
+    from cache import SQLiteBackend
+    from ratelimit import SharedRateLimitStore
+
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    limits = {("ip", "read"): 3}
+    workers = [_rate_limited_app(SharedRateLimitStore(backend), limits) for _ in range(2)]
+
+    statuses = [workers[i % 2].get("/api/items").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    # Invalid tokens fall back to the IP budget
+    assert workers[0].get("/api/items", headers={"Authorization": "Bearer junk"}).status_code == 429
+
+
+def test_shared_rate_limit_store_runs_off_the_event_loop(tmp_path):
+    """Test that the shared store's blocking hit() is not run on the event loop thread."""
+    import threading
+
+    from cache import SQLiteBackend
+    from ratelimit import SharedRateLimitStore
+
+    threads = []
+
+    class RecordingStore(SharedRateLimitStore):
+        def hit(self, key, window, now):
+            threads.append(threading.get_ident())
+            return super().hit(key, window, now)
+
+    loop_threads = []
+    client = _rate_limited_app(RecordingStore(SQLiteBackend(str(tmp_path / "cache.db"))), {("ip", "read"): 5})
+
+    @client.app.middleware("http")
+    async def record_loop_thread(request, call_next):
+        loop_threads.append(threading.get_ident())
+        return await call_next(request)
+
+    assert client.get("/api/items").status_code == 200
+    assert threads and loop_threads and threads[0] != loop_threads[0]
@@ -0,0 +1,88 @@
+"""Tests for the named query registry."""
+
+import re
+import threading
+
+import pytest
+
+from queries import QUERIES
+
+# Plan rows that read a whole table without any index
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_registered_query_uses_an_index(temp_db, name):
+    """Test that no registered query falls back to a full table scan."""
+    from database import get_connection
+
+    sql = QUERIES[name].replace("{columns}", "*").replace("{filters}", "")
+    with get_connection() as conn:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+
+    details = [row["detail"] for row in plan]
+    # Subqueries SQLite builds itself (CO-ROUTINE c, MATERIALIZE w) are
+    # scanned by design; only real tables count.
+    subqueries = {d.split()[-1] for d in details if d.startswith(("CO-ROUTINE", "MATERIALIZE"))}
+    scans = [m.group(1) for m in map(FULL_SCAN.match, details) if m]
+    assert [t for t in scans if t not in subqueries] == [], details
+
+
+@pytest.mark.parametrize("sort", ["added", "watched", "rating"])
+def test_filtered_user_show_pages_use_indexes(temp_db, sort):
+    """Test that every user show list filter keeps the page queries index-driven."""
+    from database import get_connection
+    from shows.models import USER_SHOW_SORTS, _list_filters
+
+    filters, _ = _list_filters(status="watching", favorite=True, genre="Drama", min_rating=7)
+    with get_connection() as conn:
+        for name in USER_SHOW_SORTS[sort]:
+            sql = QUERIES[name].replace("{columns}", "*").replace("{filters}", filters)
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+            details = [row["detail"] for row in plan]
+            assert not any(FULL_SCAN.match(d) for d in details), details
+
+
+def test_named_queries_record_latency(temp_db):
+    """Test that running a named query records its latency by name."""
+    from database import fetch_one
+    from queries import query_stats
+
+    query_stats.reset()
+    fetch_one("shows.get", (1,))
+    fetch_one("shows.get", (2,))
+
+    stats = query_stats.snapshot()
+    assert stats["shows.get"]["count"] == 2
+    assert stats["shows.get"]["max_ms"] >= stats["shows.get"]["p50_ms"] >= 0
+
+
+def test_connection_reused_per_thread(temp_db):
+    """Test that a thread keeps one connection (and its statement cache)."""
+    from database import get_connection
+
+    with get_connection() as first:
+        pass
+    with get_connection() as second:
+        pass
+    assert first is second
+
+    other = []
+
+    def worker():
+        with get_connection() as conn:
+            other.append(conn)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_uncommitted_work_rolled_back_on_exit(temp_db):
+    """Test that a reused connection never carries a transaction between calls."""
+    from database import execute_query, get_connection
+
+    with get_connection() as conn:
+        conn.execute("INSERT INTO shows (id, title) VALUES (1, 'Left open')")
+    assert execute_query("SELECT * FROM shows") == []
@@ -98,3 +98,464 @@ def test_delete_show_requires_auth(client):
     """Test that deleting a show requires authentication."""
     response = client.delete("/api/shows/1399")
     assert response.status_code == 403
+
+
+def _track_shows(user_id, count):
+    from database import execute_write
+    from shows.models import cache_show_from_tmdb
+
+    for i in range(count):
+        cache_show_from_tmdb({"id": 100 + i, "name": f"Show {i}"})
+        execute_write(
+            """
+            INSERT INTO user_shows (id, user_id, show_id, added_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (f"us-{i:02d}", user_id, 100 + i, f"2024-01-{i % 3 + 1:02d} 00:00:00"),
+        )
+
+
+def test_get_user_shows_page_keyset(temp_db, test_user):
+    """Test that keyset pages cover every show exactly once, newest first."""
+    from shows.models import get_user_shows_page
+
+    _track_shows(test_user["id"], 7)
+
+    seen = []
+    cursor = None
+    while True:
+        page = get_user_shows_page(test_user["id"], limit=3, cursor=cursor)
+        assert len(page["shows"]) <= 3
+        seen.extend(s["show_id"] for s in page["shows"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == list(range(100, 107))
+    assert len(seen) == len(set(seen))
+    added = [s["added_at"] for s in get_user_shows_page(test_user["id"])["shows"]]
+    assert added == sorted(added, reverse=True)
+
+
+def test_get_user_shows_page_fields(temp_db, test_user):
+    """Test that field projection returns only the requested columns."""
+    from shows.models import get_user_shows_page
+
+    _track_shows(test_user["id"], 2)
+
+    page = get_user_shows_page(test_user["id"], fields=["show_id", "title"])
+    assert all(set(s) == {"show_id", "title"} for s in page["shows"])
+
+    with pytest.raises(ValueError):
+        get_user_shows_page(test_user["id"], fields=["password"])
+
+
+def test_get_user_shows_pagination_endpoint(client, auth_headers, test_user):
+    """Test cursor and field parameters on the user list endpoint."""
+    _track_shows(test_user["id"], 3)
+
+    response = client.get(
+        "/api/shows/user/list?limit=2&fields=show_id",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["shows"]) == 2
+    assert data["next_cursor"]
+
+    response = client.get(
+        f"/api/shows/user/list?limit=2&cursor={data['next_cursor']}",
+        headers=auth_headers,
+    )
+    assert len(response.json()["shows"]) == 1
+    assert response.json()["next_cursor"] is None
+
+    response = client.get("/api/shows/user/list?cursor=garbage", headers=auth_headers)
+    assert response.status_code == 400
+
+    from pagination import encode_cursor
+
+    nested = encode_cursor([{"a": 1}, [2]])
+    response = client.get(f"/api/shows/user/list?cursor={nested}", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_cache_show_normalizes_genres_and_runtime(temp_db):
+    """Test that caching a show fills show_genres and the typical episode runtime."""
+    from database import execute_query
+    from shows.models import cache_show_from_tmdb, get_cached_show
+
+    cache_show_from_tmdb({
+        "id": 1399,
+        "name": "Game of Thrones",
+        "genres": [{"id": 18, "name": "Drama"}, {"id": 10765, "name": "Sci-Fi & Fantasy"}],
+        "episode_run_time": [50, 60],
+    })
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "genres": [{"name": "Drama"}]})
+    # A refresh replaces the show's genres
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "genres": [{"name": "Drama"}]})
+
+    rows = execute_query(
+        """
+        SELECT sg.show_id, g.name FROM show_genres sg
+        JOIN genres g ON g.id = sg.genre_id ORDER BY sg.show_id
+        """
+    )
+    assert [(r["show_id"], r["name"]) for r in rows] == [(1396, "Drama"), (1399, "Drama")]
+    assert execute_query("SELECT COUNT(*) FROM genres")[0][0] == 2
+    assert get_cached_show(1399)["episode_run_time"] is None
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "episode_run_time": [47]})
+    assert get_cached_show(1396)["episode_run_time"] == 47
+
+    # Popularity comes with the details; a response without it keeps the old value
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "popularity": 212.5})
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad"})
+    assert get_cached_show(1396)["popularity"] == 212.5
+
+
+def test_get_user_shows_page_filters_and_sorts(temp_db, test_user):
+    """Test genre, status, favorite and rating filters and the watched/rating sorts."""
+    from episodes.models import mark_episode_watched
+    from database import execute_write
+    from shows.models import add_show_to_user, cache_show_from_tmdb, get_user_shows_page
+
+    user_id = test_user["id"]
+    shows = [
+        (1, "Drama", 8.5, "watching", True),
+        (2, "Comedy", 7.0, "completed", False),
+        (3, "Drama", 6.0, "watching", False),
+    ]
+    for show_id, genre, rating, status, favorite in shows:
+        cache_show_from_tmdb({
+            "id": show_id,
+            "name": f"Show {show_id}",
+            "genres": [{"name": genre}],
+            "vote_average": rating,
+        })
+        add_show_to_user(user_id, show_id, status=status, favorite=favorite)
+    mark_episode_watched(user_id, 3, 1, 1)
+    mark_episode_watched(user_id, 2, 1, 1)
+    execute_write(
+        "UPDATE user_shows SET last_watched_at = '2024-01-01 00:00:00' WHERE show_id = 2"
+    )
+
+    def ids(**kwargs):
+        return [s["show_id"] for s in get_user_shows_page(user_id, **kwargs)["shows"]]
+
+    assert sorted(ids(genre="drama")) == [1, 3]
+    assert ids(status="completed") == [2]
+    assert ids(favorite=True) == [1]
+    assert sorted(ids(favorite=False)) == [2, 3]
+    assert ids(sort="rating") == [1, 2, 3]
+    assert ids(sort="rating", min_rating=7.0) == [1, 2]
+    assert ids(sort="watched") == [3, 2, 1]
+    assert ids(sort="rating", genre="Drama", status="watching", min_rating=8) == [1]
+
+    # Keyset pages follow the chosen sort
+    page = get_user_shows_page(user_id, limit=2, sort="rating")
+    rest = get_user_shows_page(user_id, limit=2, sort="rating", cursor=page["next_cursor"])
+    assert [s["show_id"] for s in page["shows"] + rest["shows"]] == [1, 2, 3]
+
+    # A rating refresh moves the show in the rating order
+    cache_show_from_tmdb({"id": 3, "name": "Show 3", "vote_average": 9.9})
+    assert ids(sort="rating")[0] == 3
+
+    with pytest.raises(ValueError):
+        get_user_shows_page(user_id, sort="title")
+
+
+def test_user_list_endpoint_filters(client, auth_headers, test_user):
+    """Test filter and sort parameters on the user list endpoint."""
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+
+    cache_show_from_tmdb({"id": 1, "name": "Drama Show", "genres": [{"name": "Drama"}]})
+    cache_show_from_tmdb({"id": 2, "name": "Comedy Show", "genres": [{"name": "Comedy"}]})
+    add_show_to_user(test_user["id"], 1)
+    add_show_to_user(test_user["id"], 2, favorite=True)
+
+    response = client.get(
+        "/api/shows/user/list?genre=Drama&sort=watched&fields=show_id,genres,last_watched_at",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["shows"] == [
+        {"show_id": 1, "genres": "Drama", "last_watched_at": None}
+    ]
+
+    response = client.get("/api/shows/user/list?favorite=true", headers=auth_headers)
+    assert [s["show_id"] for s in response.json()["shows"]] == [2]
+
+    response = client.get("/api/shows/user/list?sort=title", headers=auth_headers)
+    assert response.status_code == 422
+
+
+def _airing_show(show_id, trackers, next_air_date="2000-01-01"):
+    """Cache a show with the given air date, tracked by `trackers` users."""
+    from database import execute_write
+    from shows.models import cache_show_from_tmdb
+
+    cache_show_from_tmdb({
+        "id": show_id,
+        "name": f"Show {show_id}",
+        "next_episode_to_air": {"air_date": next_air_date},
+    })
+    execute_write(
+        "UPDATE shows SET cached_at = datetime('now', '-1 day') WHERE id = ?",
+        (show_id,),
+    )
+    for i in range(trackers):
+        execute_write(
+            "INSERT INTO user_shows (id, user_id, show_id) VALUES (?, ?, ?)",
+            (f"us-{show_id}-{i}", f"user-{i}", show_id),
+        )
+
+
+def test_get_shows_to_refresh_prioritises_trackers(temp_db):
+    """Test that airing shows are ordered by tracker count."""
+    from datetime import date
+    from shows.models import get_shows_to_refresh
+
+    today = date.today().isoformat()
+    _airing_show(1, trackers=1, next_air_date=today)
+    _airing_show(2, trackers=3, next_air_date=today)
+    _airing_show(3, trackers=5, next_air_date="1999-01-01")  # long finished
+
+    assert [s["id"] for s in get_shows_to_refresh()] == [2, 1]
+
+
+def test_refresh_scheduler_run_once(temp_db, test_user):
+    """Test that a refresh pass updates trending, details and latest season."""
+    import asyncio
+    from datetime import date
+    from shows.models import get_cached_show
+    from shows.scheduler import RefreshScheduler, RequestBudget
+
+    _airing_show(1399, trackers=2, next_air_date=date.today().isoformat())
+
+    client = AsyncMock()
+    client.get_trending_shows.return_value = []
+    client.get_show_details.return_value = {
+        "id": 1399,
+        "name": "Refreshed",
+        "number_of_seasons": 2,
+    }
+    client.get_season_details.return_value = {
+        "season_number": 2,
+        "episodes": [{"episode_number": 1, "name": "Pilot"}],
+    }
+
+    scheduler = RefreshScheduler(client=client, jitter=0, budget=RequestBudget(600))
+    result = asyncio.run(scheduler.run_once())
+
+    assert result == {"trending": 2, "shows": 1, "posters": 0}
+    assert get_cached_show(1399)["title"] == "Refreshed"
+    client.get_season_details.assert_awaited_once_with(1399, 2, use_cache=False)
+
+
+def test_request_budget_limits_burst():
+    """Test that the request budget refuses requests beyond its capacity."""
+    from shows.scheduler import RequestBudget
+
+    budget = RequestBudget(requests_per_minute=3)
+    assert [budget.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+@patch("shows.routes.tmdb_client.get_trending_shows")
+def test_trending_payload_is_precompressed(mock_trending, client):
+    """Test that trending responses are cached with compressed variants."""
+    from shows.routes import payload_cache
+
+    payload_cache.clear()
+    mock_trending.return_value = [
+        {"id": i, "name": f"Show {i}", "overview": "x" * 200} for i in range(20)
+    ]
+
+    first = client.get("/api/shows/trending", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/api/shows/trending", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert second.json() == first.json()
+    assert len(second.json()["results"]) == 20
+    assert mock_trending.await_count == 1
+    assert "gzip" in payload_cache.get("trending:week").variants
+    payload_cache.clear()
+
+
+@patch("shows.routes.tmdb_client.get_season_details")
+@patch("shows.routes.tmdb_client.get_show_details")
+def test_show_full_merges_watched_flags(
+    mock_details, mock_season, client, auth_headers, test_user
+):
+    """Test that the full endpoint merges details, seasons and watched flags."""
+    from episodes.models import mark_episode_watched
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+
+    mock_details.return_value = {
+        "id": 1399,
+        "name": "Game of Thrones",
+        "seasons": [
+            {"season_number": 0, "episode_count": 1},
+            {"season_number": 1, "episode_count": 2},
+            {"season_number": 2, "episode_count": 2},
+        ],
+    }
+    mock_season.side_effect = lambda show_id, n: {
+        "season_number": n,
+        "episodes": [{"episode_number": e, "name": f"S{n}E{e}"} for e in (1, 2)],
+    }
+    cache_show_from_tmdb(mock_details.return_value)
+    add_show_to_user(test_user["id"], 1399)
+    mark_episode_watched(test_user["id"], 1399, 2, 1)
+
+    response = client.get("/api/shows/1399/full", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["show"]["name"] == "Game of Thrones"
+    assert data["in_list"] is True
+    assert data["watched_count"] == 1
+    assert [s["season_number"] for s in data["seasons"]] == [1, 2]
+    flags = {
+        (s["season_number"], e["episode_number"]): e["watched"]
+        for s in data["seasons"]
+        for e in s["episodes"]
+    }
+    assert flags == {(1, 1): False, (1, 2): False, (2, 1): True, (2, 2): False}
+    assert mock_season.await_count == 2
+
+
+def test_show_full_requires_auth(client):
+    """Test that the full show endpoint requires authentication."""
+    response = client.get("/api/shows/1399/full")
+    assert response.status_code == 403
+
+
+def test_scheduler_leader_lock_is_exclusive(tmp_path):
+    """Test that only one process (or holder) gets the scheduler lock."""
+    from shows.scheduler import acquire_leader_lock
+
+    path = str(tmp_path / "scheduler.lock")
+    leader = acquire_leader_lock(path)
+    assert leader is not None
+    assert acquire_leader_lock(path) is None
+
+    leader.close()
+    assert acquire_leader_lock(path) is not None
+
+
+def _write_export(path, entries):
+    import gzip
+    import json
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for entry in entries:
+            f.write((entry if isinstance(entry, str) else json.dumps(entry)) + "\n")
+
+
+def test_catalog_load_export_streams_stubs(temp_db, tmp_path):
+    """Test that a gzipped ID export loads as stubs without clobbering cached shows."""
+    from database import execute_query
+    from shows.catalog import load_export
+    from shows.models import cache_show_from_tmdb, get_cached_show
+
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "overview": "Winter"})
+    path = tmp_path / "tv_series_ids.json.gz"
+    _write_export(path, [
+        {"id": 1399, "original_name": "GoT", "popularity": 300.5},
+        {"id": 1396, "original_name": "Breaking Bad", "popularity": 250.0},
+        {"id": 7, "original_name": "Adult", "popularity": 1.0, "adult": True},
+        "not json",
+        {"id": 60059, "original_name": "Better Call Saul", "popularity": 90.0},
+    ])
+
+    assert load_export(str(path), batch_size=2) == 3
+    rows = execute_query("SELECT id, title, popularity FROM shows ORDER BY id")
+    assert [tuple(r) for r in rows] == [
+        (1396, "Breaking Bad", 250.0),
+        (1399, "Game of Thrones", 300.5),
+        (60059, "Better Call Saul", 90.0),
+    ]
+    # Stubs are catalog entries, not cached details
+    assert get_cached_show(1396) is None
+    assert get_cached_show(1399)["overview"] == "Winter"
+
+
+def test_catalog_enrich_most_popular_first_and_resumes(temp_db, tmp_path):
+    """Test that enrichment fetches popular stubs first, drops unknown ones and resumes."""
+    import asyncio
+    import httpx
+    from shows.catalog import enrich_catalog, load_export
+    from shows.models import get_cached_show
+    from shows.scheduler import RequestBudget
+
+    path = tmp_path / "tv_series_ids.json.gz"
+    _write_export(path, [
+        {"id": show_id, "original_name": f"Show {show_id}", "popularity": float(show_id)}
+        for show_id in (1, 2, 3, 4)
+    ])
+    load_export(str(path))
+
+    async def details(show_id, use_cache=True):
+        if show_id == 3:
+            request = httpx.Request("GET", "https://api.themoviedb.org/3/tv/3")
+            raise httpx.HTTPStatusError("gone", request=request, response=httpx.Response(404, request=request))
+        return {"id": show_id, "name": f"Detailed {show_id}"}
+
+    client = AsyncMock()
+    client.get_show_details.side_effect = details
+
+    first = asyncio.run(enrich_catalog(limit=2, client=client, budget=RequestBudget(600)))
+    assert first == {"enriched": 1, "missing": 1, "failed": 0}
+    assert get_cached_show(4)["title"] == "Detailed 4"
+
+    second = asyncio.run(enrich_catalog(limit=10, client=client, budget=RequestBudget(600)))
+    assert second == {"enriched": 2, "missing": 0, "failed": 0}
+    assert [c.args[0] for c in client.get_show_details.await_args_list] == [4, 3, 2, 1]
+
+
+def test_tmdb_record_then_replay(tmp_path):
+    """Test that recorded TMDb responses replay offline, without the API key."""
+    import asyncio
+    import gzip
+    import httpx
+    from shows.tmdb_client import TMDbClient
+    from shows.tmdb_transport import RecordingTransport, ReplayTransport
+
+    def upstream(request):
+        return httpx.Response(200, json={"id": 1399, "name": "Game of Thrones"})
+
+    corpus = tmp_path / "corpus.jsonl.gz"
+    recorder = TMDbClient(transport=RecordingTransport(corpus, inner=httpx.MockTransport(upstream)))
+    recorder.api_key = "secret"
+    assert asyncio.run(recorder.get_show_details(1399, use_cache=False))["name"] == "Game of Thrones"
+    assert "secret" not in gzip.open(corpus, "rt").read()
+
+    replay = ReplayTransport(corpus)
+    client = TMDbClient(transport=replay)
+    assert asyncio.run(client.get_show_details(1399, use_cache=False))["name"] == "Game of Thrones"
+    with pytest.raises(httpx.HTTPStatusError) as missing:
+        asyncio.run(client.get_show_details(1, use_cache=False))
+    assert missing.value.response.status_code == 404
+    assert replay.requests == 2
+
+
+def test_tmdb_replay_injects_faults(tmp_path):
+    """Test that replay injects rate limits and server errors at the configured rates."""
+    import asyncio
+    from collections import Counter
+    import httpx
+    from shows.tmdb_transport import ReplayTransport
+
+    transport = ReplayTransport(tmp_path / "empty.jsonl.gz", rate_limit_rate=0.2, error_rate=0.3, seed=7)
+
+    async def statuses():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [
+                (await client.get("https://api.themoviedb.org/3/tv/1")).status_code
+                for _ in range(1000)
+            ]
+
+    counts = Counter(asyncio.run(statuses()))
+    assert set(counts) == {404, 429, 503}
+    assert 150 < counts[429] < 250
+    assert 250 < counts[503] < 350
@@ -0,0 +1,198 @@
+"""Tests for the precomputed watch statistics."""
+
+import pytest
+
+
+@pytest.fixture
+def library(test_user):
+    from shows.models import add_show_to_user, cache_season_from_tmdb, cache_show_from_tmdb
+
+    cache_show_from_tmdb({
+        "id": 1399,
+        "name": "Game of Thrones",
+        "genres": [{"name": "Drama"}, {"name": "Fantasy"}],
+    })
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "genres": [{"name": "Drama"}]})
+    cache_season_from_tmdb(1399, {
+        "season_number": 1,
+        "episodes": [{"episode_number": n, "runtime": 60} for n in range(1, 4)],
+    })
+    cache_season_from_tmdb(1396, {
+        "season_number": 1,
+        "episodes": [{"episode_number": n, "runtime": 45} for n in range(1, 3)],
+    })
+    add_show_to_user(test_user["id"], 1399)
+    add_show_to_user(test_user["id"], 1396)
+    return test_user["id"]
+
+
+def _backdate(user_id, show_id, season, episode, watched_at):
+    from database import execute_write
+
+    execute_write(
+        "UPDATE episodes_watched SET watched_at = ? "
+        "WHERE user_id = ? AND show_id = ? AND season = ? AND episode = ?",
+        (watched_at, user_id, show_id, season, episode),
+    )
+
+
+def test_stats_requires_auth(client):
+    """Test that stats require authentication."""
+    response = client.get("/api/stats")
+    assert response.status_code == 403
+
+
+def test_stats_empty(client, auth_headers, test_user):
+    """Test stats for a user who has watched nothing."""
+    response = client.get("/api/stats", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "episodes": 0,
+        "minutes": 0,
+        "hours": 0.0,
+        "by_month": [],
+        "by_genre": [],
+    }
+
+
+def test_marks_update_rollups(library):
+    """Test that single and batch marks add episodes and runtime to every rollup."""
+    from episodes.models import mark_episode_watched, mark_episodes_watched_batch
+    from stats.models import get_stats
+
+    mark_episode_watched(library, 1399, 1, 1)
+    # (1, 1) is already watched and (1, 2) is repeated; each counts once
+    assert mark_episodes_watched_batch(library, 1399, [(1, 1), (1, 2), (1, 2)]) == 1
+    mark_episodes_watched_batch(library, 1396, [(1, 1), (1, 2)])
+
+    stats = get_stats(library)
+    assert stats["episodes"] == 4
+    assert stats["minutes"] == 2 * 60 + 2 * 45
+    assert stats["hours"] == 3.5
+    assert len(stats["by_month"]) == 1
+    assert stats["by_month"][0]["episodes"] == 4
+    assert stats["by_genre"] == [
+        {"genre": "Drama", "episodes": 4, "minutes": 210},
+        {"genre": "Fantasy", "episodes": 2, "minutes": 120},
+    ]
+
+
+def test_unmark_subtracts_from_original_month(library):
+    """Test that unmarking removes the episode from the month it was watched in."""
+    from episodes.models import mark_episode_watched, unmark_episode_watched
+    from stats.models import get_stats, rebuild_stats
+
+    mark_episode_watched(library, 1399, 1, 1)
+    mark_episode_watched(library, 1399, 1, 2)
+    _backdate(library, 1399, 1, 1, "2023-05-04 20:00:00")
+    rebuild_stats(library)
+
+    assert unmark_episode_watched(library, 1399, 1, 1) is True
+    assert unmark_episode_watched(library, 1399, 1, 1) is False
+
+    stats = get_stats(library)
+    assert stats["episodes"] == 1
+    assert stats["minutes"] == 60
+    assert "2023-05" not in {m["month"] for m in stats["by_month"]}
+
+
+def test_mutations_update_rollups(library):
+    """Test that mixed mutation batches apply only their applied operations."""
+    from episodes.models import apply_episode_mutations
+    from stats.models import get_stats
+
+    apply_episode_mutations(library, [
+        {"op": "mark", "show_id": 1399, "season": 1, "episode": 1},
+        {"op": "mark", "show_id": 1399, "season": 1, "episode": 2},
+        {"op": "unmark", "show_id": 1399, "season": 1, "episode": 2},
+        {"op": "unmark", "show_id": 1396, "season": 1, "episode": 1},
+    ])
+
+    stats = get_stats(library)
+    assert stats["episodes"] == 1
+    assert stats["minutes"] == 60
+
+
+def test_rebuild_matches_incremental(library):
+    """Test that a rebuild from history reproduces the incremental rollups."""
+    from episodes.models import mark_episodes_watched_batch, unmark_episode_watched
+    from stats.models import get_stats, rebuild_stats
+
+    mark_episodes_watched_batch(library, 1399, [(1, 1), (1, 2), (1, 3)])
+    mark_episodes_watched_batch(library, 1396, [(1, 1)])
+    unmark_episode_watched(library, 1399, 1, 2)
+    incremental = get_stats(library)
+
+    assert rebuild_stats() == 1
+    assert get_stats(library) == incremental
+
+
+def test_rebuild_splits_history_by_month(library):
+    """Test that a rebuild buckets watches by the month they happened in."""
+    from episodes.models import mark_episodes_watched_batch
+    from stats.models import get_stats, rebuild_stats
+
+    mark_episodes_watched_batch(library, 1396, [(1, 1), (1, 2)])
+    _backdate(library, 1396, 1, 1, "2024-01-15 21:00:00")
+    _backdate(library, 1396, 1, 2, "2024-02-01 21:00:00")
+
+    rebuild_stats(library)
+    assert get_stats(library)["by_month"] == [
+        {"month": "2024-01", "episodes": 1, "minutes": 45},
+        {"month": "2024-02", "episodes": 1, "minutes": 45},
+    ]
+
+
+def test_stats_endpoint_etag(client, auth_headers, library):
+    """Test that stats are served with an ETag that changes on every watch."""
+    from episodes.models import mark_episode_watched
+
+    first = client.get("/api/stats", headers=auth_headers)
+    etag = first.headers["etag"]
+    cached = client.get("/api/stats", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    mark_episode_watched(library, 1399, 1, 1)
+    response = client.get("/api/stats", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["episodes"] == 1
+
+
+def test_minutes_fall_back_to_show_runtime(test_user):
+    """Test that episodes without cached metadata use the show's typical runtime."""
+    from episodes.models import mark_episode_watched
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+    from stats.models import get_stats, rebuild_stats
+
+    cache_show_from_tmdb({"id": 60625, "name": "Rick and Morty", "episode_run_time": [22]})
+    add_show_to_user(test_user["id"], 60625)
+    mark_episode_watched(test_user["id"], 60625, 1, 1)
+
+    assert get_stats(test_user["id"])["minutes"] == 22
+    rebuild_stats(test_user["id"])
+    assert get_stats(test_user["id"])["minutes"] == 22
+
+
+def test_unmark_takes_back_what_was_credited(library):
+    """Test that metadata changes between mark and unmark do not skew the rollups."""
+    from episodes.models import apply_episode_mutations, mark_episode_watched, unmark_episode_watched
+    from shows.models import cache_season_from_tmdb, cache_show_from_tmdb
+    from stats.models import get_stats
+
+    mark_episode_watched(library, 1399, 1, 1)
+    # Runtimes and genres change after the mark
+    cache_season_from_tmdb(1399, {"season_number": 1, "episodes": [{"episode_number": 1, "runtime": 90}]})
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "genres": [{"name": "Action"}]})
+    unmark_episode_watched(library, 1399, 1, 1)
+
+    stats = get_stats(library)
+    assert (stats["episodes"], stats["minutes"]) == (0, 0)
+    assert all(g["episodes"] == 0 and g["minutes"] == 0 for g in stats["by_genre"])
+
+    # A mark and unmark of the same episode in one batch cancel out
+    apply_episode_mutations(library, [
+        {"op": "mark", "show_id": 1399, "season": 1, "episode": 2},
+        {"op": "unmark", "show_id": 1399, "season": 1, "episode": 2},
+    ])
+    stats = get_stats(library)
+    assert (stats["episodes"], stats["minutes"]) == (0, 0)
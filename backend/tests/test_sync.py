@@ -0,0 +1,101 @@
+"""Tests for the delta sync endpoint and change log."""
+
+import pytest
+
+
+@pytest.fixture
+def library(test_user):
+    from shows.models import add_show_to_user, cache_show_from_tmdb
+
+    cache_show_from_tmdb({"id": 1399, "name": "Game of Thrones", "number_of_episodes": 10})
+    cache_show_from_tmdb({"id": 1396, "name": "Breaking Bad", "number_of_episodes": 5})
+    add_show_to_user(test_user["id"], 1399)
+    add_show_to_user(test_user["id"], 1396)
+    return test_user["id"]
+
+
+def test_sync_requires_auth(client):
+    """Test that sync requires authentication."""
+    response = client.get("/api/sync")
+    assert response.status_code == 403
+
+
+def test_sync_from_zero_returns_full_library(client, auth_headers, library):
+    """Test that a first sync resets the client with every row."""
+    from episodes.models import mark_episodes_watched_batch
+
+    mark_episodes_watched_batch(library, 1399, [(1, 1), (1, 2)])
+
+    response = client.get("/api/sync", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reset"] is True
+    assert data["version"] == 3
+    assert {s["show_id"] for s in data["shows"]} == {1399, 1396}
+    assert [(e["season"], e["episode"]) for e in data["episodes"]] == [(1, 1), (1, 2)]
+
+
+def test_sync_returns_only_latest_changes_with_tombstones(client, auth_headers, library):
+    """Test that a delta carries one entry per changed key, deletions as tombstones."""
+    from episodes.models import mark_episode_watched, unmark_episode_watched
+    from shows.models import remove_show_from_user, update_user_show_status
+
+    since = client.get("/api/sync", headers=auth_headers).json()["version"]
+
+    mark_episode_watched(library, 1399, 1, 1)
+    mark_episode_watched(library, 1399, 1, 2)
+    unmark_episode_watched(library, 1399, 1, 2)
+    update_user_show_status(library, 1399, "completed")
+    remove_show_from_user(library, 1396)
+
+    data = client.get(f"/api/sync?since={since}", headers=auth_headers).json()
+    assert data["reset"] is False
+    assert data["version"] == since + 5
+    shows = {s["show_id"]: s for s in data["shows"]}
+    assert shows[1399]["op"] == "upsert"
+    assert shows[1399]["status"] == "completed"
+    assert shows[1396] == {"op": "delete", "show_id": 1396}
+    episodes = {(e["season"], e["episode"]): e["op"] for e in data["episodes"]}
+    assert episodes == {(1, 1): "upsert", (1, 2): "delete"}
+
+    unchanged = client.get(f"/api/sync?since={data['version']}", headers=auth_headers).json()
+    assert unchanged["shows"] == [] and unchanged["episodes"] == []
+
+
+def test_sync_picks_up_catalog_refresh_of_tracked_show(client, auth_headers, library):
+    """Test that re-caching a tracked show with new listed fields reaches delta sync."""
+    from shows.models import cache_show_from_tmdb
+
+    since = client.get("/api/sync", headers=auth_headers).json()["version"]
+    cache_show_from_tmdb({"id": 1399, "name": "New", "number_of_episodes": 12})
+
+    data = client.get(f"/api/sync?since={since}", headers=auth_headers).json()
+    assert data["version"] == since + 1
+    assert [(s["show_id"], s["op"]) for s in data["shows"]] == [(1399, "upsert")]
+    assert data["shows"][0]["title"] == "New"
+    assert data["shows"][0]["total_episodes"] == 12
+
+
+def test_compaction_keeps_latest_entry_and_expires_tombstones(library):
+    """Test that compaction drops superseded entries and raises the sync floor."""
+    from database import execute_query, execute_write, transaction
+    from episodes.models import mark_episode_watched, unmark_episode_watched
+    from sync.models import compact_change_log, get_changes
+
+    for _ in range(3):
+        mark_episode_watched(library, 1399, 1, 1)
+        unmark_episode_watched(library, 1399, 1, 1)
+
+    with transaction() as conn:
+        compact_change_log(conn, library)
+    rows = execute_query(
+        "SELECT entity, op FROM change_log WHERE user_id = ? ORDER BY id", (library,)
+    )
+    assert [tuple(r) for r in rows] == [("show", "upsert"), ("show", "upsert"), ("episode", "delete")]
+    assert get_changes(library, 2)["reset"] is False
+
+    execute_write("UPDATE change_log SET created_at = datetime('now', '-31 day')")
+    with transaction() as conn:
+        compact_change_log(conn, library, tombstone_days=30)
+    assert get_changes(library, 2)["reset"] is True
+    assert get_changes(library, 8)["reset"] is False
@@ -0,0 +1,262 @@
+"""
+Lightweight request tracing with OpenTelemetry-compatible output.
+
+TracingMiddleware opens a server span for each sampled request. Code
+below it opens child spans with `span()`; database.py does this for every
+named query and transaction, and the TMDb and Google HTTP clients for
+each call. The current span lives in a contextvar, so spans nest across
+awaits, gathered tasks and asyncio.to_thread without being passed around.
+
+When a request finishes its spans are exported as one OTLP/JSON
+`resourceSpans` document per line. The file exporter's output can be
+read by the OpenTelemetry Collector's otlpjsonfile receiver, and the
+OTLP exporter posts the same document to a collector's /v1/traces.
+
+Unsampled requests never create spans; `span()` then costs one contextvar
+lookup. Incoming W3C traceparent headers continue the caller's trace and
+honour its sampling decision.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+# OTLP status codes
+STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind",
+        "start_ns", "end_ns", "attributes", "error", "_finished",
+    )
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: int, finished: list):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        # Spans of the trace that have ended, shared by the whole trace
+        self._finished = finished
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self._finished.append(self)
+
+    def child(self, name: str, kind: int = INTERNAL) -> "Span":
+        return Span(self.trace_id, self.span_id, name, kind, self._finished)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        if self.error:
+            data["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return data
+
+
+class _NoopSpan:
+    """Stands in for a span when the request is not traced."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: ContextVar[Optional[Span]] = ContextVar("tracing_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Time the enclosed block as a child of the current span. Yields the
+    span (or NOOP_SPAN outside a traced request) for adding attributes.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = parent.child(name, kind)
+    if attributes:
+        child.attributes.update(attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent, or None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class SpanExporter:
+    """
+    Writes finished traces as OTLP/JSON, one resourceSpans document per
+    line to `path`, and/or POSTs them to an OTLP/HTTP `endpoint`.
+    """
+
+    def __init__(self, path: str = "", endpoint: str = "", service_name: str = "showtracker-api"):
+        self.path = Path(path) if path else None
+        if self.path and not self.path.is_absolute():
+            self.path = Path(__file__).parent / self.path
+        self.endpoint = endpoint
+        self.resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+        self._lock = threading.Lock()
+
+    def document(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{
+                    "scope": {"name": "showtracker"},
+                    "spans": [s.to_otlp() for s in spans],
+                }],
+            }]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        """Export one trace's spans. Blocking; runs in an executor thread."""
+        line = json.dumps(self.document(spans), separators=(",", ":"))
+        if self.path:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        if self.endpoint:
+            import httpx
+
+            try:
+                httpx.post(
+                    self.endpoint, content=line, timeout=2.0,
+                    headers={"Content-Type": "application/json"},
+                )
+            except httpx.HTTPError as e:
+                logger.warning("Span export to %s failed: %s", self.endpoint, e)
+
+
+class TracingMiddleware:
+    """
+    Opens a server span per sampled HTTP request, named after the matched
+    route template, and hands the finished trace to the exporter.
+    """
+
+    def __init__(self, app: ASGIApp, exporter: SpanExporter, sample_rate: float = 1.0):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._route_paths: Dict[Any, str] = {}
+
+    def _route_path(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return scope["path"]
+        if endpoint not in self._route_paths:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is not None:
+                    self._route_paths[route.endpoint] = route.path
+        return self._route_paths.get(endpoint, scope["path"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        sampled = parent[2] if parent else random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        finished: List[Span] = []
+        trace_id, parent_id = (parent[0], parent[1]) if parent else (os.urandom(16).hex(), None)
+        root = Span(trace_id, parent_id, scope["method"], SERVER, finished)
+        root.set_attribute("http.method", scope["method"])
+        root.set_attribute("url.path", scope["path"])
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            route = self._route_path(scope)
+            root.name = f"{scope['method']} {route}"
+            root.set_attribute("http.route", route)
+            root.end()
+            # Exported in the background so the response is not held up
+            asyncio.get_running_loop().run_in_executor(None, self.exporter.export, list(finished))
@@ -1,11 +1,24 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || ''
 
+// TMDb poster/backdrop path (e.g. "/abc.jpg") served through the backend image cache
+export function imageUrl(path: string, width: number): string {
+  return `${API_BASE_URL}/api/images${path}?w=${width}`
+}
+
 interface RequestOptions {
   method?: string
   body?: unknown
   headers?: Record<string, string>
 }
 
+export interface UserShowFilters {
+  sort?: 'added' | 'watched' | 'rating'
+  status?: 'watching' | 'completed' | 'dropped' | 'paused'
+  favorite?: boolean
+  genre?: string
+  min_rating?: number
+}
+
 class ApiClient {
   private baseUrl: string
   private token: string | null = null
@@ -95,6 +108,26 @@ class ApiClient {
     }>(`/api/shows/${showId}`)
   }
 
+  async getShowFull(showId: number) {
+    return this.request<{
+      show: Record<string, unknown>
+      in_list: boolean
+      watched_count: number
+      seasons: Array<{
+        season_number: number
+        name: string | null
+        air_date: string | null
+        episodes: Array<{
+          episode_number: number
+          name: string | null
+          air_date: string | null
+          runtime: number | null
+          watched: boolean
+        }>
+      }>
+    }>(`/api/shows/${showId}/full`)
+  }
+
   async getSeasonDetails(showId: number, seasonNumber: number) {
     return this.request<{
       episodes: Array<{
@@ -113,7 +146,12 @@ class ApiClient {
     })
   }
 
-  async getUserShows() {
+  async getUserShows(filters: UserShowFilters = {}) {
+    const params = new URLSearchParams()
+    for (const [key, value] of Object.entries(filters)) {
+      if (value !== undefined) params.set(key, String(value))
+    }
+    const query = params.toString()
     return this.request<{
       shows: Array<{
         show_id: number
@@ -123,8 +161,39 @@ class ApiClient {
         favorite: boolean
         total_episodes: number
         total_seasons: number
+        genres?: string | null
+        episode_run_time?: number | null
+        last_watched_at?: string | null
       }>
-    }>('/api/shows/user/list')
+      version?: number
+    }>(`/api/shows/user/list${query ? `?${query}` : ''}`)
+  }
+
+  async syncChanges(since: number) {
+    return this.request<{
+      version: number
+      reset: boolean
+      shows: Array<
+        | { op: 'delete'; show_id: number }
+        | {
+            op: 'upsert'
+            show_id: number
+            title: string
+            poster_path: string | null
+            status: string
+            favorite: boolean
+            total_episodes: number
+            total_seasons: number
+          }
+      >
+      episodes: Array<{
+        op: 'upsert' | 'delete'
+        show_id: number
+        season: number
+        episode: number
+        watched_at?: string
+      }>
+    }>(`/api/sync?since=${since}`)
   }
 
   async updateShowStatus(showId: number, status: string) {
@@ -152,6 +221,22 @@ class ApiClient {
     })
   }
 
+  async applyEpisodeMutations(
+    operations: Array<{
+      op: 'mark' | 'unmark'
+      show_id: number
+      season: number
+      episode: number
+      idempotency_key?: string
+    }>,
+    coalesce = false
+  ) {
+    return this.request(`/api/episodes/mutations?coalesce=${coalesce}`, {
+      method: 'POST',
+      body: { operations },
+    })
+  }
+
   async getWatchedEpisodes(showId: number) {
     return this.request<{
       show_id: number
@@ -181,6 +266,29 @@ class ApiClient {
     }>('/api/episodes/progress')
   }
 
+  async getDashboard() {
+    return this.request<{
+      shows: Array<{
+        show_id: number
+        title: string
+        poster_path: string | null
+        status: string
+        favorite: boolean
+        total_episodes: number
+        total_seasons: number
+        watched_episodes: number
+        percentage: number
+        up_next: { season: number; episode: number; name: string | null; air_date: string | null } | null
+      }>
+      stats: {
+        total: number
+        watching: number
+        completed: number
+        episodes_watched: number
+      }
+    }>('/api/dashboard')
+  }
+
   async markSeasonWatched(showId: number, season: number, episodeCount: number) {
     return this.request('/api/episodes/mark-season-watched', {
       method: 'POST',
@@ -24,7 +24,7 @@ describe('ShowCard', () => {
     renderWithRouter(<ShowCard {...defaultProps} />)
     
     const img = screen.getByAltText('Breaking Bad')
-    expect(img).toHaveAttribute('src', 'https://image.tmdb.org/t/p/w300/path/to/poster.jpg')
+    expect(img).toHaveAttribute('src', '/api/images/path/to/poster.jpg?w=300')
   })
 
   it('renders placeholder image when posterPath is null', () => {
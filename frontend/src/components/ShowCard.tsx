@@ -1,4 +1,5 @@
 import { Link } from 'react-router-dom'
+import { imageUrl } from '../api/client'
 
 interface ShowCardProps {
   id: number
@@ -16,7 +17,6 @@ interface ShowCardProps {
   }
 }
 
-const TMDB_IMAGE_BASE = 'https://image.tmdb.org/t/p/w300'
 const PLACEHOLDER_IMAGE = 'https://via.placeholder.com/300x450?text=No+Image'
 
 export default function ShowCard({
@@ -30,7 +30,7 @@ export default function ShowCard({
   showActions = true,
   progress,
 }: ShowCardProps) {
-  const posterUrl = posterPath ? `${TMDB_IMAGE_BASE}${posterPath}` : PLACEHOLDER_IMAGE
+  const posterUrl = posterPath ? imageUrl(posterPath, 300) : PLACEHOLDER_IMAGE
 
   return (
     <div className="card group hover:shadow-md transition-shadow">
@@ -11,6 +11,7 @@ vi.mock('../api/client', () => ({
     addShowToList: vi.fn(),
     removeShowFromList: vi.fn(),
     updateShowStatus: vi.fn(),
+    syncChanges: vi.fn(),
   },
 }))
 
@@ -144,6 +145,31 @@ describe('useUserShows', () => {
     expect(api.getUserShows).toHaveBeenCalled()
   })
 
+  it('pulls only changes after adding a show once the list is loaded', async () => {
+    const existing = { show_id: 1, title: 'Test', poster_path: null, status: 'watching', favorite: false, total_episodes: 10, total_seasons: 1 }
+    vi.mocked(api.getUserShows).mockResolvedValue({ shows: [existing], version: 4 })
+    vi.mocked(api.addShowToList).mockResolvedValue({})
+    vi.mocked(api.syncChanges).mockResolvedValue({
+      version: 5,
+      reset: false,
+      shows: [{ op: 'upsert', show_id: 2, title: 'New', poster_path: null, status: 'watching', favorite: false, total_episodes: 8, total_seasons: 1 }],
+      episodes: [],
+    })
+
+    const { result } = renderHook(() => useUserShows())
+
+    await act(async () => {
+      await result.current.fetchShows()
+    })
+    await act(async () => {
+      await result.current.addShow(2)
+    })
+
+    expect(api.syncChanges).toHaveBeenCalledWith(4)
+    expect(api.getUserShows).toHaveBeenCalledTimes(1)
+    expect(result.current.shows.map(s => s.show_id)).toEqual([2, 1])
+  })
+
   it('removes show from list', async () => {
     vi.mocked(api.removeShowFromList).mockResolvedValue({})
     vi.mocked(api.getUserShows).mockResolvedValue({
@@ -1,4 +1,4 @@
-import { useState, useCallback } from 'react'
+import { useState, useCallback, useRef } from 'react'
 import api from '../api/client'
 
 export interface ShowSearchResult {
@@ -71,6 +71,8 @@ export function useUserShows() {
   const [shows, setShows] = useState<UserShow[]>([])
   const [isLoading, setIsLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  // data_version of the list held in state; null until the first full load
+  const versionRef = useRef<number | null>(null)
 
   const fetchShows = useCallback(async () => {
     setIsLoading(true)
@@ -79,6 +81,7 @@ export function useUserShows() {
     try {
       const data = await api.getUserShows()
       setShows(data.shows)
+      versionRef.current = data.version ?? null
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load shows')
     } finally {
@@ -86,16 +89,52 @@ export function useUserShows() {
     }
   }, [])
 
+  // Apply only the show changes made since the last load
+  const syncShows = useCallback(async () => {
+    if (versionRef.current === null) {
+      await fetchShows()
+      return
+    }
+    const data = await api.syncChanges(versionRef.current)
+    setShows(prev => {
+      const byId = new Map<number, UserShow>(data.reset ? [] : prev.map(s => [s.show_id, s]))
+      const added: UserShow[] = []
+      for (const change of data.shows) {
+        if (change.op === 'delete') {
+          byId.delete(change.show_id)
+          continue
+        }
+        const show: UserShow = {
+          show_id: change.show_id,
+          title: change.title,
+          poster_path: change.poster_path,
+          status: change.status,
+          favorite: change.favorite,
+          total_episodes: change.total_episodes,
+        }
+        const existing = byId.get(show.show_id)
+        if (existing) {
+          byId.set(show.show_id, { ...existing, ...show })
+        } else {
+          added.push(show)
+        }
+      }
+      // The list is newest first
+      return [...added, ...byId.values()]
+    })
+    versionRef.current = data.version
+  }, [fetchShows])
+
   const addShow = useCallback(async (showId: number) => {
     try {
       await api.addShowToList(showId)
-      await fetchShows() // Refresh list
+      await syncShows() // Pull the new show (and any other changes)
       return true
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to add show')
       return false
     }
-  }, [fetchShows])
+  }, [syncShows])
 
   const removeShow = useCallback(async (showId: number) => {
     try {
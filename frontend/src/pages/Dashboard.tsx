@@ -11,7 +11,7 @@ interface ShowProgress {
   watched_episodes: number
   percentage: number
   status: string
-  poster_path?: string
+  poster_path?: string | null
 }
 
 export default function Dashboard() {
@@ -27,17 +27,8 @@ export default function Dashboard() {
   const loadProgress = async () => {
     setIsLoading(true)
     try {
-      const data = await api.getAllProgress()
-      // Also get poster paths from user shows
-      const userShows = await api.getUserShows()
-      const posterMap = new Map(
-        userShows.shows.map((s) => [s.show_id, s.poster_path])
-      )
-      const showsWithPosters = data.shows.map((s) => ({
-        ...s,
-        poster_path: posterMap.get(s.show_id) || null,
-      }))
-      setShows(showsWithPosters)
+      const data = await api.getDashboard()
+      setShows(data.shows)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load progress')
     } finally {
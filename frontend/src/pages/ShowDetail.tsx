@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import api from '../api/client'
+import api, { imageUrl } from '../api/client'
 import ProgressBar from '../components/ProgressBar'
 import EpisodeGrid from '../components/EpisodeGrid'
 
@@ -25,8 +25,6 @@ interface ShowDetails {
   }>
 }
 
-const TMDB_IMAGE_BASE = 'https://image.tmdb.org/t/p'
-
 function episodeKey(season: number, episode: number): string {
   return `S${String(season).padStart(2, '0')}E${String(episode).padStart(2, '0')}`
 }
@@ -49,22 +47,27 @@ export default function ShowDetail() {
     setError(null)
 
     try {
-      // Load show details
-      const showData = await api.getShowDetails(showId)
-      setShow(showData)
-
-      // Check if in user's list and load watched episodes
-      try {
-        const watchedData = await api.getWatchedEpisodes(showId)
-        const watchedSet = new Set(
-          watchedData.episodes.map((e) => episodeKey(e.season, e.episode))
+      // Details, seasons and watched flags arrive in a single request
+      const data = await api.getShowFull(showId)
+      const seasons = data.seasons.map((season) => ({
+        season_number: season.season_number,
+        episode_count: season.episodes.length,
+        name: season.name || `Season ${season.season_number}`,
+      }))
+      setShow({
+        ...(data.show as unknown as ShowDetails),
+        seasons: seasons.length > 0 ? seasons : undefined,
+      })
+      setWatchedEpisodes(
+        new Set(
+          data.seasons.flatMap((season) =>
+            season.episodes
+              .filter((e) => e.watched)
+              .map((e) => episodeKey(season.season_number, e.episode_number))
+          )
         )
-        setWatchedEpisodes(watchedSet)
-        setIsInList(true)
-      } catch {
-        // Not in list or not authenticated for this show
-        setIsInList(false)
-      }
+      )
+      setIsInList(data.in_list)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load show')
     } finally {
@@ -110,11 +113,17 @@ export default function ShowDetail() {
     })
 
     try {
-      if (watched) {
-        await api.markEpisodeWatched(showId, season, episode)
-      } else {
-        await api.unmarkEpisodeWatched(showId, season, episode)
-      }
+      // Rapid toggles are merged server-side; the key makes retries safe
+      await api.applyEpisodeMutations(
+        [{
+          op: watched ? 'mark' : 'unmark',
+          show_id: showId,
+          season,
+          episode,
+          idempotency_key: crypto.randomUUID(),
+        }],
+        true
+      )
     } catch {
       // Revert on error
       setWatchedEpisodes((prev) => {
@@ -187,7 +196,7 @@ export default function ShowDetail() {
       {show.backdrop_path && (
         <div className="relative -mx-4 -mt-8 mb-8 h-64 overflow-hidden">
           <img
-            src={`${TMDB_IMAGE_BASE}/w1280${show.backdrop_path}`}
+            src={imageUrl(show.backdrop_path, 1280)}
             alt=""
             className="w-full h-full object-cover"
           />
@@ -201,7 +210,7 @@ export default function ShowDetail() {
           <img
             src={
               show.poster_path
-                ? `${TMDB_IMAGE_BASE}/w300${show.poster_path}`
+                ? imageUrl(show.poster_path, 300)
                 : 'https://via.placeholder.com/300x450?text=No+Image'
             }
             alt={title}